@@ -0,0 +1,40 @@
+"""test_score_stats summary table
+
+Revision ID: 0c9b1227a974
+Revises: 76baea536b50
+Create Date: 2026-10-17 22:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c9b1227a974'
+down_revision = '76baea536b50'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("test_score_stats"):
+        return
+    
+    # Сводка заполняется по test_results при запуске бота (ensure_test_statistics)
+    op.create_table(
+        "test_score_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("tests_count", sa.BigInteger(), nullable=False),
+        sa.Column("passed_count", sa.BigInteger(), nullable=False),
+        sa.Column("first_tests_count", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("score", name="test_score_stats_score_key"),
+    )
+    op.create_index("ix_test_score_stats_id", "test_score_stats", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_test_score_stats_id", table_name="test_score_stats")
+    op.drop_table("test_score_stats")
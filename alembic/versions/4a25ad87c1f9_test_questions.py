@@ -0,0 +1,41 @@
+"""test_questions table
+
+Revision ID: 4a25ad87c1f9
+Revises: 0c9b1227a974
+Create Date: 2026-10-17 22:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a25ad87c1f9'
+down_revision = '0c9b1227a974'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("test_questions"):
+        return
+    
+    # Пустая таблица - бот использует встроенный набор вопросов
+    op.create_table(
+        "test_questions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("question", sa.Text(), nullable=False),
+        sa.Column("options", sa.JSON(), nullable=False),
+        sa.Column("correct_answer", sa.Integer(), nullable=False),
+        sa.Column("explanation", sa.Text(), nullable=True),
+        sa.Column("sort_order", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_test_questions_id", "test_questions", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_test_questions_id", table_name="test_questions")
+    op.drop_table("test_questions")
@@ -0,0 +1,58 @@
+"""funnel_daily and funnel_user_steps rollup tables
+
+Revision ID: 5b834b8ef4a9
+Revises: 4a25ad87c1f9
+Create Date: 2026-10-17 22:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b834b8ef4a9'
+down_revision = '4a25ad87c1f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    
+    # Сводки заполняются по user_actions командой /rebuild_funnel
+    if not inspector.has_table("funnel_daily"):
+        op.create_table(
+            "funnel_daily",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("step", sa.String(100), nullable=False),
+            sa.Column("product_slug", sa.String(100), nullable=False),
+            sa.Column("events_count", sa.BigInteger(), nullable=False),
+            sa.Column("users_count", sa.BigInteger(), nullable=False),
+            sa.Column("amount_kopecks", sa.BigInteger(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("day", "step", "product_slug", name="uq_funnel_daily_day_step_product"),
+        )
+        op.create_index("ix_funnel_daily_id", "funnel_daily", ["id"])
+    
+    if not inspector.has_table("funnel_user_steps"):
+        op.create_table(
+            "funnel_user_steps",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column("step", sa.String(100), nullable=False),
+            sa.Column("product_slug", sa.String(100), nullable=False),
+            sa.Column("first_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("user_id", "step", "product_slug", name="uq_funnel_user_steps_user_step_product"),
+        )
+        op.create_index("ix_funnel_user_steps_id", "funnel_user_steps", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_funnel_user_steps_id", table_name="funnel_user_steps")
+    op.drop_table("funnel_user_steps")
+    op.drop_index("ix_funnel_daily_id", table_name="funnel_daily")
+    op.drop_table("funnel_daily")
@@ -0,0 +1,31 @@
+"""broadcast_messages last_user_id
+
+Revision ID: 65e0f807ad0f
+Revises: f6b83c265c41
+Create Date: 2026-10-17 22:32:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '65e0f807ad0f'
+down_revision = 'f6b83c265c41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("broadcast_messages"):
+        return
+    
+    columns = {c["name"] for c in inspector.get_columns("broadcast_messages")}
+    if "last_user_id" not in columns:
+        # Курсор рассылки; у старых рассылок его нет - продолжаются с начала
+        op.add_column("broadcast_messages", sa.Column("last_user_id", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE broadcast_messages DROP COLUMN IF EXISTS last_user_id")
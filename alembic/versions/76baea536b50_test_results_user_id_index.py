@@ -0,0 +1,28 @@
+"""test_results user_id index
+
+Revision ID: 76baea536b50
+Revises: 9c167ba8f709
+Create Date: 2026-10-17 22:35:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '76baea536b50'
+down_revision = '9c167ba8f709'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("test_results"):
+        return
+    
+    # Проверка первого теста пользователя при каждом новом результате
+    op.execute("CREATE INDEX IF NOT EXISTS ix_test_results_user_id ON test_results (user_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_test_results_user_id")
@@ -0,0 +1,52 @@
+"""timers user_id/timer_type unique and pending index
+
+Revision ID: 78f1367e03e1
+Revises: 65e0f807ad0f
+Create Date: 2026-10-17 22:33:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '78f1367e03e1'
+down_revision = '65e0f807ad0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("timers"):
+        return
+    
+    constraints = {c["name"] for c in inspector.get_unique_constraints("timers")}
+    if "uq_timers_user_type" not in constraints:
+        # Дубли таймеров: оставляем уже сработавший (оффер был отправлен),
+        # иначе - самый ранний
+        op.execute(
+            """
+            DELETE FROM timers
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (
+                        PARTITION BY user_id, timer_type ORDER BY is_triggered DESC, id
+                    ) AS rn
+                    FROM timers
+                ) ranked
+                WHERE rn > 1
+            )
+            """
+        )
+        op.create_unique_constraint("uq_timers_user_type", "timers", ["user_id", "timer_type"])
+    
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_timers_pending_expires_at "
+        "ON timers (expires_at) WHERE is_triggered = false AND is_cancelled = false"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_timers_pending_expires_at")
+    op.execute("ALTER TABLE timers DROP CONSTRAINT IF EXISTS uq_timers_user_type")
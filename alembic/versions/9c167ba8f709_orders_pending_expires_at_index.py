@@ -0,0 +1,30 @@
+"""orders pending expires_at index
+
+Revision ID: 9c167ba8f709
+Revises: 78f1367e03e1
+Create Date: 2026-10-17 22:34:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c167ba8f709'
+down_revision = '78f1367e03e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("orders"):
+        return
+    
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_orders_pending_expires_at "
+        "ON orders (expires_at) WHERE status = 'pending'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_orders_pending_expires_at")
@@ -0,0 +1,31 @@
+"""user_products pending delivery index
+
+Revision ID: b5e5ad06ba31
+Revises: 
+Create Date: 2026-10-17 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e5ad06ba31'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # На пустой БД таблицы создает create_all уже с индексом
+    if not sa.inspect(op.get_bind()).has_table("user_products"):
+        return
+    
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_user_products_pending_delivery "
+        "ON user_products (purchased_at) WHERE file_delivered = false"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_user_products_pending_delivery")
@@ -0,0 +1,48 @@
+"""user_products order_id unique
+
+Revision ID: f6b83c265c41
+Revises: b5e5ad06ba31
+Create Date: 2026-10-17 22:31:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b83c265c41'
+down_revision = 'b5e5ad06ba31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("user_products"):
+        return
+    
+    constraints = {c["name"] for c in inspector.get_unique_constraints("user_products")}
+    if "uq_user_products_order_id" in constraints:
+        return
+    
+    # Дубли от повторной обработки webhook: оставляем доставленную покупку,
+    # при равенстве - самую раннюю
+    op.execute(
+        """
+        DELETE FROM user_products
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY order_id ORDER BY file_delivered DESC, id
+                ) AS rn
+                FROM user_products
+            ) ranked
+            WHERE rn > 1
+        )
+        """
+    )
+    op.create_unique_constraint("uq_user_products_order_id", "user_products", ["order_id"])
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE user_products DROP CONSTRAINT IF EXISTS uq_user_products_order_id")
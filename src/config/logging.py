@@ -2,17 +2,46 @@
 Конфигурация логирования
 """
 
+import random
 import sys
 from loguru import logger
 from src.config.settings import settings
 
+# Уровень, начиная с которого записи не прореживаются
+SAMPLING_MAX_LEVEL = 30  # WARNING
+
+
+def category_logger(category: str):
+    """
+    Логгер категории для выборочной записи (LOG_SAMPLE_RATES)
+    
+    Пример: updates_logger = category_logger("updates")
+    """
+    return logger.bind(category=category)
+
+
+def _sampling_filter(record) -> bool:
+    """Прореживание записей по категориям; предупреждения и ошибки не прореживаются"""
+    rate = settings.log_sample_rates.get(record["extra"].get("category"))
+    if rate is None or rate >= 1 or record["level"].no >= SAMPLING_MAX_LEVEL:
+        return True
+    return random.random() < rate
+
 
 def setup_logging():
-    """Настройка системы логирования"""
+    """
+    Настройка системы логирования
+    
+    Все sink'и пишут через очередь (enqueue=True): форматирование и файловый
+    ввод-вывод выполняются в фоновом потоке loguru, а не в обработчиках.
+    """
     
     # Удаляем стандартный handler
     logger.remove()
     
+    log_format = settings.log_format or ("json" if settings.is_production else "text")
+    serialize = log_format == "json"
+    
     # Консольный вывод
     logger.add(
         sys.stdout,
@@ -21,7 +50,10 @@ def setup_logging():
                "<level>{level: <8}</level> | "
                "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
                "<level>{message}</level>",
-        colorize=True if not settings.is_production else False,
+        colorize=not settings.is_production and not serialize,
+        serialize=serialize,
+        filter=_sampling_filter,
+        enqueue=True,
     )
     
     # Файловое логирование для production
@@ -33,6 +65,9 @@ def setup_logging():
             rotation="1 day",
             retention="30 days",
             compression="zip",
+            serialize=serialize,
+            filter=_sampling_filter,
+            enqueue=True,
         )
         
         # Отдельный файл для ошибок
@@ -43,6 +78,8 @@ def setup_logging():
             rotation="1 day",
             retention="90 days",
             compression="zip",
+            serialize=serialize,
+            enqueue=True,
         )
     
     # Настройка логирования для внешних библиотек
@@ -58,3 +95,8 @@ def setup_logging():
     logging.getLogger("asyncpg").setLevel(logging.WARNING)
     
     return logger
+
+
+async def shutdown_logging():
+    """Дождаться записи сообщений из очереди"""
+    await logger.complete()
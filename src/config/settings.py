@@ -2,10 +2,12 @@
 Настройки приложения с валидацией через Pydantic
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
 
+from src.utils.rate_limiter import RateLimit
+
 
 class Settings(BaseSettings):
     """Настройки приложения"""
@@ -18,20 +20,88 @@ class Settings(BaseSettings):
     database_url: str = Field(..., env="DATABASE_URL")
     db_pool_size: int = Field(default=10, env="DB_POOL_SIZE")
     db_max_overflow: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    database_replica_url: Optional[str] = Field(default=None, env="DATABASE_REPLICA_URL")  # реплика для отчетов
+    db_replica_max_lag: float = Field(default=5.0, env="DB_REPLICA_MAX_LAG")  # секунды
+    db_replica_check_interval: float = Field(default=10.0, env="DB_REPLICA_CHECK_INTERVAL")  # секунды
     
     # bePaid Payment System
     bepaid_shop_id: str = Field(..., env="BEPAID_SHOP_ID")
     bepaid_secret_key: str = Field(..., env="BEPAID_SECRET_KEY")
     bepaid_api_url: str = Field(default="https://api.bepaid.by", env="BEPAID_API_URL")
     bepaid_webhook_secret: str = Field(..., env="BEPAID_WEBHOOK_SECRET")
+    bepaid_timeout: float = Field(default=15.0, env="BEPAID_TIMEOUT")  # секунды
+    bepaid_connect_timeout: float = Field(default=5.0, env="BEPAID_CONNECT_TIMEOUT")  # секунды
+    bepaid_pool_limit: int = Field(default=20, env="BEPAID_POOL_LIMIT")
+    bepaid_keepalive_timeout: float = Field(default=30.0, env="BEPAID_KEEPALIVE_TIMEOUT")  # секунды
     
     # Application
     environment: str = Field(default="development", env="ENVIRONMENT")
     debug: bool = Field(default=False, env="DEBUG")
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
+    log_format: Optional[str] = Field(default=None, env="LOG_FORMAT")  # text, json (по умолчанию json в production)
+    log_sample_rates: Dict[str, float] = Field(default_factory=dict, env="LOG_SAMPLE_RATES")  # категория -> доля записей
     webhook_host: Optional[str] = Field(default=None, env="WEBHOOK_HOST")
     webhook_port: int = Field(default=8080, env="WEBHOOK_PORT")
     
+    # Telegram updates
+    bot_update_mode: str = Field(default="polling", env="BOT_UPDATE_MODE")  # polling, webhook
+    telegram_webhook_path: str = Field(default="/webhook/telegram", env="TELEGRAM_WEBHOOK_PATH")
+    telegram_webhook_secret: Optional[str] = Field(default=None, env="TELEGRAM_WEBHOOK_SECRET")
+    
+    # FSM storage
+    fsm_storage: str = Field(default="memory", env="FSM_STORAGE")  # memory, redis
+    redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
+    fsm_state_ttl: int = Field(default=86400, env="FSM_STATE_TTL")  # секунды
+    fsm_data_ttl: int = Field(default=86400, env="FSM_DATA_TTL")  # секунды
+    
+    # Throttling
+    throttle_backend: str = Field(default="memory", env="THROTTLE_BACKEND")  # memory, redis
+    throttle_limits: Dict[str, str] = Field(
+        default_factory=lambda: {"default": "10/60", "test": "30/60", "payment": "5/60"},
+        env="THROTTLE_LIMITS",
+    )  # действие -> "запросов/секунд"
+    throttle_max_keys: int = Field(default=100000, env="THROTTLE_MAX_KEYS")
+    
+    # Caches
+    user_cache_size: int = Field(default=10000, env="USER_CACHE_SIZE")
+    user_cache_ttl: int = Field(default=300, env="USER_CACHE_TTL")  # секунды
+    entitlements_cache_size: int = Field(default=10000, env="ENTITLEMENTS_CACHE_SIZE")
+    entitlements_cache_ttl: int = Field(default=300, env="ENTITLEMENTS_CACHE_TTL")  # секунды
+    stats_cache_ttl: int = Field(default=30, env="STATS_CACHE_TTL")  # секунды
+    test_stats_use_summary: bool = Field(default=True, env="TEST_STATS_USE_SUMMARY")  # сводная таблица test_score_stats
+    activity_flush_interval: int = Field(default=30, env="ACTIVITY_FLUSH_INTERVAL")  # секунды
+    product_catalog_refresh_interval: int = Field(default=60, env="PRODUCT_CATALOG_REFRESH_INTERVAL")  # секунды
+    webhook_dedupe_size: int = Field(default=10000, env="WEBHOOK_DEDUPE_SIZE")
+    webhook_dedupe_ttl: int = Field(default=600, env="WEBHOOK_DEDUPE_TTL")  # секунды
+    
+    # Analytics
+    analytics_flush_interval: int = Field(default=10, env="ANALYTICS_FLUSH_INTERVAL")  # секунды
+    analytics_batch_size: int = Field(default=500, env="ANALYTICS_BATCH_SIZE")
+    analytics_max_buffer: int = Field(default=50000, env="ANALYTICS_MAX_BUFFER")
+    analytics_spill_path: Optional[str] = Field(default=None, env="ANALYTICS_SPILL_PATH")  # JSON Lines при сбоях БД
+    
+    # Post-payment delivery queue
+    delivery_workers: int = Field(default=2, env="DELIVERY_WORKERS")
+    delivery_poll_interval: int = Field(default=10, env="DELIVERY_POLL_INTERVAL")  # секунды
+    delivery_max_attempts: int = Field(default=5, env="DELIVERY_MAX_ATTEMPTS")
+    delivery_retry_base_delay: int = Field(default=60, env="DELIVERY_RETRY_BASE_DELAY")  # секунды
+    
+    # Expired orders sweeper
+    order_sweep_interval: int = Field(default=60, env="ORDER_SWEEP_INTERVAL")  # секунды
+    order_sweep_batch_size: int = Field(default=1000, env="ORDER_SWEEP_BATCH_SIZE")
+    
+    # Broadcasts
+    broadcast_rate_limit: float = Field(default=25.0, env="BROADCAST_RATE_LIMIT")  # сообщений в секунду (рассылки и офферы)
+    broadcast_page_size: int = Field(default=100, env="BROADCAST_PAGE_SIZE")
+    
+    # Offer timers
+    tripwire_offer_delay_hours: int = Field(default=24, env="TRIPWIRE_OFFER_DELAY_HOURS")
+    timer_resync_interval: int = Field(default=300, env="TIMER_RESYNC_INTERVAL")  # секунды
+    timer_batch_size: int = Field(default=500, env="TIMER_BATCH_SIZE")
+    
+    # Test
+    test_questions_file: Optional[str] = Field(default=None, env="TEST_QUESTIONS_FILE")  # JSON со списком вопросов
+    
     # External Services
     reviews_chat_url: str = Field(..., env="REVIEWS_CHAT_URL")
     support_chat_url: str = Field(..., env="SUPPORT_CHAT_URL")
@@ -42,6 +112,7 @@ class Settings(BaseSettings):
     
     # Monitoring
     sentry_dsn: Optional[str] = Field(default=None, env="SENTRY_DSN")
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")  # /metrics на webhook сервере
     
     @validator("admin_telegram_ids", pre=True)
     def parse_admin_ids(cls, v):
@@ -65,6 +136,52 @@ class Settings(BaseSettings):
             raise ValueError(f"Log level must be one of {valid_levels}")
         return v.upper()
     
+    @validator("log_format")
+    def validate_log_format(cls, v):
+        """Валидация формата логов (пустая строка - формат по окружению)"""
+        if v is None or not v.strip():
+            return None
+        valid_formats = ["text", "json"]
+        if v.lower() not in valid_formats:
+            raise ValueError(f"Log format must be one of {valid_formats}")
+        return v.lower()
+    
+    @validator("bot_update_mode")
+    def validate_bot_update_mode(cls, v):
+        """Валидация режима получения обновлений"""
+        valid_modes = ["polling", "webhook"]
+        if v.lower() not in valid_modes:
+            raise ValueError(f"Bot update mode must be one of {valid_modes}")
+        return v.lower()
+    
+    @validator("fsm_storage")
+    def validate_fsm_storage(cls, v):
+        """Валидация backend хранилища FSM"""
+        valid_storages = ["memory", "redis"]
+        if v.lower() not in valid_storages:
+            raise ValueError(f"FSM storage must be one of {valid_storages}")
+        return v.lower()
+    
+    @validator("throttle_backend")
+    def validate_throttle_backend(cls, v):
+        """Валидация backend ограничителя запросов"""
+        valid_backends = ["memory", "redis"]
+        if v.lower() not in valid_backends:
+            raise ValueError(f"Throttle backend must be one of {valid_backends}")
+        return v.lower()
+    
+    @validator("throttle_limits")
+    def validate_throttle_limits(cls, v):
+        """Валидация лимитов запросов по действиям"""
+        if "default" not in v:
+            raise ValueError("Throttle limits must include 'default'")
+        for action, value in v.items():
+            try:
+                RateLimit.parse(value)
+            except ValueError:
+                raise ValueError(f"Invalid throttle limit for '{action}': {value!r}, expected 'requests/seconds'")
+        return v
+    
     @property
     def is_production(self) -> bool:
         """Проверка production окружения"""
@@ -75,6 +192,11 @@ class Settings(BaseSettings):
         """Проверка development окружения"""
         return self.environment.lower() == "development"
     
+    @property
+    def is_webhook_mode(self) -> bool:
+        """Получение обновлений Telegram через webhook"""
+        return self.bot_update_mode == "webhook"
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
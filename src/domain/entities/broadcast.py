@@ -0,0 +1,51 @@
+"""
+Broadcast entity - рассылка сообщений
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any, Optional
+from dataclasses import dataclass
+
+
+class BroadcastStatus(Enum):
+    """Статус рассылки"""
+    DRAFT = "draft"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class Broadcast:
+    """Рассылка"""
+    
+    id: int
+    created_by_admin_id: int
+    message_text: str
+    media_file_id: Optional[str] = None
+    media_type: Optional[str] = None  # photo, video, document
+    target_filter: Optional[Dict[str, Any]] = None
+    status: BroadcastStatus = BroadcastStatus.DRAFT
+    total_users: int = 0
+    sent_count: int = 0
+    failed_count: int = 0
+    last_user_id: Optional[int] = None  # Курсор keyset-пагинации получателей
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    created_at: datetime = None
+    
+    def __post_init__(self):
+        """Инициализация после создания объекта"""
+        if self.created_at is None:
+            self.created_at = datetime.utcnow()
+    
+    @property
+    def processed_count(self) -> int:
+        """Количество обработанных получателей"""
+        return self.sent_count + self.failed_count
+    
+    @property
+    def is_finished(self) -> bool:
+        """Рассылка завершена или отменена"""
+        return self.status in (BroadcastStatus.COMPLETED, BroadcastStatus.CANCELLED)
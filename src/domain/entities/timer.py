@@ -0,0 +1,29 @@
+"""
+Timer entity - таймер оффера
+"""
+
+from datetime import datetime
+from dataclasses import dataclass
+
+
+@dataclass
+class Timer:
+    """Таймер оффера"""
+    
+    id: int
+    user_id: int
+    timer_type: str  # slug предлагаемого продукта, например tripwire_99byn
+    expires_at: datetime
+    started_at: datetime = None
+    is_triggered: bool = False
+    is_cancelled: bool = False
+    
+    def __post_init__(self):
+        """Инициализация после создания объекта"""
+        if self.started_at is None:
+            self.started_at = datetime.utcnow()
+    
+    @property
+    def is_pending(self) -> bool:
+        """Таймер еще должен сработать"""
+        return not self.is_triggered and not self.is_cancelled
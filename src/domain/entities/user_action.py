@@ -0,0 +1,22 @@
+"""
+User action entity - событие аналитики
+"""
+
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class UserAction:
+    """Действие пользователя"""
+    
+    user_id: int
+    action_type: str  # start, view_kits, click_payment, order_paid и т.д.
+    action_data: Optional[Dict[str, Any]] = None
+    created_at: datetime = None
+    
+    def __post_init__(self):
+        """Инициализация после создания объекта"""
+        if self.created_at is None:
+            self.created_at = datetime.utcnow()
@@ -0,0 +1,62 @@
+"""
+Broadcast repository interface
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Iterable, Optional, List, Tuple
+from src.domain.entities.broadcast import Broadcast, BroadcastStatus
+
+
+class BroadcastRepository(ABC):
+    """Интерфейс репозитория рассылок"""
+    
+    @abstractmethod
+    async def create(self, broadcast: Broadcast) -> Broadcast:
+        """Создать рассылку"""
+        pass
+    
+    @abstractmethod
+    async def get_by_id(self, broadcast_id: int) -> Optional[Broadcast]:
+        """Получить рассылку по ID"""
+        pass
+    
+    @abstractmethod
+    async def get_by_status(self, status: BroadcastStatus) -> List[Broadcast]:
+        """Получить рассылки по статусу"""
+        pass
+    
+    @abstractmethod
+    async def update_status(
+        self,
+        broadcast_id: int,
+        status: BroadcastStatus,
+        from_statuses: Optional[Iterable[BroadcastStatus]] = None,
+    ) -> bool:
+        """Обновить статус рассылки (только из from_statuses, если заданы)"""
+        pass
+    
+    @abstractmethod
+    async def count_recipients(self, target_filter: Optional[Dict[str, Any]]) -> int:
+        """Посчитать получателей по фильтру аудитории"""
+        pass
+    
+    @abstractmethod
+    async def get_recipients_page(
+        self,
+        target_filter: Optional[Dict[str, Any]],
+        after_user_id: Optional[int],
+        limit: int,
+    ) -> List[Tuple[int, int]]:
+        """Получить следующую страницу получателей: (user_id, telegram_id)"""
+        pass
+    
+    @abstractmethod
+    async def save_progress(
+        self,
+        broadcast_id: int,
+        last_user_id: int,
+        sent: int,
+        failed: int,
+    ) -> bool:
+        """Сохранить курсор и прибавить счетчики отправленных/неудачных"""
+        pass
@@ -3,7 +3,7 @@ Payment repository interface
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, FrozenSet
 from datetime import datetime
 from src.domain.entities.payment import Order, Product, UserProduct, PaymentStatus
 
@@ -17,6 +17,11 @@ class PaymentRepository(ABC):
         """Получить продукт по slug"""
         pass
     
+    @abstractmethod
+    async def get_product_by_id(self, product_id: int) -> Optional[Product]:
+        """Получить продукт по ID"""
+        pass
+    
     @abstractmethod
     async def get_all_products(self) -> List[Product]:
         """Получить все продукты"""
@@ -48,14 +53,24 @@ class PaymentRepository(ABC):
         """Обновить заказ"""
         pass
     
+    @abstractmethod
+    async def mark_order_paid(self, order: Order) -> bool:
+        """Перевести заказ в PAID, если он еще не оплачен; True - если перевел этот вызов"""
+        pass
+    
     @abstractmethod
     async def get_user_orders(self, user_id: int) -> List[Order]:
         """Получить заказы пользователя"""
         pass
     
     @abstractmethod
-    async def get_orders_by_status(self, status: PaymentStatus) -> List[Order]:
-        """Получить заказы по статусу"""
+    async def get_orders_by_status(self, status: PaymentStatus, limit: Optional[int] = None) -> List[Order]:
+        """Получить заказы по статусу (новые первыми)"""
+        pass
+    
+    @abstractmethod
+    async def expire_pending_orders(self, now: datetime, limit: int) -> int:
+        """Перевести просроченные заказы из PENDING в EXPIRED, вернуть их количество"""
         pass
     
     # User Products
@@ -69,6 +84,11 @@ class PaymentRepository(ABC):
         """Получить покупки пользователя"""
         pass
     
+    @abstractmethod
+    async def get_user_entitlements(self, user_id: int) -> FrozenSet[str]:
+        """Получить slug'и всех купленных пользователем продуктов"""
+        pass
+    
     @abstractmethod
     async def has_user_product(self, user_id: int, product_slug: str) -> bool:
         """Проверить, есть ли у пользователя продукт"""
@@ -83,3 +103,18 @@ class PaymentRepository(ABC):
     async def mark_as_delivered(self, user_product_id: int) -> bool:
         """Отметить как доставленный"""
         pass
+    
+    @abstractmethod
+    async def claim_pending_deliveries(
+        self,
+        limit: int,
+        max_attempts: int,
+        retry_base_delay: int,
+    ) -> List[UserProduct]:
+        """Захватить недоставленные покупки, готовые к очередной попытке доставки"""
+        pass
+    
+    @abstractmethod
+    async def abandon_delivery(self, user_product_id: int, max_attempts: int) -> bool:
+        """Прекратить попытки доставки покупки"""
+        pass
@@ -0,0 +1,32 @@
+"""
+Statistics repository interface
+"""
+
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import List
+from src.domain.entities.user_action import UserAction
+
+
+class StatisticsRepository(ABC):
+    """Интерфейс репозитория агрегированной статистики"""
+    
+    @abstractmethod
+    async def get_overview(self) -> dict:
+        """Получить сводку по пользователям и заказам"""
+        pass
+    
+    @abstractmethod
+    async def apply_funnel_events(self, actions: List[UserAction]) -> None:
+        """Прибавить события аналитики к сводке воронки"""
+        pass
+    
+    @abstractmethod
+    async def get_funnel(self, since: date) -> dict:
+        """Получить воронку по сводке начиная с дня since"""
+        pass
+    
+    @abstractmethod
+    async def rebuild_funnel(self) -> None:
+        """Пересчитать сводку воронки по user_actions"""
+        pass
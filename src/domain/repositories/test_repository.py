@@ -36,6 +36,16 @@ class TestRepository(ABC):
         pass
     
     @abstractmethod
-    async def get_test_statistics(self) -> dict:
-        """Получить статистику тестов"""
+    async def get_test_statistics(self, use_summary: bool = False) -> dict:
+        """Получить статистику тестов (из сводной таблицы или одним проходом по результатам)"""
+        pass
+    
+    @abstractmethod
+    async def ensure_test_statistics(self) -> bool:
+        """Пересчитать сводку, если она пуста, а результаты тестов есть"""
+        pass
+    
+    @abstractmethod
+    async def rebuild_test_statistics(self) -> None:
+        """Пересчитать сводную таблицу статистики тестов"""
         pass
@@ -0,0 +1,37 @@
+"""
+Timer repository interface
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, List, Tuple
+from src.domain.entities.timer import Timer
+
+
+class TimerRepository(ABC):
+    """Интерфейс репозитория таймеров"""
+    
+    @abstractmethod
+    async def create(self, timer: Timer) -> Optional[Timer]:
+        """Создать таймер (None, если такой таймер у пользователя уже был)"""
+        pass
+    
+    @abstractmethod
+    async def get_pending_deadlines(self, until: datetime) -> List[Tuple[int, datetime]]:
+        """Получить (id, expires_at) ожидающих таймеров со сроком до until"""
+        pass
+    
+    @abstractmethod
+    async def claim_due(self, now: datetime, limit: int) -> List[Tuple[Timer, int]]:
+        """Захватить истекшие таймеры и отметить их сработавшими: (таймер, telegram_id)"""
+        pass
+    
+    @abstractmethod
+    async def reschedule(self, timer_id: int, expires_at: datetime) -> bool:
+        """Вернуть сработавший таймер в ожидание с новым сроком"""
+        pass
+    
+    @abstractmethod
+    async def cancel_user_timers(self, user_id: int, timer_type: str) -> int:
+        """Отменить ожидающие таймеры пользователя"""
+        pass
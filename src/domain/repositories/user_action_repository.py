@@ -0,0 +1,16 @@
+"""
+User action repository interface
+"""
+
+from abc import ABC, abstractmethod
+from typing import List
+from src.domain.entities.user_action import UserAction
+
+
+class UserActionRepository(ABC):
+    """Интерфейс репозитория действий пользователей"""
+    
+    @abstractmethod
+    async def bulk_create(self, actions: List[UserAction]) -> int:
+        """Записать пачку действий"""
+        pass
@@ -3,7 +3,8 @@ User repository interface
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Dict
 from src.domain.entities.user import User
 
 
@@ -30,6 +31,21 @@ class UserRepository(ABC):
         """Обновить пользователя"""
         pass
     
+    @abstractmethod
+    async def upsert(self, user: User) -> User:
+        """Создать пользователя или обновить профиль по Telegram ID"""
+        pass
+    
+    @abstractmethod
+    async def bulk_upsert(self, users: List[User]) -> int:
+        """Создать или обновить пользователей пачкой (для импорта)"""
+        pass
+    
+    @abstractmethod
+    async def bulk_update_activity(self, activity: Dict[int, datetime]) -> int:
+        """Обновить время последней активности пачкой (user_id -> время)"""
+        pass
+    
     @abstractmethod
     async def get_admins(self) -> List[User]:
         """Получить список администраторов"""
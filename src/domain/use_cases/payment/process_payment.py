@@ -17,17 +17,26 @@ class ProcessPaymentUseCase:
     
     def __init__(self, payment_repository: PaymentRepository):
         self.payment_repository = payment_repository
+        # Заказ оплачен последним вызовом execute (а не раньше или параллельно)
+        self.paid_now = False
     
-    async def execute(self, transaction_id: str) -> Optional[Order]:
+    async def execute(
+        self,
+        transaction_id: str,
+        payment_status: Optional[dict] = None,
+    ) -> Optional[Order]:
         """
         Обработать платеж по transaction_id
         
         Args:
             transaction_id: ID транзакции от bePaid
+            payment_status: Состояние транзакции из проверенного webhook.
+                Если не передано, статус запрашивается у bePaid.
         
         Returns:
             Обновленный заказ или None если не найден
         """
+        self.paid_now = False
         try:
             # Получаем заказ по transaction_id
             order = await self.payment_repository.get_order_by_bepaid_id(transaction_id)
@@ -35,24 +44,32 @@ class ProcessPaymentUseCase:
                 logger.warning(f"Order not found for transaction_id: {transaction_id}")
                 return None
             
-            # Проверяем статус в bePaid
-            try:
-                payment_status = await bepaid_client.get_payment_status(transaction_id)
-                logger.info(f"Payment status from bePaid: {payment_status}")
-                
-                # Обновляем статус заказа в зависимости от ответа bePaid
-                if self._is_payment_successful(payment_status):
-                    await self._mark_payment_as_successful(order, payment_status)
-                elif self._is_payment_failed(payment_status):
-                    await self._mark_payment_as_failed(order)
-                
+            # Повторные уведомления по оплаченному заказу игнорируем
+            if order.status in (PaymentStatus.PAID, PaymentStatus.REFUNDED):
+                logger.info(
+                    f"Order already processed: order_id={order.id}, status={order.status.value}"
+                )
                 return order
-                
-            except Exception as e:
-                logger.error(f"Failed to get payment status from bePaid: {e}")
-                # Помечаем заказ как неудачный
+            
+            if payment_status is None:
+                # Проверяем статус в bePaid
+                try:
+                    payment_status = await bepaid_client.get_payment_status(transaction_id)
+                    logger.debug("Payment status from bePaid: {}", payment_status)
+                    
+                except Exception as e:
+                    logger.error(f"Failed to get payment status from bePaid: {e}")
+                    # Помечаем заказ как неудачный
+                    await self._mark_payment_as_failed(order)
+                    return order
+            
+            # Обновляем статус заказа в зависимости от состояния транзакции
+            if self._is_payment_successful(payment_status):
+                await self._mark_payment_as_successful(order, payment_status)
+            elif self._is_payment_failed(payment_status):
                 await self._mark_payment_as_failed(order)
-                return order
+            
+            return order
             
         except Exception as e:
             logger.error(f"Error processing payment {transaction_id}: {e}")
@@ -70,7 +87,12 @@ class ProcessPaymentUseCase:
             if payment_method:
                 order.payment_method = payment_method
             
-            await self.payment_repository.update_order(order)
+            # Параллельное уведомление могло оплатить заказ раньше:
+            # покупку тогда уже создало оно
+            if not await self.payment_repository.mark_order_paid(order):
+                logger.info(f"Order already paid by a concurrent notification: order_id={order.id}")
+                return
+            self.paid_now = True
             
             # Создаем запись о покупке пользователя
             user_product = UserProduct(
@@ -37,32 +37,31 @@ class ProcessTestAnswerUseCase:
             answers = test_data["answers"]
             
             # Получаем текущий вопрос
-            question = TestQuestionsService.get_question_by_id(current_question_id)
+            bank = TestQuestionsService.get_bank()
+            question = bank.get(current_question_id)
             
             # Проверяем правильность ответа
-            is_correct = TestQuestionsService.validate_answer(current_question_id, answer_index)
+            is_correct = answer_index == question.correct_answer
             
-            # Сохраняем ответ
-            answers[current_question_id] = {
+            # Сохраняем ответ (ключи и значения JSON-совместимы для хранилища FSM)
+            answers[str(current_question_id)] = {
                 "answer_index": answer_index,
                 "is_correct": is_correct,
-                "answered_at": datetime.utcnow()
+                "answered_at": datetime.utcnow().isoformat()
             }
             
             # Определяем следующий вопрос
-            questions = TestQuestionsService.get_test_questions()
-            current_index = next(i for i, q in enumerate(questions) if q.id == current_question_id)
+            next_question = bank.next_after(current_question_id)
             
-            if current_index < len(questions) - 1:
+            if next_question:
                 # Есть еще вопросы
-                next_question = questions[current_index + 1]
                 test_data["current_question_id"] = next_question.id
                 
                 return {
                     "is_test_completed": False,
                     "next_question": next_question,
-                    "question_number": current_index + 2,
-                    "total_questions": len(questions),
+                    "question_number": bank.position(next_question.id) + 1,
+                    "total_questions": len(bank),
                     "test_data": test_data,
                     "current_answer_correct": is_correct,
                     "explanation": question.explanation
@@ -83,7 +82,7 @@ class ProcessTestAnswerUseCase:
             attempts = test_data["attempts"]
             
             # Подсчитываем результаты
-            total_questions = len(TestQuestionsService.get_test_questions())
+            total_questions = len(TestQuestionsService.get_bank())
             correct_answers = sum(1 for answer in answers.values() if answer["is_correct"])
             score = correct_answers
             passed = score == total_questions
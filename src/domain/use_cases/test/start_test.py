@@ -40,24 +40,25 @@ class StartTestUseCase:
                 attempts = 1
             
             # Получаем первый вопрос
-            questions = TestQuestionsService.get_test_questions()
-            first_question = questions[0]
+            bank = TestQuestionsService.get_bank()
+            first_question = bank.first()
             
             # Подготавливаем данные для ответа
+            # Данные хранятся в FSM, поэтому только JSON-совместимые значения
             test_data = {
                 "user_id": user.id,
                 "current_question_id": first_question.id,
                 "attempts": attempts,
                 "answers": {},  # Будет заполняться по мере прохождения
-                "started_at": datetime.utcnow(),
+                "started_at": datetime.utcnow().isoformat(),
             }
             
-            logger.info(f"Test started for user {user.id}, attempt {attempts}")
+            logger.debug("Test started for user {}, attempt {}", user.id, attempts)
             
             return {
                 "question": first_question,
                 "question_number": 1,
-                "total_questions": len(questions),
+                "total_questions": len(bank),
                 "attempts": attempts,
                 "test_data": test_data
             }
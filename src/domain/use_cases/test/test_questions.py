@@ -2,112 +2,195 @@
 Test questions data
 """
 
-from typing import List, Dict, Any
 from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Tuple
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TestQuestion:
     """Вопрос теста"""
     id: int
     question: str
-    options: List[str]
-    correct_answer: int  # Индекс правильного ответа (0-3)
+    options: Tuple[str, ...]
+    correct_answer: int  # Индекс правильного ответа
     explanation: str
+    
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "TestQuestion":
+        """Создать вопрос из словаря (файл или строка БД)"""
+        question = cls(
+            id=int(data["id"]),
+            question=data["question"],
+            options=tuple(data["options"]),
+            correct_answer=int(data["correct_answer"]),
+            explanation=data.get("explanation") or "",
+        )
+        
+        if not 0 <= question.correct_answer < len(question.options):
+            raise ValueError(f"Question {question.id}: correct_answer out of range")
+        return question
+
+
+class QuestionBank:
+    """
+    Неизменяемый набор вопросов теста
+    
+    Строится один раз; поиск вопроса и следующего за ним - O(1)
+    через индекс id -> позиция.
+    """
+    
+    __slots__ = ("_questions", "_positions")
+    
+    def __init__(self, questions: Iterable[TestQuestion]):
+        self._questions: Tuple[TestQuestion, ...] = tuple(questions)
+        if not self._questions:
+            raise ValueError("Question bank is empty")
+        
+        positions = {question.id: i for i, question in enumerate(self._questions)}
+        if len(positions) != len(self._questions):
+            raise ValueError("Question ids must be unique")
+        self._positions: Mapping[int, int] = MappingProxyType(positions)
+    
+    @classmethod
+    def from_dicts(cls, items: Iterable[Mapping[str, Any]]) -> "QuestionBank":
+        """Построить набор из словарей в порядке следования"""
+        return cls(TestQuestion.from_dict(item) for item in items)
+    
+    @property
+    def questions(self) -> Tuple[TestQuestion, ...]:
+        """Вопросы в порядке прохождения"""
+        return self._questions
+    
+    def __len__(self) -> int:
+        return len(self._questions)
+    
+    def first(self) -> TestQuestion:
+        """Первый вопрос"""
+        return self._questions[0]
+    
+    def get(self, question_id: int) -> TestQuestion:
+        """Получить вопрос по ID"""
+        return self._questions[self.position(question_id)]
+    
+    def position(self, question_id: int) -> int:
+        """Позиция вопроса (с нуля)"""
+        try:
+            return self._positions[question_id]
+        except KeyError:
+            raise ValueError(f"Question with id {question_id} not found") from None
+    
+    def next_after(self, question_id: int) -> Optional[TestQuestion]:
+        """Следующий вопрос или None, если вопрос последний"""
+        position = self.position(question_id) + 1
+        if position < len(self._questions):
+            return self._questions[position]
+        return None
+
+
+# Встроенный набор вопросов (используется, если не задан файл и нет вопросов в БД)
+DEFAULT_QUESTIONS: Tuple[TestQuestion, ...] = (
+    TestQuestion(
+        id=1,
+        question="Какой препарат НЕ следует давать детям до 12 лет при высокой температуре?",
+        options=(
+            "Парацетамол",
+            "Аспирин", 
+            "Ибупрофен",
+            "Нурофен"
+        ),
+        correct_answer=1,  # Аспирин
+        explanation="Аспирин нельзя давать детям до 12 лет из-за риска развития синдрома Рея."
+    ),
+    TestQuestion(
+        id=2,
+        question="При какой температуре рекомендуется сбивать жар у взрослого?",
+        options=(
+            "Выше 37.5°C",
+            "Выше 38.0°C",
+            "Выше 38.5°C", 
+            "Выше 39.0°C"
+        ),
+        correct_answer=2,  # Выше 38.5°C
+        explanation="У взрослых температуру сбивают при 38.5°C и выше, если нет других показаний."
+    ),
+    TestQuestion(
+        id=3,
+        question="Как правильно хранить жидкие лекарства в холодильнике?",
+        options=(
+            "В дверце холодильника",
+            "На нижней полке",
+            "В морозилке",
+            "На верхней полке"
+        ),
+        correct_answer=1,  # На нижней полке
+        explanation="Жидкие лекарства лучше хранить на нижней полке холодильника для стабильной температуры."
+    ),
+    TestQuestion(
+        id=4,
+        question="Какой срок годности у открытого флакона с глазными каплями?",
+        options=(
+            "1 месяц",
+            "3 месяца", 
+            "6 месяцев",
+            "До окончания срока годности"
+        ),
+        correct_answer=0,  # 1 месяц
+        explanation="Открытый флакон с глазными каплями можно использовать не более 1 месяца."
+    ),
+    TestQuestion(
+        id=5,
+        question="При каких симптомах НЕ следует принимать обезболивающие?",
+        options=(
+            "Головная боль",
+            "Острая боль в животе",
+            "Боль в спине",
+            "Зубная боль"
+        ),
+        correct_answer=1,  # Острая боль в животе
+        explanation="При острой боли в животе нельзя принимать обезболивающие до осмотра врача."
+    ),
+    TestQuestion(
+        id=6,
+        question="Как правильно принимать таблетки?",
+        options=(
+            "С любым количеством воды",
+            "С полным стаканом воды",
+            "Запивая кофе",
+            "Натощак всегда"
+        ),
+        correct_answer=1,  # С полным стаканом воды
+        explanation="Таблетки следует запивать полным стаканом воды для лучшего усвоения."
+    ),
+)
 
 
 class TestQuestionsService:
     """Сервис для работы с вопросами теста"""
     
-    @staticmethod
-    def get_test_questions() -> List[TestQuestion]:
+    _bank: QuestionBank = QuestionBank(DEFAULT_QUESTIONS)
+    
+    @classmethod
+    def get_bank(cls) -> QuestionBank:
+        """Текущий набор вопросов"""
+        return cls._bank
+    
+    @classmethod
+    def set_bank(cls, bank: QuestionBank):
+        """Заменить набор вопросов (при загрузке из файла или БД)"""
+        cls._bank = bank
+    
+    @classmethod
+    def get_test_questions(cls) -> Tuple[TestQuestion, ...]:
         """Получить список вопросов теста"""
-        return [
-            TestQuestion(
-                id=1,
-                question="Какой препарат НЕ следует давать детям до 12 лет при высокой температуре?",
-                options=[
-                    "Парацетамол",
-                    "Аспирин", 
-                    "Ибупрофен",
-                    "Нурофен"
-                ],
-                correct_answer=1,  # Аспирин
-                explanation="Аспирин нельзя давать детям до 12 лет из-за риска развития синдрома Рея."
-            ),
-            TestQuestion(
-                id=2,
-                question="При какой температуре рекомендуется сбивать жар у взрослого?",
-                options=[
-                    "Выше 37.5°C",
-                    "Выше 38.0°C",
-                    "Выше 38.5°C", 
-                    "Выше 39.0°C"
-                ],
-                correct_answer=2,  # Выше 38.5°C
-                explanation="У взрослых температуру сбивают при 38.5°C и выше, если нет других показаний."
-            ),
-            TestQuestion(
-                id=3,
-                question="Как правильно хранить жидкие лекарства в холодильнике?",
-                options=[
-                    "В дверце холодильника",
-                    "На нижней полке",
-                    "В морозилке",
-                    "На верхней полке"
-                ],
-                correct_answer=1,  # На нижней полке
-                explanation="Жидкие лекарства лучше хранить на нижней полке холодильника для стабильной температуры."
-            ),
-            TestQuestion(
-                id=4,
-                question="Какой срок годности у открытого флакона с глазными каплями?",
-                options=[
-                    "1 месяц",
-                    "3 месяца", 
-                    "6 месяцев",
-                    "До окончания срока годности"
-                ],
-                correct_answer=0,  # 1 месяц
-                explanation="Открытый флакон с глазными каплями можно использовать не более 1 месяца."
-            ),
-            TestQuestion(
-                id=5,
-                question="При каких симптомах НЕ следует принимать обезболивающие?",
-                options=[
-                    "Головная боль",
-                    "Острая боль в животе",
-                    "Боль в спине",
-                    "Зубная боль"
-                ],
-                correct_answer=1,  # Острая боль в животе
-                explanation="При острой боли в животе нельзя принимать обезболивающие до осмотра врача."
-            ),
-            TestQuestion(
-                id=6,
-                question="Как правильно принимать таблетки?",
-                options=[
-                    "С любым количеством воды",
-                    "С полным стаканом воды",
-                    "Запивая кофе",
-                    "Натощак всегда"
-                ],
-                correct_answer=1,  # С полным стаканом воды
-                explanation="Таблетки следует запивать полным стаканом воды для лучшего усвоения."
-            )
-        ]
-    
-    @staticmethod
-    def get_question_by_id(question_id: int) -> TestQuestion:
+        return cls._bank.questions
+    
+    @classmethod
+    def get_question_by_id(cls, question_id: int) -> TestQuestion:
         """Получить вопрос по ID"""
-        questions = TestQuestionsService.get_test_questions()
-        for question in questions:
-            if question.id == question_id:
-                return question
-        raise ValueError(f"Question with id {question_id} not found")
-    
-    @staticmethod
-    def validate_answer(question_id: int, answer_index: int) -> bool:
+        return cls._bank.get(question_id)
+    
+    @classmethod
+    def validate_answer(cls, question_id: int, answer_index: int) -> bool:
         """Проверить правильность ответа"""
-        question = TestQuestionsService.get_question_by_id(question_id)
-        return answer_index == question.correct_answer
+        return answer_index == cls._bank.get(question_id).correct_answer
@@ -27,40 +27,36 @@ class CreateOrUpdateUserUseCase:
             Пользователь из БД
         """
         try:
-            # Ищем существующего пользователя
-            existing_user = await self.user_repository.get_by_telegram_id(telegram_user.id)
+            # Один запрос: вставка нового или обновление изменившегося профиля
+            now = datetime.utcnow()
+            user = await self.user_repository.upsert(User(
+                id=0,  # Будет установлен после сохранения
+                telegram_id=telegram_user.id,
+                username=telegram_user.username,
+                first_name=telegram_user.first_name,
+                last_name=telegram_user.last_name,
+                language_code=telegram_user.language_code,
+                is_blocked=False,
+                is_admin=False,
+                referrer_id=None,
+                created_at=now,
+                last_activity_at=now,
+            ))
+            
+            if user.created_at == now:
+                logger.info("User created: {}", user.telegram_id)
+            return user
             
-            if existing_user:
-                # Обновляем данные существующего пользователя
-                existing_user.username = telegram_user.username
-                existing_user.first_name = telegram_user.first_name
-                existing_user.last_name = telegram_user.last_name
-                existing_user.language_code = telegram_user.language_code
-                existing_user.update_activity()
-                
-                updated_user = await self.user_repository.update(existing_user)
-                logger.info(f"User updated: {updated_user.telegram_id}")
-                return updated_user
-            else:
-                # Создаем нового пользователя
-                new_user = User(
-                    id=0,  # Будет установлен после сохранения
-                    telegram_id=telegram_user.id,
-                    username=telegram_user.username,
-                    first_name=telegram_user.first_name,
-                    last_name=telegram_user.last_name,
-                    language_code=telegram_user.language_code,
-                    is_blocked=False,
-                    is_admin=False,
-                    referrer_id=None,
-                    created_at=datetime.utcnow(),
-                    last_activity_at=datetime.utcnow(),
-                )
-                
-                created_user = await self.user_repository.create(new_user)
-                logger.info(f"User created: {created_user.telegram_id}")
-                return created_user
-                
         except Exception as e:
             logger.error(f"Error creating or updating user {telegram_user.id}: {e}")
             raise
+    
+    @staticmethod
+    def has_profile_changes(user: User, telegram_user) -> bool:
+        """Проверить, отличается ли профиль в Telegram от сохраненного"""
+        return (
+            user.username != telegram_user.username
+            or user.first_name != telegram_user.first_name
+            or user.last_name != telegram_user.last_name
+            or user.language_code != telegram_user.language_code
+        )
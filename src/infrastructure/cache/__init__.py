@@ -0,0 +1,3 @@
+"""
+Cache infrastructure
+"""
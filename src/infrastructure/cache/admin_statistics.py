@@ -0,0 +1,85 @@
+"""
+Кешированная статистика для админки
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, List
+
+from src.config.settings import settings
+from src.domain.entities.payment import Order, PaymentStatus
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
+from src.infrastructure.database.repositories.statistics_repository import SQLAlchemyStatisticsRepository
+from src.infrastructure.database.repositories.test_repository import SQLAlchemyTestRepository
+from src.utils.cache import TTLCache
+
+
+class AdminStatistics:
+    """
+    Статистика для команд админки с коротким TTL
+    
+    Агрегаты считаются в БД, а результат кешируется на stats_cache_ttl
+    секунд: повторные /stats и /payments не нагружают БД.
+    """
+    
+    RECENT_PAYMENTS_LIMIT = 5
+    
+    def __init__(self, ttl: float):
+        """
+        Args:
+            ttl: Время жизни статистики в секундах
+        """
+        self._cache: TTLCache[str, Any] = TTLCache(maxsize=16, ttl=ttl)
+    
+    async def get_overview(self) -> dict:
+        """Сводка по пользователям и заказам"""
+        async def load(session) -> dict:
+            return await SQLAlchemyStatisticsRepository(session).get_overview()
+        
+        return await self._get("overview", load)
+    
+    async def get_recent_payments(self) -> List[Order]:
+        """Последние оплаченные заказы"""
+        async def load(session) -> List[Order]:
+            return await SQLAlchemyPaymentRepository(session).get_orders_by_status(
+                PaymentStatus.PAID, limit=self.RECENT_PAYMENTS_LIMIT
+            )
+        
+        return await self._get("recent_payments", load)
+    
+    async def get_test_statistics(self) -> dict:
+        """Статистика тестов"""
+        async def load(session) -> dict:
+            return await SQLAlchemyTestRepository(session).get_test_statistics(
+                use_summary=settings.test_stats_use_summary
+            )
+        
+        return await self._get("tests", load)
+    
+    async def get_funnel(self, days: int) -> dict:
+        """Воронка за последние days дней (только сводка funnel_daily)"""
+        async def load(session) -> dict:
+            since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+            return await SQLAlchemyStatisticsRepository(session).get_funnel(since)
+        
+        return await self._get(f"funnel:{days}", load)
+    
+    def invalidate(self):
+        """Сбросить кеш"""
+        self._cache.clear()
+    
+    async def _get(self, key: str, load: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Получить значение из кеша или посчитать его"""
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+        
+        async with get_db_session() as session:
+            value = await load(session)
+        
+        self._cache.set(key, value)
+        return value
+
+
+# Глобальный экземпляр
+admin_statistics = AdminStatistics(ttl=settings.stats_cache_ttl)
@@ -0,0 +1,18 @@
+"""
+In-process кеш купленных продуктов пользователей
+"""
+
+from typing import FrozenSet
+
+from src.config.settings import settings
+from src.utils.cache import TTLCache
+
+
+# user_id -> slug'и купленных продуктов.
+# Кеш локален для процесса: покупка сбрасывает его только в процессе,
+# обработавшем оплату, остальные реплики бота видят ее по истечении
+# ENTITLEMENTS_CACHE_TTL. При нескольких репликах TTL стоит сократить.
+entitlements_cache: TTLCache[int, FrozenSet[str]] = TTLCache(
+    maxsize=settings.entitlements_cache_size,
+    ttl=settings.entitlements_cache_ttl,
+)
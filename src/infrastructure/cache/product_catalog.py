@@ -0,0 +1,120 @@
+"""
+In-memory каталог продуктов
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from src.config.settings import settings
+from src.domain.entities.payment import Product
+from src.infrastructure.database.models.product import ProductModel
+from src.infrastructure.database.session import get_db_session
+
+
+class ProductCatalog:
+    """
+    Каталог продуктов в памяти процесса с индексами по slug и id
+    
+    Загружается при старте и перезагружается, когда меняется версия
+    таблицы products (количество строк и максимальный updated_at),
+    либо по команде администратора.
+    """
+    
+    def __init__(self, refresh_interval: float):
+        """
+        Args:
+            refresh_interval: Интервал проверки версии в секундах
+        """
+        self.refresh_interval = refresh_interval
+        self._by_slug: Dict[str, Product] = {}
+        self._by_id: Dict[int, Product] = {}
+        self._version: Optional[Tuple[int, Optional[datetime]]] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Каталог загружен из БД"""
+        return self._version is not None
+    
+    def get_by_slug(self, slug: str) -> Optional[Product]:
+        """Получить продукт по slug"""
+        return self._by_slug.get(slug)
+    
+    def get_by_id(self, product_id: int) -> Optional[Product]:
+        """Получить продукт по ID"""
+        return self._by_id.get(product_id)
+    
+    def get_all(self) -> List[Product]:
+        """Получить все продукты"""
+        return sorted(self._by_id.values(), key=lambda p: (p.sort_order, p.name))
+    
+    def get_active(self) -> List[Product]:
+        """Получить активные продукты"""
+        return [product for product in self.get_all() if product.is_active]
+    
+    async def load(self):
+        """Загрузить каталог из БД"""
+        # Репозиторий сам читает каталог, поэтому импортируем по месту
+        from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
+        
+        async with get_db_session() as session:
+            version = await self._fetch_version(session)
+            products = await SQLAlchemyPaymentRepository(session).get_all_products()
+        
+        self._by_slug = {product.slug: product for product in products}
+        self._by_id = {product.id: product for product in products}
+        self._version = version
+        
+        logger.info(f"Product catalog loaded: {len(products)} products")
+    
+    async def refresh_if_changed(self) -> bool:
+        """Перезагрузить каталог, если изменилась версия в БД"""
+        async with get_db_session() as session:
+            version = await self._fetch_version(session)
+        
+        if version == self._version:
+            return False
+        
+        await self.load()
+        return True
+    
+    def start(self):
+        """Запуск периодической проверки версии"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Остановка периодической проверки"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        """Цикл проверки версии каталога"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_if_changed()
+            except Exception as e:
+                logger.error(f"Error refreshing product catalog: {e}")
+    
+    @staticmethod
+    async def _fetch_version(session: AsyncSession) -> Tuple[int, Optional[datetime]]:
+        """Версия каталога: количество продуктов и последнее изменение"""
+        result = await session.execute(
+            select(func.count(ProductModel.id), func.max(ProductModel.updated_at))
+        )
+        count, last_updated_at = result.one()
+        return count, last_updated_at
+
+
+# Глобальный экземпляр
+product_catalog = ProductCatalog(refresh_interval=settings.product_catalog_refresh_interval)
@@ -0,0 +1,55 @@
+"""
+Загрузка набора вопросов теста
+"""
+
+import json
+from pathlib import Path
+from sqlalchemy import select
+from loguru import logger
+
+from src.config.settings import settings
+from src.domain.use_cases.test.test_questions import QuestionBank, TestQuestionsService
+from src.infrastructure.database.models.test import TestQuestionModel
+from src.infrastructure.database.session import get_db_session
+
+
+async def load_question_bank() -> QuestionBank:
+    """
+    Загрузить вопросы теста и установить их в TestQuestionsService
+    
+    Источник выбирается по приоритету: файл TEST_QUESTIONS_FILE, активные
+    строки таблицы test_questions, встроенный набор.
+    """
+    if settings.test_questions_file:
+        items = json.loads(Path(settings.test_questions_file).read_text(encoding="utf-8"))
+        bank = QuestionBank.from_dicts(items)
+        source = settings.test_questions_file
+    else:
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(TestQuestionModel)
+                .where(TestQuestionModel.is_active == True)
+                .order_by(TestQuestionModel.sort_order, TestQuestionModel.id)
+            )
+            rows = result.scalars().all()
+        
+        if rows:
+            bank = QuestionBank.from_dicts(
+                {
+                    "id": row.id,
+                    "question": row.question,
+                    "options": row.options,
+                    "correct_answer": row.correct_answer,
+                    "explanation": row.explanation,
+                }
+                for row in rows
+            )
+            source = "database"
+        else:
+            bank = TestQuestionsService.get_bank()
+            source = "built-in"
+    
+    TestQuestionsService.set_bank(bank)
+    
+    logger.info(f"Test questions loaded from {source}: {len(bank)} questions")
+    return bank
@@ -0,0 +1,55 @@
+"""
+In-process кеш пользователей
+"""
+
+from typing import Dict, Optional
+
+from src.config.settings import settings
+from src.domain.entities.user import User
+from src.utils.cache import TTLCache
+
+
+class UserCache:
+    """Кеш пользователей по Telegram ID для горячего пути AuthMiddleware"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._users: TTLCache[int, User] = TTLCache(maxsize, ttl, on_evict=self._forget)
+        # user.id -> telegram_id, для инвалидации по ID из БД. Записи живут
+        # ровно столько, сколько пользователь в _users: отдельное LRU
+        # вытесняло бы ID горячих пользователей, и /block их бы не сбрасывал
+        self._telegram_ids: Dict[int, int] = {}
+    
+    def get(self, telegram_id: int) -> Optional[User]:
+        """Получить пользователя по Telegram ID"""
+        return self._users.get(telegram_id)
+    
+    def set(self, user: User):
+        """Сохранить пользователя"""
+        self._users.set(user.telegram_id, user)
+        self._telegram_ids[user.id] = user.telegram_id
+    
+    def invalidate(self, telegram_id: int):
+        """Удалить пользователя по Telegram ID"""
+        user = self._users.pop(telegram_id)
+        if user:
+            self._telegram_ids.pop(user.id, None)
+    
+    def invalidate_by_id(self, user_id: int):
+        """Удалить пользователя по ID из БД"""
+        telegram_id = self._telegram_ids.pop(user_id, None)
+        if telegram_id is not None:
+            self._users.pop(telegram_id)
+    
+    def clear(self):
+        """Очистить кеш"""
+        self._users.clear()
+        self._telegram_ids.clear()
+    
+    def _forget(self, telegram_id: int, user: User):
+        """Удалить ID вытесненного из кеша пользователя"""
+        if self._telegram_ids.get(user.id) == telegram_id:
+            del self._telegram_ids[user.id]
+
+
+# Глобальный экземпляр
+user_cache = UserCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
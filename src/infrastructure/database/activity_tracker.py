@@ -0,0 +1,96 @@
+"""
+Write-behind трекер активности пользователей
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+from loguru import logger
+
+from src.config.settings import settings
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.user_repository import SQLAlchemyUserRepository
+
+
+class ActivityTracker:
+    """
+    Накопление отметок активности в памяти с периодической записью в БД
+    
+    Вместо UPDATE строки пользователя на каждое обновление отметки
+    собираются по user_id и записываются одним UPDATE ... FROM (VALUES ...).
+    """
+    
+    def __init__(self, flush_interval: float, batch_size: int = 1000):
+        """
+        Args:
+            flush_interval: Интервал записи в секундах
+            batch_size: Максимальное количество строк в одном UPDATE
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def touch(self, user_id: int, at: Optional[datetime] = None):
+        """Отметить активность пользователя"""
+        self._pending[user_id] = at or datetime.utcnow()
+    
+    def start(self):
+        """Запуск периодической записи"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Activity tracker started")
+    
+    async def stop(self):
+        """Остановка с финальной записью накопленных отметок"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush user activity on shutdown: {e}")
+    
+    async def flush(self) -> int:
+        """Записать накопленные отметки в БД"""
+        if not self._pending:
+            return 0
+        
+        pending, self._pending = self._pending, {}
+        # Пачки по возрастанию id: строки users блокируются в одном порядке
+        # во всех процессах, и параллельные сбросы не ждут друг друга по кругу
+        rows = sorted(pending.items())
+        
+        try:
+            async with get_db_session() as session:
+                user_repository = SQLAlchemyUserRepository(session)
+                for i in range(0, len(rows), self.batch_size):
+                    await user_repository.bulk_update_activity(dict(rows[i:i + self.batch_size]))
+        except Exception:
+            # Возвращаем отметки обратно, не затирая более свежие
+            for user_id, at in pending.items():
+                current = self._pending.get(user_id)
+                if current is None or current < at:
+                    self._pending[user_id] = at
+            raise
+        
+        logger.debug(f"User activity flushed: {len(rows)} users")
+        return len(rows)
+    
+    async def _run(self):
+        """Цикл периодической записи"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing user activity: {e}")
+
+
+# Глобальный экземпляр
+activity_tracker = ActivityTracker(flush_interval=settings.activity_flush_interval)
@@ -0,0 +1,230 @@
+"""
+Буферизованная запись событий аналитики
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from src.config.settings import settings
+from src.domain.entities.user_action import UserAction
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.statistics_repository import SQLAlchemyStatisticsRepository
+from src.infrastructure.database.repositories.user_action_repository import SQLAlchemyUserActionRepository
+from src.infrastructure.monitoring.metrics import analytics_events
+
+# Типы событий воронки
+START = "start"
+VIEW_KITS = "view_kits"
+VIEW_FAQ = "view_faq"
+TEST_STARTED = "test_started"
+TEST_COMPLETED = "test_completed"
+CLICK_PAYMENT = "click_payment"
+ORDER_CREATED = "order_created"
+ORDER_PAID = "order_paid"
+DOWNLOAD = "download"
+
+# Шаги воронки в порядке прохождения (для отчетов)
+FUNNEL_STEPS = [START, VIEW_KITS, VIEW_FAQ, TEST_STARTED, CLICK_PAYMENT, ORDER_CREATED, ORDER_PAID]
+
+
+class AnalyticsEmitter:
+    """
+    Накопление событий аналитики в памяти с записью в user_actions пачками
+    
+    track() только добавляет событие в буфер и не ждет БД. Буфер пишется
+    многострочными INSERT'ами по таймеру или при накоплении batch_size
+    событий; в той же транзакции обновляется сводка воронки (funnel_daily).
+    Если запись не удалась, пачка уходит в файл spill_path (JSON
+    Lines) и дописывается в БД после следующей успешной записи; без файла
+    пачка возвращается в буфер. Буфер ограничен max_buffer: сверх него
+    события отбрасываются, обработка обновлений от аналитики не страдает.
+    """
+    
+    def __init__(
+        self,
+        flush_interval: float,
+        batch_size: int,
+        max_buffer: int,
+        spill_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            flush_interval: Интервал записи в секундах
+            batch_size: Событий в одном INSERT (и порог досрочной записи)
+            max_buffer: Максимальное количество событий в памяти
+            spill_path: Файл для событий, которые не удалось записать в БД
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self._buffer: List[UserAction] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+    
+    def track(
+        self,
+        user_id: Optional[int],
+        action_type: str,
+        action_data: Optional[Dict[str, Any]] = None,
+    ):
+        """Записать событие (без обращения к БД)"""
+        if not user_id:
+            return
+        
+        if len(self._buffer) >= self.max_buffer:
+            analytics_events.labels("dropped").inc()
+            return
+        
+        self._buffer.append(UserAction(user_id=user_id, action_type=action_type, action_data=action_data))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+    
+    def start(self):
+        """Запуск периодической записи"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Analytics emitter started")
+    
+    async def stop(self):
+        """Остановка с финальной записью накопленных событий"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush analytics on shutdown: {e}")
+    
+    async def flush(self) -> int:
+        """Записать накопленные события в БД"""
+        async with self._lock:
+            written = 0
+            
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                
+                try:
+                    written += await self._write(batch)
+                except Exception:
+                    await self._save_failed(batch)
+                    raise
+            
+            if written:
+                logger.debug("Analytics flushed: {} events", written)
+                await self._replay_spill()
+            
+            return written
+    
+    async def _write(self, batch: List[UserAction]) -> int:
+        """Запись пачки событий вместе с приращениями сводки воронки"""
+        async with get_db_session() as session:
+            written = await SQLAlchemyUserActionRepository(session).bulk_create(batch)
+            await SQLAlchemyStatisticsRepository(session).apply_funnel_events(batch)
+        
+        analytics_events.labels("written").inc(written)
+        return written
+    
+    async def _save_failed(self, batch: List[UserAction]):
+        """Сохранить незаписанную пачку: в файл или обратно в буфер"""
+        if self.spill_path:
+            try:
+                await asyncio.to_thread(self._append_to_spill, batch)
+                analytics_events.labels("spilled").inc(len(batch))
+                return
+            except Exception as e:
+                logger.error(f"Failed to spill analytics events to {self.spill_path}: {e}")
+        
+        # Возвращаем пачку в начало буфера в пределах max_buffer
+        free = max(self.max_buffer - len(self._buffer), 0)
+        self._buffer[:0] = batch[:free]
+        if len(batch) > free:
+            analytics_events.labels("dropped").inc(len(batch) - free)
+    
+    def _append_to_spill(self, batch: List[UserAction]):
+        """Дописать события в файл (JSON Lines)"""
+        with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+            for action in batch:
+                spill_file.write(json.dumps({
+                    "user_id": action.user_id,
+                    "action_type": action.action_type,
+                    "action_data": action.action_data,
+                    "created_at": action.created_at.isoformat(),
+                }, ensure_ascii=False) + "\n")
+    
+    def _read_spill(self, path: str) -> List[UserAction]:
+        """Прочитать события из файла"""
+        actions = []
+        with open(path, encoding="utf-8") as spill_file:
+            for line in spill_file:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                actions.append(UserAction(
+                    user_id=row["user_id"],
+                    action_type=row["action_type"],
+                    action_data=row["action_data"],
+                    created_at=datetime.fromisoformat(row["created_at"]),
+                ))
+        return actions
+    
+    async def _replay_spill(self):
+        """Дописать в БД события, сохраненные в файл при сбоях"""
+        if not self.spill_path:
+            return
+        
+        # Забираем файл целиком: новые сбои пишутся уже в новый файл.
+        # Оставшийся после падения процесса .replay дописывается первым.
+        replay_path = f"{self.spill_path}.replay"
+        if not os.path.exists(replay_path):
+            if not os.path.exists(self.spill_path):
+                return
+            await asyncio.to_thread(os.replace, self.spill_path, replay_path)
+        
+        actions = await asyncio.to_thread(self._read_spill, replay_path)
+        
+        for i in range(0, len(actions), self.batch_size):
+            try:
+                await self._write(actions[i:i + self.batch_size])
+            except Exception as e:
+                logger.error(f"Failed to replay spilled analytics events: {e}")
+                await asyncio.to_thread(self._append_to_spill, actions[i:])
+                break
+        else:
+            logger.info(f"Spilled analytics events replayed: {len(actions)}")
+        
+        await asyncio.to_thread(os.remove, replay_path)
+    
+    async def _run(self):
+        """Цикл записи: по таймеру или при накоплении пачки"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing analytics: {e}")
+
+
+# Глобальный экземпляр
+analytics = AnalyticsEmitter(
+    flush_interval=settings.analytics_flush_interval,
+    batch_size=settings.analytics_batch_size,
+    max_buffer=settings.analytics_max_buffer,
+    spill_path=settings.analytics_spill_path,
+)
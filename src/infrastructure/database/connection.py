@@ -2,44 +2,183 @@
 Database connection pool
 """
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import copy
+import functools
+import time
+from typing import Optional
+from sqlalchemy import CompoundSelect, Select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import CTE
 from src.config.settings import settings
+from src.infrastructure.monitoring.metrics import (
+    db_pool_checkout_wait,
+    db_pool_idle,
+    db_pool_in_use,
+    db_replica_available,
+    db_replica_lag,
+)
 from loguru import logger
 
+# Ключи session.info: сессия реплики и сессия, уже писавшая в БД
+READ_ONLY_KEY = "read_only"
+WROTE_KEY = "wrote"
+
+# Отставание реплики в секундах (0, если все полученное WAL применено)
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений с замером ожидания выдачи соединения"""
+    
+    def _do_get(self):
+        """Выдача соединения (включает ожидание свободного и открытие нового)"""
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start_time)
+
+
+class WriteTrackingSession(Session):
+    """
+    Сессия, запоминающая, что она писала в БД
+    
+    Запись - flush, любой не-SELECT или SELECT с INSERT/UPDATE/DELETE в CTE.
+    После записи read_only-методы читают через эту сессию с основной БД,
+    чтобы видеть собственные изменения: внутри единицы работы - до конца
+    обновления.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """Движок для запроса (всегда основная БД)"""
+        if not self._is_read(clause):
+            self.info[WROTE_KEY] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+    
+    def _is_read(self, clause) -> bool:
+        """SELECT без изменяющих данные CTE (WITH ... INSERT/UPDATE/DELETE)"""
+        if self._flushing or not isinstance(clause, (Select, CompoundSelect)):
+            return False
+        return not any(
+            isinstance(element, CTE) and isinstance(element.element, UpdateBase)
+            for element in visitors.iterate(clause)
+        )
+
+
+def read_only(method):
+    """
+    Пометить метод репозитория как только читающий
+    
+    Пока реплика доступна и сессия репозитория ничего не писала, метод
+    выполняется на копии репозитория с отдельной сессией реплики в режиме
+    autocommit: чтение не входит в транзакцию основной БД, и ее коммит
+    остается атомарным. Ошибка БД на реплике выключает ее до следующей
+    успешной проверки, а метод один раз повторяется на основной БД.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        info = self.session.info
+        if (
+            info.get(READ_ONLY_KEY)
+            or info.get(WROTE_KEY)
+            or not db_connection.replica_available
+        ):
+            return await method(self, *args, **kwargs)
+        
+        try:
+            async with db_connection.get_replica_session() as replica_session:
+                replica_repository = copy.copy(self)
+                replica_repository.session = replica_session
+                return await method(replica_repository, *args, **kwargs)
+        except (DBAPIError, OSError) as e:
+            db_connection.mark_replica_down(e)
+        
+        return await method(self, *args, **kwargs)
+    
+    return wrapper
+
 
 class DatabaseConnection:
     """Управление подключением к базе данных"""
     
     def __init__(self):
         self.engine = None
+        self.replica_engine: Optional[AsyncEngine] = None
+        self.replica_available = False
         self.session_factory = None
+        self.replica_session_factory = None
+        self._replica_task: Optional[asyncio.Task] = None
     
     async def initialize(self):
         """Инициализация подключения к БД"""
         try:
-            self.engine = create_async_engine(
-                settings.database_url,
-                pool_size=settings.db_pool_size,
-                max_overflow=settings.db_max_overflow,
-                pool_pre_ping=True,
-                pool_recycle=3600,  # Переподключение каждый час
-                echo=settings.debug,
-            )
+            self.engine = self._create_engine(settings.database_url)
             
             self.session_factory = async_sessionmaker(
                 self.engine,
                 class_=AsyncSession,
+                sync_session_class=WriteTrackingSession,
                 expire_on_commit=False,
             )
             
-            logger.info("Database connection initialized successfully")
+            # Состояние пула читается только при сборе метрик
+            pool = self.engine.sync_engine.pool
+            db_pool_in_use.set_function(pool.checkedout)
+            db_pool_idle.set_function(pool.checkedin)
+            
+            if settings.database_replica_url:
+                self.replica_engine = self._create_engine(settings.database_replica_url)
+                # Чтения с реплики не держат транзакцию и не входят в транзакции основной БД
+                self.replica_session_factory = async_sessionmaker(
+                    self.replica_engine.execution_options(isolation_level="AUTOCOMMIT"),
+                    class_=AsyncSession,
+                    expire_on_commit=False,
+                    info={READ_ONLY_KEY: True},
+                )
+                await self._check_replica()
+                self._replica_task = asyncio.create_task(self._monitor_replica())
             
+            logger.info("Database connection initialized successfully")
+        
         except Exception as e:
             logger.error(f"Failed to initialize database connection: {e}")
             raise
     
+    def _create_engine(self, url: str) -> AsyncEngine:
+        """Создать движок с пулом соединений"""
+        return create_async_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_pre_ping=True,
+            pool_recycle=3600,  # Переподключение каждый час
+            echo=settings.debug,
+        )
+    
     async def close(self):
         """Закрытие подключения к БД"""
+        if self._replica_task:
+            self._replica_task.cancel()
+            try:
+                await self._replica_task
+            except asyncio.CancelledError:
+                pass
+            self._replica_task = None
+        
+        if self.replica_engine:
+            self.replica_available = False
+            await self.replica_engine.dispose()
+        
         if self.engine:
             await self.engine.dispose()
             logger.info("Database connection closed")
@@ -50,6 +189,56 @@ class DatabaseConnection:
             raise RuntimeError("Database not initialized. Call initialize() first.")
         return self.session_factory()
     
+    def get_replica_session(self) -> AsyncSession:
+        """Получить сессию реплики (только для read_only-методов)"""
+        if not self.replica_session_factory:
+            raise RuntimeError("Read replica is not configured.")
+        return self.replica_session_factory()
+    
+    def mark_replica_down(self, error: Exception):
+        """Перевести чтение на основную БД до следующей проверки реплики"""
+        if self.replica_available:
+            logger.warning(f"Read replica failed, routing reads to primary: {error}")
+        self._set_replica_available(False)
+    
+    async def _check_replica(self):
+        """Проверить доступность и отставание реплики"""
+        try:
+            lag = await asyncio.wait_for(
+                self._get_replica_lag(),
+                timeout=settings.db_replica_check_interval,
+            )
+        except Exception as e:
+            if self.replica_available:
+                logger.warning(f"Read replica is unavailable, routing reads to primary: {e}")
+            self._set_replica_available(False)
+            return
+        
+        db_replica_lag.set(lag)
+        available = lag <= settings.db_replica_max_lag
+        
+        if available and not self.replica_available:
+            logger.info(f"Read replica is available (lag {lag:.1f}s)")
+        elif not available and self.replica_available:
+            logger.warning(f"Read replica lags {lag:.1f}s, routing reads to primary")
+        self._set_replica_available(available)
+    
+    async def _get_replica_lag(self) -> float:
+        """Отставание реплики в секундах"""
+        async with self.replica_engine.connect() as conn:
+            return float(await conn.scalar(REPLICA_LAG_QUERY) or 0)
+    
+    def _set_replica_available(self, available: bool):
+        """Запомнить состояние реплики"""
+        self.replica_available = available
+        db_replica_available.set(1 if available else 0)
+    
+    async def _monitor_replica(self):
+        """Периодическая проверка реплики"""
+        while True:
+            await asyncio.sleep(settings.db_replica_check_interval)
+            await self._check_replica()
+    
     async def health_check(self) -> bool:
         """Проверка здоровья БД"""
         try:
@@ -5,11 +5,13 @@ SQLAlchemy models
 from .user import UserModel
 from .product import ProductModel
 from .order import OrderModel, UserProductModel
-from .test import TestResultModel
+from .test import TestResultModel, TestScoreStatsModel, TestQuestionModel
 from .faq import FAQItemModel
 from .timer import TimerModel
 from .user_action import UserActionModel
+from .funnel import FunnelDailyModel, FunnelUserStepModel
 from .broadcast import BroadcastMessageModel
+from .user_question import UserQuestionModel
 from .base import Base
 
 __all__ = [
@@ -19,8 +21,13 @@ __all__ = [
     "OrderModel",
     "UserProductModel",
     "TestResultModel",
+    "TestScoreStatsModel",
+    "TestQuestionModel",
     "FAQItemModel",
     "TimerModel",
     "UserActionModel",
+    "FunnelDailyModel",
+    "FunnelUserStepModel",
     "BroadcastMessageModel",
+    "UserQuestionModel",
 ]
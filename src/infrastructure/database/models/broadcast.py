@@ -20,5 +20,6 @@ class BroadcastMessageModel(Base):
     total_users = Column(Integer, default=0, nullable=False)
     sent_count = Column(Integer, default=0, nullable=False)
     failed_count = Column(Integer, default=0, nullable=False)
+    last_user_id = Column(BigInteger, nullable=True)  # Курсор для продолжения рассылки
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,42 @@
+"""
+Funnel rollup SQLAlchemy models
+"""
+
+from sqlalchemy import Column, BigInteger, String, Date, DateTime, UniqueConstraint
+from .base import Base
+
+
+class FunnelDailyModel(Base):
+    """
+    Сводка воронки: день x шаг x продукт
+    
+    Обновляется инкрементально при записи событий аналитики, поэтому
+    конверсия за N дней читается из O(N) строк, а не из user_actions.
+    """
+    
+    __tablename__ = "funnel_daily"
+    __table_args__ = (
+        UniqueConstraint("day", "step", "product_slug", name="uq_funnel_daily_day_step_product"),
+    )
+    
+    day = Column(Date, nullable=False)
+    step = Column(String(100), nullable=False)  # тип события: start, view_kits, order_paid и т.д.
+    product_slug = Column(String(100), default="", nullable=False)  # "" для шагов без продукта
+    events_count = Column(BigInteger, default=0, nullable=False)
+    # Пользователи, впервые дошедшие до шага в этот день
+    users_count = Column(BigInteger, default=0, nullable=False)
+    amount_kopecks = Column(BigInteger, default=0, nullable=False)  # сумма оплат для order_paid
+
+
+class FunnelUserStepModel(Base):
+    """Первое достижение шага воронки пользователем (для подсчета уникальных)"""
+    
+    __tablename__ = "funnel_user_steps"
+    __table_args__ = (
+        UniqueConstraint("user_id", "step", "product_slug", name="uq_funnel_user_steps_user_step_product"),
+    )
+    
+    user_id = Column(BigInteger, nullable=False)
+    step = Column(String(100), nullable=False)
+    product_slug = Column(String(100), default="", nullable=False)
+    first_at = Column(DateTime, nullable=False)
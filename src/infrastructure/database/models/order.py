@@ -2,7 +2,7 @@
 Order SQLAlchemy model
 """
 
-from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Boolean, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -23,6 +23,15 @@ class OrderModel(Base):
     expires_at = Column(DateTime, nullable=True)
     paid_at = Column(DateTime, nullable=True)
     
+    __table_args__ = (
+        # Очистка просроченных заказов: только ожидающие оплаты
+        Index(
+            "ix_orders_pending_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+    
     # Relationships
     user = relationship("UserModel", back_populates="orders")
     product = relationship("ProductModel", back_populates="orders")
@@ -42,6 +51,17 @@ class UserProductModel(Base):
     delivery_attempts = Column(Integer, default=0, nullable=False)
     last_delivery_attempt = Column(DateTime, nullable=True)
     
+    __table_args__ = (
+        # Одна покупка на заказ: защита от повторной обработки webhook
+        UniqueConstraint("order_id", name="uq_user_products_order_id"),
+        # Очередь доставки: только недоставленные покупки
+        Index(
+            "ix_user_products_pending_delivery",
+            "purchased_at",
+            postgresql_where=text("file_delivered = false"),
+        ),
+    )
+    
     # Relationships
     user = relationship("UserModel", back_populates="user_products")
     product = relationship("ProductModel", back_populates="user_products")
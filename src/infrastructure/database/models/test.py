@@ -2,7 +2,7 @@
 Test Result SQLAlchemy model
 """
 
-from sqlalchemy import Column, BigInteger, Integer, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, BigInteger, Integer, Boolean, DateTime, ForeignKey, JSON, Text
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -12,7 +12,7 @@ class TestResultModel(Base):
     
     __tablename__ = "test_results"
     
-    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     score = Column(Integer, nullable=False)
     total_questions = Column(Integer, default=6, nullable=False)
     attempts = Column(Integer, default=1, nullable=False)
@@ -22,3 +22,34 @@ class TestResultModel(Base):
     
     # Relationships
     user = relationship("UserModel", back_populates="test_results")
+
+
+class TestScoreStatsModel(Base):
+    """
+    Сводка результатов тестов по баллам
+    
+    Обновляется инкрементально при сохранении результата, поэтому
+    статистика тестов читается из нескольких строк, а не из всей
+    таблицы test_results.
+    """
+    
+    __tablename__ = "test_score_stats"
+    
+    score = Column(Integer, unique=True, nullable=False)
+    tests_count = Column(BigInteger, default=0, nullable=False)
+    passed_count = Column(BigInteger, default=0, nullable=False)
+    # Результаты, ставшие первым тестом пользователя: их сумма - число уникальных пользователей
+    first_tests_count = Column(BigInteger, default=0, nullable=False)
+
+
+class TestQuestionModel(Base):
+    """Модель вопроса теста"""
+    
+    __tablename__ = "test_questions"
+    
+    question = Column(Text, nullable=False)
+    options = Column(JSON, nullable=False)  # Список вариантов ответа
+    correct_answer = Column(Integer, nullable=False)  # Индекс правильного ответа
+    explanation = Column(Text, nullable=True)
+    sort_order = Column(Integer, default=0, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
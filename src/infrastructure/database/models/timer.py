@@ -2,7 +2,7 @@
 Timer SQLAlchemy model
 """
 
-from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -19,5 +19,16 @@ class TimerModel(Base):
     is_triggered = Column(Boolean, default=False, nullable=False)
     is_cancelled = Column(Boolean, default=False, nullable=False)
     
+    __table_args__ = (
+        # Каждый оффер предлагается пользователю один раз
+        UniqueConstraint("user_id", "timer_type", name="uq_timers_user_type"),
+        # Планировщик: только ожидающие таймеры
+        Index(
+            "ix_timers_pending_expires_at",
+            "expires_at",
+            postgresql_where=text("is_triggered = false AND is_cancelled = false"),
+        ),
+    )
+    
     # Relationships
     user = relationship("UserModel", back_populates="timers")
@@ -0,0 +1,251 @@
+"""
+Broadcast repository implementation
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, Optional, List, Tuple
+from sqlalchemy import select, update, func, exists, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from src.domain.entities.broadcast import Broadcast, BroadcastStatus
+from src.domain.repositories.broadcast_repository import BroadcastRepository
+from src.infrastructure.database.connection import read_only
+from src.infrastructure.database.models.broadcast import BroadcastMessageModel
+from src.infrastructure.database.models.order import UserProductModel
+from src.infrastructure.database.models.product import ProductModel
+from src.infrastructure.database.models.user import UserModel
+
+
+class SQLAlchemyBroadcastRepository(BroadcastRepository):
+    """Реализация репозитория рассылок через SQLAlchemy"""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def create(self, broadcast: Broadcast) -> Broadcast:
+        """Создать рассылку"""
+        try:
+            broadcast_model = BroadcastMessageModel(
+                created_by_admin_id=broadcast.created_by_admin_id,
+                message_text=broadcast.message_text,
+                media_file_id=broadcast.media_file_id,
+                media_type=broadcast.media_type,
+                target_filter=broadcast.target_filter,
+                status=broadcast.status.value,
+                total_users=broadcast.total_users,
+                sent_count=broadcast.sent_count,
+                failed_count=broadcast.failed_count,
+                last_user_id=broadcast.last_user_id,
+                created_at=broadcast.created_at,
+            )
+            
+            self.session.add(broadcast_model)
+            await self.session.flush()
+            
+            # Обновляем ID в entity
+            broadcast.id = broadcast_model.id
+            
+            logger.debug("Broadcast created: {}", broadcast.id)
+            return broadcast
+        
+        except Exception as e:
+            logger.error(f"Error creating broadcast: {e}")
+            raise
+    
+    async def get_by_id(self, broadcast_id: int) -> Optional[Broadcast]:
+        """Получить рассылку по ID"""
+        try:
+            result = await self.session.execute(
+                select(BroadcastMessageModel).where(BroadcastMessageModel.id == broadcast_id)
+            )
+            broadcast_model = result.scalar_one_or_none()
+            
+            if broadcast_model:
+                return self._model_to_entity(broadcast_model)
+            return None
+        
+        except Exception as e:
+            logger.error(f"Error getting broadcast {broadcast_id}: {e}")
+            raise
+    
+    async def get_by_status(self, status: BroadcastStatus) -> List[Broadcast]:
+        """Получить рассылки по статусу"""
+        try:
+            result = await self.session.execute(
+                select(BroadcastMessageModel)
+                .where(BroadcastMessageModel.status == status.value)
+                .order_by(BroadcastMessageModel.id.asc())
+            )
+            broadcast_models = result.scalars().all()
+            
+            return [self._model_to_entity(model) for model in broadcast_models]
+        
+        except Exception as e:
+            logger.error(f"Error getting broadcasts by status {status.value}: {e}")
+            raise
+    
+    async def update_status(
+        self,
+        broadcast_id: int,
+        status: BroadcastStatus,
+        from_statuses: Optional[Iterable[BroadcastStatus]] = None,
+    ) -> bool:
+        """
+        Обновить статус рассылки
+        
+        Args:
+            from_statuses: Менять только из этих статусов (завершенную
+                рассылку, например, отменять уже нельзя)
+        """
+        try:
+            values = {"status": status.value}
+            if status == BroadcastStatus.IN_PROGRESS:
+                values["started_at"] = func.coalesce(BroadcastMessageModel.started_at, datetime.utcnow())
+            elif status in (BroadcastStatus.COMPLETED, BroadcastStatus.CANCELLED):
+                values["completed_at"] = datetime.utcnow()
+            
+            query = update(BroadcastMessageModel).where(BroadcastMessageModel.id == broadcast_id)
+            if from_statuses is not None:
+                query = query.where(
+                    BroadcastMessageModel.status.in_([s.value for s in from_statuses])
+                )
+            
+            result = await self.session.execute(query.values(**values))
+            
+            return result.rowcount > 0
+        
+        except Exception as e:
+            logger.error(f"Error updating broadcast {broadcast_id} status: {e}")
+            raise
+    
+    @read_only
+    async def count_recipients(self, target_filter: Optional[Dict[str, Any]]) -> int:
+        """Посчитать получателей по фильтру аудитории"""
+        try:
+            result = await self.session.execute(
+                select(func.count(UserModel.id)).where(*self._recipient_conditions(target_filter))
+            )
+            return result.scalar()
+        
+        except Exception as e:
+            logger.error(f"Error counting broadcast recipients: {e}")
+            raise
+    
+    @read_only
+    async def get_recipients_page(
+        self,
+        target_filter: Optional[Dict[str, Any]],
+        after_user_id: Optional[int],
+        limit: int,
+    ) -> List[Tuple[int, int]]:
+        """
+        Получить следующую страницу получателей: (user_id, telegram_id)
+        
+        Keyset-пагинация по users.id: каждая страница - индексный диапазон,
+        без OFFSET и без загрузки всей аудитории в память.
+        """
+        try:
+            query = (
+                select(UserModel.id, UserModel.telegram_id)
+                .where(*self._recipient_conditions(target_filter))
+                .order_by(UserModel.id.asc())
+                .limit(limit)
+            )
+            if after_user_id is not None:
+                query = query.where(UserModel.id > after_user_id)
+            
+            result = await self.session.execute(query)
+            return [(row.id, row.telegram_id) for row in result]
+        
+        except Exception as e:
+            logger.error(f"Error getting broadcast recipients after {after_user_id}: {e}")
+            raise
+    
+    async def save_progress(
+        self,
+        broadcast_id: int,
+        last_user_id: int,
+        sent: int,
+        failed: int,
+    ) -> bool:
+        """Сохранить курсор и прибавить счетчики отправленных/неудачных"""
+        try:
+            result = await self.session.execute(
+                update(BroadcastMessageModel)
+                .where(BroadcastMessageModel.id == broadcast_id)
+                .values(
+                    last_user_id=last_user_id,
+                    sent_count=BroadcastMessageModel.sent_count + sent,
+                    failed_count=BroadcastMessageModel.failed_count + failed,
+                )
+            )
+            
+            return result.rowcount > 0
+        
+        except Exception as e:
+            logger.error(f"Error saving broadcast {broadcast_id} progress: {e}")
+            raise
+    
+    # Helper methods
+    def _recipient_conditions(self, target_filter: Optional[Dict[str, Any]]) -> list:
+        """
+        Условия выборки получателей
+        
+        Поддерживаемые ключи target_filter:
+            has_product: slug или список slug'ов - купил хотя бы один
+            without_product: slug или список slug'ов - не купил ни один
+            active_since_days: был активен за последние N дней
+            language_code: язык пользователя
+        """
+        conditions = [UserModel.is_blocked == False]
+        target_filter = target_filter or {}
+        
+        unknown = set(target_filter) - {"has_product", "without_product", "active_since_days", "language_code"}
+        if unknown:
+            raise ValueError(f"Unknown broadcast filter keys: {sorted(unknown)}")
+        
+        if target_filter.get("has_product"):
+            conditions.append(self._owns_product(target_filter["has_product"]))
+        
+        if target_filter.get("without_product"):
+            conditions.append(~self._owns_product(target_filter["without_product"]))
+        
+        if target_filter.get("active_since_days"):
+            since = datetime.utcnow() - timedelta(days=int(target_filter["active_since_days"]))
+            conditions.append(UserModel.last_activity_at >= since)
+        
+        if target_filter.get("language_code"):
+            conditions.append(UserModel.language_code == target_filter["language_code"])
+        
+        return conditions
+    
+    def _owns_product(self, slugs) -> Any:
+        """EXISTS: у пользователя есть один из продуктов"""
+        if isinstance(slugs, str):
+            slugs = [slugs]
+        
+        return exists(
+            select(UserProductModel.id)
+            .join(ProductModel, ProductModel.id == UserProductModel.product_id)
+            .where(and_(UserProductModel.user_id == UserModel.id, ProductModel.slug.in_(slugs)))
+        )
+    
+    def _model_to_entity(self, model: BroadcastMessageModel) -> Broadcast:
+        """Преобразование модели в entity"""
+        return Broadcast(
+            id=model.id,
+            created_by_admin_id=model.created_by_admin_id,
+            message_text=model.message_text,
+            media_file_id=model.media_file_id,
+            media_type=model.media_type,
+            target_filter=model.target_filter,
+            status=BroadcastStatus(model.status),
+            total_users=model.total_users,
+            sent_count=model.sent_count,
+            failed_count=model.failed_count,
+            last_user_id=model.last_user_id,
+            started_at=model.started_at,
+            completed_at=model.completed_at,
+            created_at=model.created_at,
+        )
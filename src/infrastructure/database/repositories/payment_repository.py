@@ -2,15 +2,21 @@
 Payment repository implementation
 """
 
-from typing import Optional, List
-from sqlalchemy import select, update, and_
+from datetime import datetime
+from typing import Optional, List, FrozenSet
+from sqlalchemy import select, update, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from src.domain.entities.payment import Order, Product, UserProduct, PaymentStatus
 from src.domain.repositories.payment_repository import PaymentRepository
+from src.infrastructure.database.connection import read_only
 from src.infrastructure.database.models.order import OrderModel, UserProductModel
 from src.infrastructure.database.models.product import ProductModel
+from src.infrastructure.cache.product_catalog import product_catalog
+from src.infrastructure.cache.entitlements_cache import entitlements_cache
+from src.infrastructure.database.session import after_commit
 from src.domain.exceptions import ProductNotFoundException, OrderNotFoundException
 
 
@@ -23,6 +29,10 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
     # Products methods
     async def get_product_by_slug(self, slug: str) -> Optional[Product]:
         """Получить продукт по slug"""
+        # Загруженный каталог - источник истины, SQL только до его загрузки
+        if product_catalog.is_loaded:
+            return product_catalog.get_by_slug(slug)
+        
         try:
             result = await self.session.execute(
                 select(ProductModel).where(ProductModel.slug == slug)
@@ -37,6 +47,25 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
             logger.error(f"Error getting product by slug {slug}: {e}")
             raise
     
+    async def get_product_by_id(self, product_id: int) -> Optional[Product]:
+        """Получить продукт по ID"""
+        if product_catalog.is_loaded:
+            return product_catalog.get_by_id(product_id)
+        
+        try:
+            result = await self.session.execute(
+                select(ProductModel).where(ProductModel.id == product_id)
+            )
+            product_model = result.scalar_one_or_none()
+            
+            if product_model:
+                return self._product_model_to_entity(product_model)
+            return None
+            
+        except Exception as e:
+            logger.error(f"Error getting product by id {product_id}: {e}")
+            raise
+    
     async def get_all_products(self) -> List[Product]:
         """Получить все продукты"""
         try:
@@ -53,6 +82,9 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
     
     async def get_active_products(self) -> List[Product]:
         """Получить активные продукты"""
+        if product_catalog.is_loaded:
+            return product_catalog.get_active()
+        
         try:
             result = await self.session.execute(
                 select(ProductModel)
@@ -92,7 +124,7 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
             # Обновляем ID в entity
             order.id = order_model.id
             
-            logger.info(f"Order created: {order.id} for user {order.user_id}")
+            logger.debug("Order created: {} for user {}", order.id, order.user_id)
             return order
             
         except Exception as e:
@@ -148,13 +180,44 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
                 )
             )
             
-            logger.info(f"Order updated: {order.id}")
+            logger.debug("Order updated: {}", order.id)
             return order
             
         except Exception as e:
             logger.error(f"Error updating order {order.id}: {e}")
             raise
     
+    async def mark_order_paid(self, order: Order) -> bool:
+        """
+        Перевести заказ в PAID, если он еще не оплачен
+        
+        Условный UPDATE блокирует строку заказа: из параллельных уведомлений
+        об одной оплате (подписанный webhook и проверка статуса) заказ
+        переводит только одно, второе ждет коммита первого и получает False.
+        """
+        try:
+            values = {
+                "status": PaymentStatus.PAID.value,
+                "paid_at": order.paid_at,
+                "updated_at": datetime.utcnow(),
+            }
+            if order.payment_method:
+                values["payment_method"] = order.payment_method.value
+            
+            result = await self.session.execute(
+                update(OrderModel)
+                .where(OrderModel.id == order.id)
+                .where(OrderModel.status.notin_([PaymentStatus.PAID.value, PaymentStatus.REFUNDED.value]))
+                .values(**values)
+                .returning(OrderModel.id)
+            )
+            
+            return result.scalar_one_or_none() is not None
+            
+        except Exception as e:
+            logger.error(f"Error marking order {order.id} as paid: {e}")
+            raise
+    
     async def get_user_orders(self, user_id: int) -> List[Order]:
         """Получить заказы пользователя"""
         try:
@@ -171,13 +234,15 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
             logger.error(f"Error getting user orders for {user_id}: {e}")
             raise
     
-    async def get_orders_by_status(self, status: PaymentStatus) -> List[Order]:
-        """Получить заказы по статусу"""
+    @read_only
+    async def get_orders_by_status(self, status: PaymentStatus, limit: Optional[int] = None) -> List[Order]:
+        """Получить заказы по статусу (новые первыми)"""
         try:
             result = await self.session.execute(
                 select(OrderModel)
                 .where(OrderModel.status == status.value)
                 .order_by(OrderModel.created_at.desc())
+                .limit(limit)
             )
             order_models = result.scalars().all()
             
@@ -187,27 +252,77 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
             logger.error(f"Error getting orders by status {status}: {e}")
             raise
     
+    async def expire_pending_orders(self, now: datetime, limit: int) -> int:
+        """
+        Перевести просроченные заказы из PENDING в EXPIRED
+        
+        Один UPDATE на пачку до limit строк. Выборка идет по частичному индексу
+        ix_orders_pending_expires_at; заблокированные строки (например, заказ,
+        который сейчас обрабатывает webhook) пропускаются до следующего прохода.
+        """
+        try:
+            expired = (
+                select(OrderModel.id)
+                .where(OrderModel.status == PaymentStatus.PENDING.value)
+                .where(OrderModel.expires_at <= now)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            
+            result = await self.session.execute(
+                update(OrderModel)
+                .where(OrderModel.id.in_(expired))
+                .values(status=PaymentStatus.EXPIRED.value, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            
+            return result.rowcount
+            
+        except Exception as e:
+            logger.error(f"Error expiring pending orders: {e}")
+            raise
+    
     # User Products methods
     async def create_user_product(self, user_product: UserProduct) -> UserProduct:
-        """Создать покупку пользователя"""
+        """
+        Создать покупку пользователя
+        
+        Повторная запись по тому же заказу не создает дубликат
+        (уникальный order_id), возвращается существующая покупка.
+        """
         try:
-            user_product_model = UserProductModel(
-                user_id=user_product.user_id,
-                product_id=user_product.product_id,
-                order_id=user_product.order_id,
-                purchased_at=user_product.purchased_at,
-                file_delivered=user_product.file_delivered,
-                delivery_attempts=user_product.delivery_attempts,
-                last_delivery_attempt=user_product.last_delivery_attempt,
+            result = await self.session.execute(
+                pg_insert(UserProductModel)
+                .values(
+                    user_id=user_product.user_id,
+                    product_id=user_product.product_id,
+                    order_id=user_product.order_id,
+                    purchased_at=user_product.purchased_at,
+                    file_delivered=user_product.file_delivered,
+                    delivery_attempts=user_product.delivery_attempts,
+                    last_delivery_attempt=user_product.last_delivery_attempt,
+                )
+                .on_conflict_do_nothing(index_elements=[UserProductModel.order_id])
+                .returning(UserProductModel.id)
             )
+            user_product_id = result.scalar_one_or_none()
             
-            self.session.add(user_product_model)
-            await self.session.flush()
+            if user_product_id is None:
+                existing = await self.session.execute(
+                    select(UserProductModel).where(UserProductModel.order_id == user_product.order_id)
+                )
+                logger.debug("User product already exists for order {}", user_product.order_id)
+                return self._user_product_model_to_entity(existing.scalar_one())
             
             # Обновляем ID в entity
-            user_product.id = user_product_model.id
+            user_product.id = user_product_id
             
-            logger.info(f"User product created: {user_product.id}")
+            # Набор покупок пользователя изменился. Сбрасываем после коммита:
+            # иначе параллельный запрос закеширует старый набор на весь TTL
+            user_id = user_product.user_id
+            after_commit(self.session, lambda: entitlements_cache.pop(user_id))
+            
+            logger.debug("User product created: {}", user_product.id)
             return user_product
             
         except Exception as e:
@@ -230,31 +345,32 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
             logger.error(f"Error getting user products for {user_id}: {e}")
             raise
     
-    async def has_user_product(self, user_id: int, product_slug: str) -> bool:
-        """Проверить, есть ли у пользователя продукт"""
+    async def get_user_entitlements(self, user_id: int) -> FrozenSet[str]:
+        """Получить slug'и всех купленных пользователем продуктов"""
+        entitlements = entitlements_cache.get(user_id)
+        if entitlements is not None:
+            return entitlements
+        
         try:
-            # Сначала получаем продукт
-            product = await self.get_product_by_slug(product_slug)
-            if not product:
-                return False
-            
-            # Проверяем, есть ли у пользователя этот продукт
             result = await self.session.execute(
-                select(UserProductModel.id)
-                .where(
-                    and_(
-                        UserProductModel.user_id == user_id,
-                        UserProductModel.product_id == product.id
-                    )
-                )
+                select(ProductModel.slug)
+                .join(UserProductModel, UserProductModel.product_id == ProductModel.id)
+                .where(UserProductModel.user_id == user_id)
+                .distinct()
             )
+            entitlements = frozenset(result.scalars().all())
             
-            return result.scalar_one_or_none() is not None
+            entitlements_cache.set(user_id, entitlements)
+            return entitlements
             
         except Exception as e:
-            logger.error(f"Error checking user product {user_id}, {product_slug}: {e}")
+            logger.error(f"Error getting entitlements for user {user_id}: {e}")
             raise
     
+    async def has_user_product(self, user_id: int, product_slug: str) -> bool:
+        """Проверить, есть ли у пользователя продукт"""
+        return product_slug in await self.get_user_entitlements(user_id)
+    
     async def get_undelivered_products(self) -> List[UserProduct]:
         """Получить не доставленные продукты"""
         try:
@@ -286,6 +402,70 @@ class SQLAlchemyPaymentRepository(PaymentRepository):
             logger.error(f"Error marking as delivered {user_product_id}: {e}")
             raise
     
+    async def claim_pending_deliveries(
+        self,
+        limit: int,
+        max_attempts: int,
+        retry_base_delay: int,
+    ) -> List[UserProduct]:
+        """
+        Захватить недоставленные покупки, готовые к очередной попытке доставки
+        
+        Строки выбираются через FOR UPDATE SKIP LOCKED, поэтому параллельные
+        воркеры не получают одну покупку дважды. Захват сразу засчитывает
+        попытку: следующая возможна не раньше retry_base_delay * 2^(n-1) секунд.
+        """
+        try:
+            now = datetime.utcnow()
+            retry_at = UserProductModel.last_delivery_attempt + func.make_interval(
+                0, 0, 0, 0, 0, 0,
+                retry_base_delay * func.power(2, UserProductModel.delivery_attempts - 1),
+            )
+            
+            candidates = (
+                select(UserProductModel.id)
+                .where(UserProductModel.file_delivered == False)
+                .where(UserProductModel.delivery_attempts < max_attempts)
+                .where(or_(UserProductModel.last_delivery_attempt.is_(None), retry_at <= now))
+                .order_by(UserProductModel.purchased_at.asc())
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            
+            result = await self.session.execute(
+                update(UserProductModel)
+                .where(UserProductModel.id.in_(candidates))
+                .values(
+                    delivery_attempts=UserProductModel.delivery_attempts + 1,
+                    last_delivery_attempt=now,
+                )
+                .returning(UserProductModel)
+                .execution_options(synchronize_session=False)
+            )
+            user_product_models = result.scalars().all()
+            
+            return [self._user_product_model_to_entity(model) for model in user_product_models]
+            
+        except Exception as e:
+            logger.error(f"Error claiming pending deliveries: {e}")
+            raise
+    
+    async def abandon_delivery(self, user_product_id: int, max_attempts: int) -> bool:
+        """Прекратить попытки доставки покупки"""
+        try:
+            result = await self.session.execute(
+                update(UserProductModel)
+                .where(UserProductModel.id == user_product_id)
+                .where(UserProductModel.file_delivered == False)
+                .values(delivery_attempts=max_attempts)
+            )
+            
+            return result.rowcount > 0
+            
+        except Exception as e:
+            logger.error(f"Error abandoning delivery {user_product_id}: {e}")
+            raise
+    
     # Helper methods
     def _product_model_to_entity(self, model: ProductModel) -> Product:
         """Преобразование модели продукта в entity"""
@@ -0,0 +1,307 @@
+"""
+Statistics repository implementation
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import select, insert, update, delete, func, cast, literal, union_all, text, and_, Date, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from src.domain.entities.payment import PaymentStatus
+from src.domain.entities.user_action import UserAction
+from src.domain.repositories.statistics_repository import StatisticsRepository
+from src.infrastructure.database.connection import read_only
+from src.infrastructure.database.models.funnel import FunnelDailyModel, FunnelUserStepModel
+from src.infrastructure.database.models.order import OrderModel
+from src.infrastructure.database.models.user import UserModel
+from src.infrastructure.database.models.user_action import UserActionModel
+
+
+class SQLAlchemyStatisticsRepository(StatisticsRepository):
+    """Реализация репозитория статистики через SQLAlchemy"""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    @read_only
+    async def get_overview(self) -> dict:
+        """
+        Получить сводку по пользователям и заказам
+        
+        Все счетчики и суммы считаются в БД одним запросом: UNION ALL из
+        GROUP BY по пользователям (активные/заблокированные) и по статусам
+        заказов. В память попадает по строке на группу, а не строки таблиц.
+        """
+        try:
+            users_query = (
+                select(
+                    literal("users").label("source"),
+                    cast(UserModel.is_blocked, String).label("status"),
+                    func.count().label("count"),
+                    literal(0).label("amount_kopecks"),
+                )
+                .group_by(UserModel.is_blocked)
+            )
+            
+            orders_query = (
+                select(
+                    literal("orders").label("source"),
+                    OrderModel.status.label("status"),
+                    func.count().label("count"),
+                    func.coalesce(func.sum(OrderModel.amount_kopecks), 0).label("amount_kopecks"),
+                )
+                .group_by(OrderModel.status)
+            )
+            
+            result = await self.session.execute(union_all(users_query, orders_query))
+            
+            # is_blocked приходит строкой: 'true' / 'false'
+            users = {"true": 0, "false": 0}
+            orders = {status.value: {"count": 0, "amount_kopecks": 0} for status in PaymentStatus}
+            
+            for row in result:
+                if row.source == "users":
+                    users[row.status] = row.count
+                else:
+                    orders[row.status] = {"count": row.count, "amount_kopecks": int(row.amount_kopecks)}
+            
+            paid = orders[PaymentStatus.PAID.value]
+            
+            return {
+                "total_users": users["true"] + users["false"],
+                "active_users": users["false"],
+                "blocked_users": users["true"],
+                "orders_by_status": orders,
+                "paid_orders": paid["count"],
+                "total_revenue": paid["amount_kopecks"],
+            }
+        
+        except Exception as e:
+            logger.error(f"Error getting statistics overview: {e}")
+            raise
+    
+    async def apply_funnel_events(self, actions: List[UserAction]) -> None:
+        """
+        Прибавить события аналитики к сводке воронки
+        
+        Вызывается в транзакции записи событий. Каждое событие учитывается
+        в строке шага (product_slug = "") и, если у события есть продукт, в
+        строке продукта. Уникальные пользователи считаются через
+        funnel_user_steps: INSERT ... ON CONFLICT DO NOTHING RETURNING
+        возвращает только первые достижения шагов. Строки вставляются в
+        порядке ключей, чтобы параллельные записи не взаимоблокировались.
+        """
+        if not actions:
+            return
+        
+        try:
+            # (день, шаг, продукт) -> [событий, новых пользователей, сумма]
+            daily: Dict[Tuple[date, str, str], List[int]] = {}
+            # (пользователь, шаг, продукт) -> первое событие в пачке
+            first_steps: Dict[Tuple[int, str, str], datetime] = {}
+            
+            for action in actions:
+                action_data = action.action_data or {}
+                product = action_data.get("product") or ""
+                amount = int(action_data.get("amount_kopecks") or 0)
+                
+                for product_slug in {"", product}:
+                    counters = daily.setdefault((action.created_at.date(), action.action_type, product_slug), [0, 0, 0])
+                    counters[0] += 1
+                    counters[2] += amount
+                    
+                    key = (action.user_id, action.action_type, product_slug)
+                    if key not in first_steps or action.created_at < first_steps[key]:
+                        first_steps[key] = action.created_at
+            
+            now = datetime.utcnow()
+            result = await self.session.execute(
+                pg_insert(FunnelUserStepModel)
+                .values([
+                    {
+                        "user_id": user_id,
+                        "step": step,
+                        "product_slug": product_slug,
+                        "first_at": first_at,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for (user_id, step, product_slug), first_at in sorted(first_steps.items())
+                ])
+                .on_conflict_do_nothing(
+                    index_elements=[FunnelUserStepModel.user_id, FunnelUserStepModel.step, FunnelUserStepModel.product_slug]
+                )
+                .returning(FunnelUserStepModel.step, FunnelUserStepModel.product_slug, FunnelUserStepModel.first_at)
+            )
+            for row in result:
+                daily[(row.first_at.date(), row.step, row.product_slug)][1] += 1
+            
+            statement = pg_insert(FunnelDailyModel).values([
+                {
+                    "day": day,
+                    "step": step,
+                    "product_slug": product_slug,
+                    "events_count": events_count,
+                    "users_count": users_count,
+                    "amount_kopecks": amount_kopecks,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for (day, step, product_slug), (events_count, users_count, amount_kopecks) in sorted(daily.items())
+            ])
+            await self.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[FunnelDailyModel.day, FunnelDailyModel.step, FunnelDailyModel.product_slug],
+                    set_={
+                        "events_count": FunnelDailyModel.events_count + statement.excluded.events_count,
+                        "users_count": FunnelDailyModel.users_count + statement.excluded.users_count,
+                        "amount_kopecks": FunnelDailyModel.amount_kopecks + statement.excluded.amount_kopecks,
+                        "updated_at": statement.excluded.updated_at,
+                    },
+                )
+            )
+        
+        except Exception as e:
+            logger.error(f"Error updating funnel rollups for {len(actions)} events: {e}")
+            raise
+    
+    @read_only
+    async def get_funnel(self, since: date) -> dict:
+        """
+        Получить воронку по сводке начиная с дня since
+        
+        Читаются только строки funnel_daily за период. Результат:
+        {шаг: {"events", "users", "amount_kopecks", "products": {slug: {...}}}},
+        где users - пользователи, впервые дошедшие до шага за период.
+        """
+        try:
+            result = await self.session.execute(
+                select(
+                    FunnelDailyModel.step,
+                    FunnelDailyModel.product_slug,
+                    func.sum(FunnelDailyModel.events_count).label("events"),
+                    func.sum(FunnelDailyModel.users_count).label("users"),
+                    func.sum(FunnelDailyModel.amount_kopecks).label("amount_kopecks"),
+                )
+                .where(FunnelDailyModel.day >= since)
+                .group_by(FunnelDailyModel.step, FunnelDailyModel.product_slug)
+            )
+            
+            funnel = {}
+            for row in result:
+                step = funnel.setdefault(row.step, {"events": 0, "users": 0, "amount_kopecks": 0, "products": {}})
+                counters = {
+                    "events": int(row.events),
+                    "users": int(row.users),
+                    "amount_kopecks": int(row.amount_kopecks),
+                }
+                
+                if row.product_slug:
+                    step["products"][row.product_slug] = counters
+                else:
+                    step.update(counters)
+            
+            return funnel
+        
+        except Exception as e:
+            logger.error(f"Error getting funnel since {since}: {e}")
+            raise
+    
+    async def rebuild_funnel(self) -> None:
+        """
+        Пересчитать сводку воронки по user_actions
+        
+        Таблица событий блокируется от записи на время пересчета, чтобы
+        параллельная запись пачки событий не потеряла свои приращения.
+        """
+        try:
+            await self.session.execute(text("LOCK TABLE user_actions IN SHARE MODE"))
+            await self.session.execute(delete(FunnelDailyModel))
+            await self.session.execute(delete(FunnelUserStepModel))
+            
+            # События в строках шага ("") и в строках продукта
+            product = UserActionModel.action_data["product"].as_string()
+            events = union_all(
+                select(
+                    UserActionModel.user_id,
+                    UserActionModel.action_type.label("step"),
+                    literal("").label("product_slug"),
+                    UserActionModel.action_data,
+                    UserActionModel.created_at,
+                ),
+                select(
+                    UserActionModel.user_id,
+                    UserActionModel.action_type.label("step"),
+                    product.label("product_slug"),
+                    UserActionModel.action_data,
+                    UserActionModel.created_at,
+                )
+                .where(product.is_not(None))
+                .where(product != ""),
+            ).subquery()
+            
+            now = datetime.utcnow()
+            await self.session.execute(
+                insert(FunnelUserStepModel).from_select(
+                    ["user_id", "step", "product_slug", "first_at", "created_at", "updated_at"],
+                    select(
+                        events.c.user_id,
+                        events.c.step,
+                        events.c.product_slug,
+                        func.min(events.c.created_at),
+                        literal(now),
+                        literal(now),
+                    )
+                    .group_by(events.c.user_id, events.c.step, events.c.product_slug),
+                )
+            )
+            
+            day = cast(events.c.created_at, Date)
+            await self.session.execute(
+                insert(FunnelDailyModel).from_select(
+                    ["day", "step", "product_slug", "events_count", "users_count", "amount_kopecks", "created_at", "updated_at"],
+                    select(
+                        day,
+                        events.c.step,
+                        events.c.product_slug,
+                        func.count(),
+                        literal(0),
+                        func.coalesce(func.sum(events.c.action_data["amount_kopecks"].as_integer()), 0),
+                        literal(now),
+                        literal(now),
+                    )
+                    .group_by(day, events.c.step, events.c.product_slug),
+                )
+            )
+            
+            first_day = cast(FunnelUserStepModel.first_at, Date)
+            new_users = (
+                select(
+                    first_day.label("day"),
+                    FunnelUserStepModel.step,
+                    FunnelUserStepModel.product_slug,
+                    func.count().label("users"),
+                )
+                .group_by(first_day, FunnelUserStepModel.step, FunnelUserStepModel.product_slug)
+                .subquery()
+            )
+            await self.session.execute(
+                update(FunnelDailyModel)
+                .where(
+                    and_(
+                        FunnelDailyModel.day == new_users.c.day,
+                        FunnelDailyModel.step == new_users.c.step,
+                        FunnelDailyModel.product_slug == new_users.c.product_slug,
+                    )
+                )
+                .values(users_count=new_users.c.users)
+                .execution_options(synchronize_session=False)
+            )
+            
+            logger.info("Funnel rollups rebuilt")
+        
+        except Exception as e:
+            logger.error(f"Error rebuilding funnel rollups: {e}")
+            raise
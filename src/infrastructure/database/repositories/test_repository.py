@@ -2,25 +2,36 @@
 Test repository implementation
 """
 
+from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update, delete, insert, func, case, exists, literal, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
+from src.config.settings import settings
 from src.domain.entities.test_result import TestResult
 from src.domain.repositories.test_repository import TestRepository
-from src.infrastructure.database.models.test import TestResultModel
+from src.infrastructure.database.connection import read_only
+from src.infrastructure.database.models.test import TestResultModel, TestScoreStatsModel
 
 
 class SQLAlchemyTestRepository(TestRepository):
     """Реализация репозитория тестов через SQLAlchemy"""
     
+    # Пространство ключей advisory-блокировки первого теста пользователя
+    FIRST_TEST_LOCK_NAMESPACE = 7301
+    
     def __init__(self, session: AsyncSession):
         self.session = session
     
     async def create_test_result(self, test_result: TestResult) -> TestResult:
         """Создать результат теста"""
         try:
+            # Сводка обновляется в той же транзакции, что и вставка результата
+            if settings.test_stats_use_summary:
+                await self._add_to_summary(test_result.user_id, test_result.score, test_result.passed)
+            
             test_result_model = TestResultModel(
                 user_id=test_result.user_id,
                 score=test_result.score,
@@ -38,9 +49,9 @@ class SQLAlchemyTestRepository(TestRepository):
             # Обновляем ID в entity
             test_result.id = test_result_model.id
             
-            logger.info(f"Test result created: {test_result.id} for user {test_result.user_id}")
+            logger.debug("Test result created: {} for user {}", test_result.id, test_result.user_id)
             return test_result
-            
+        
         except Exception as e:
             logger.error(f"Error creating test result for user {test_result.user_id}: {e}")
             raise
@@ -56,7 +67,7 @@ class SQLAlchemyTestRepository(TestRepository):
             test_result_models = result.scalars().all()
             
             return [self._model_to_entity(model) for model in test_result_models]
-            
+        
         except Exception as e:
             logger.error(f"Error getting user test results for {user_id}: {e}")
             raise
@@ -75,7 +86,7 @@ class SQLAlchemyTestRepository(TestRepository):
             if test_result_model:
                 return self._model_to_entity(test_result_model)
             return None
-            
+        
         except Exception as e:
             logger.error(f"Error getting latest test result for user {user_id}: {e}")
             raise
@@ -91,7 +102,7 @@ class SQLAlchemyTestRepository(TestRepository):
             if test_result_model:
                 return self._model_to_entity(test_result_model)
             return None
-            
+        
         except Exception as e:
             logger.error(f"Error getting test result by id {test_result_id}: {e}")
             raise
@@ -99,6 +110,25 @@ class SQLAlchemyTestRepository(TestRepository):
     async def update_test_result(self, test_result: TestResult) -> TestResult:
         """Обновить результат теста"""
         try:
+            previous = (await self.session.execute(
+                select(TestResultModel.user_id, TestResultModel.score, TestResultModel.passed)
+                .where(TestResultModel.id == test_result.id)
+                .with_for_update()
+            )).one_or_none()
+            
+            # Переносим результат в сводке, если изменились балл или итог
+            if (
+                settings.test_stats_use_summary
+                and previous
+                and (previous.score, previous.passed) != (test_result.score, test_result.passed)
+            ):
+                await self._add_to_summary(
+                    previous.user_id, previous.score, previous.passed, delta=-1, count_first=False
+                )
+                await self._add_to_summary(
+                    previous.user_id, test_result.score, test_result.passed, count_first=False
+                )
+            
             await self.session.execute(
                 update(TestResultModel)
                 .where(TestResultModel.id == test_result.id)
@@ -112,69 +142,216 @@ class SQLAlchemyTestRepository(TestRepository):
                 )
             )
             
-            logger.info(f"Test result updated: {test_result.id}")
+            logger.debug("Test result updated: {}", test_result.id)
             return test_result
-            
+        
         except Exception as e:
             logger.error(f"Error updating test result {test_result.id}: {e}")
             raise
     
-    async def get_test_statistics(self) -> dict:
-        """Получить статистику тестов"""
+    @read_only
+    async def get_test_statistics(self, use_summary: bool = False) -> dict:
+        """
+        Получить статистику тестов
+        
+        Args:
+            use_summary: Читать сводную таблицу test_score_stats (несколько
+                строк) вместо прохода по test_results
+        """
         try:
-            # Общее количество тестов
-            total_tests_result = await self.session.execute(
-                select(func.count(TestResultModel.id))
-            )
-            total_tests = total_tests_result.scalar() or 0
+            if use_summary:
+                return await self._get_summary_statistics()
             
-            # Количество пройденных тестов
-            passed_tests_result = await self.session.execute(
-                select(func.count(TestResultModel.id))
-                .where(TestResultModel.passed == True)
+            # Один проход: ROLLUP дает строку на каждый балл и итоговую строку
+            result = await self.session.execute(
+                select(
+                    TestResultModel.score,
+                    func.grouping(TestResultModel.score).label("is_total"),
+                    func.count().label("tests_count"),
+                    func.count().filter(TestResultModel.passed == True).label("passed_count"),
+                    func.avg(TestResultModel.score).label("avg_score"),
+                    func.count(func.distinct(TestResultModel.user_id)).label("unique_users"),
+                )
+                .group_by(func.rollup(TestResultModel.score))
             )
-            passed_tests = passed_tests_result.scalar() or 0
             
-            # Средний балл
-            avg_score_result = await self.session.execute(
-                select(func.avg(TestResultModel.score))
-            )
-            avg_score = avg_score_result.scalar() or 0
+            total_tests = passed_tests = unique_users = 0
+            avg_score = 0
+            score_distribution = {}
             
-            # Количество уникальных пользователей
-            unique_users_result = await self.session.execute(
-                select(func.count(func.distinct(TestResultModel.user_id)))
-            )
-            unique_users = unique_users_result.scalar() or 0
+            for row in result:
+                if row.is_total:
+                    total_tests = row.tests_count
+                    passed_tests = row.passed_count
+                    avg_score = row.avg_score or 0
+                    unique_users = row.unique_users
+                else:
+                    score_distribution[row.score] = row.tests_count
             
-            # Распределение по баллам
-            score_distribution_result = await self.session.execute(
-                select(
-                    TestResultModel.score,
-                    func.count(TestResultModel.id).label('count')
+            return self._build_statistics(total_tests, passed_tests, avg_score, unique_users, score_distribution)
+        
+        except Exception as e:
+            logger.error(f"Error getting test statistics: {e}")
+            raise
+    
+    async def ensure_test_statistics(self) -> bool:
+        """
+        Пересчитать сводку, если она пуста, а результаты тестов есть
+        
+        На существующей БД test_score_stats появляется пустой, и статистика
+        из сводки показывала бы 0 тестов до ручного /rebuild_test_stats.
+        Сводка блокируется от записи, чтобы при одновременном запуске
+        нескольких процессов пересчет выполнил только один.
+        """
+        try:
+            await self.session.execute(text("LOCK TABLE test_score_stats IN EXCLUSIVE MODE"))
+            
+            summary_exists = await self.session.scalar(select(exists().select_from(TestScoreStatsModel)))
+            if summary_exists:
+                return False
+            
+            results_exist = await self.session.scalar(select(exists().select_from(TestResultModel)))
+            if not results_exist:
+                return False
+            
+            await self.rebuild_test_statistics()
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error ensuring test statistics summary: {e}")
+            raise
+    
+    async def rebuild_test_statistics(self) -> None:
+        """
+        Пересчитать сводную таблицу статистики тестов по test_results
+        
+        Таблица результатов блокируется от записи на время пересчета, чтобы
+        параллельные create_test_result не потеряли свои приращения.
+        """
+        try:
+            await self.session.execute(text("LOCK TABLE test_results IN SHARE MODE"))
+            await self.session.execute(delete(TestScoreStatsModel))
+            
+            ranked = select(
+                TestResultModel.score,
+                TestResultModel.passed,
+                (
+                    func.row_number().over(
+                        partition_by=TestResultModel.user_id,
+                        order_by=TestResultModel.id,
+                    ) == 1
+                ).label("is_first"),
+            ).subquery()
+            
+            now = datetime.utcnow()
+            await self.session.execute(
+                insert(TestScoreStatsModel).from_select(
+                    ["score", "tests_count", "passed_count", "first_tests_count", "created_at", "updated_at"],
+                    select(
+                        ranked.c.score,
+                        func.count(),
+                        func.count().filter(ranked.c.passed == True),
+                        func.count().filter(ranked.c.is_first == True),
+                        literal(now),
+                        literal(now),
+                    )
+                    .group_by(ranked.c.score)
                 )
-                .group_by(TestResultModel.score)
-                .order_by(TestResultModel.score)
             )
-            score_distribution = {
-                row.score: row.count 
-                for row in score_distribution_result
-            }
-            
-            return {
-                "total_tests": total_tests,
-                "passed_tests": passed_tests,
-                "failed_tests": total_tests - passed_tests,
-                "pass_rate": (passed_tests / total_tests * 100) if total_tests > 0 else 0,
-                "avg_score": round(float(avg_score), 2) if avg_score else 0,
-                "unique_users": unique_users,
-                "score_distribution": score_distribution,
-            }
             
+            logger.info("Test statistics summary rebuilt")
+        
         except Exception as e:
-            logger.error(f"Error getting test statistics: {e}")
+            logger.error(f"Error rebuilding test statistics: {e}")
             raise
     
+    # Helper methods
+    async def _get_summary_statistics(self) -> dict:
+        """Статистика тестов из сводной таблицы"""
+        result = await self.session.execute(
+            select(TestScoreStatsModel).order_by(TestScoreStatsModel.score)
+        )
+        
+        total_tests = passed_tests = unique_users = score_sum = 0
+        score_distribution = {}
+        
+        for row in result.scalars():
+            total_tests += row.tests_count
+            passed_tests += row.passed_count
+            unique_users += row.first_tests_count
+            score_sum += row.score * row.tests_count
+            if row.tests_count:
+                score_distribution[row.score] = row.tests_count
+        
+        avg_score = score_sum / total_tests if total_tests > 0 else 0
+        return self._build_statistics(total_tests, passed_tests, avg_score, unique_users, score_distribution)
+    
+    async def _add_to_summary(
+        self,
+        user_id: int,
+        score: int,
+        passed: bool,
+        delta: int = 1,
+        count_first: bool = True,
+    ):
+        """
+        Прибавить результат к сводной таблице (delta=-1 - вычесть)
+        
+        С count_first вызывается до вставки результата: признак первого теста
+        пользователя определяется по отсутствию его предыдущих результатов.
+        Проверка и вставка сериализуются по пользователю advisory-блокировкой
+        до конца транзакции: иначе два одновременных первых результата оба
+        считались бы первыми и завышали unique_users.
+        """
+        first_test = 0
+        if count_first:
+            await self.session.execute(
+                select(func.pg_advisory_xact_lock(self.FIRST_TEST_LOCK_NAMESPACE, user_id))
+            )
+            first_test = case(
+                (exists().where(TestResultModel.user_id == user_id), 0),
+                else_=1,
+            )
+        
+        statement = pg_insert(TestScoreStatsModel).values(
+            score=score,
+            tests_count=delta,
+            passed_count=delta if passed else 0,
+            first_tests_count=first_test,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[TestScoreStatsModel.score],
+                set_={
+                    "tests_count": TestScoreStatsModel.tests_count + statement.excluded.tests_count,
+                    "passed_count": TestScoreStatsModel.passed_count + statement.excluded.passed_count,
+                    "first_tests_count": TestScoreStatsModel.first_tests_count + statement.excluded.first_tests_count,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+        )
+    
+    def _build_statistics(
+        self,
+        total_tests: int,
+        passed_tests: int,
+        avg_score: float,
+        unique_users: int,
+        score_distribution: dict,
+    ) -> dict:
+        """Сборка словаря статистики тестов"""
+        return {
+            "total_tests": total_tests,
+            "passed_tests": passed_tests,
+            "failed_tests": total_tests - passed_tests,
+            "pass_rate": (passed_tests / total_tests * 100) if total_tests > 0 else 0,
+            "avg_score": round(float(avg_score), 2) if avg_score else 0,
+            "unique_users": unique_users,
+            "score_distribution": score_distribution,
+        }
+    
     def _model_to_entity(self, model: TestResultModel) -> TestResult:
         """Преобразование модели в entity"""
         return TestResult(
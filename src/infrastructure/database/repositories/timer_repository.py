@@ -0,0 +1,155 @@
+"""
+Timer repository implementation
+"""
+
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from src.domain.entities.timer import Timer
+from src.domain.repositories.timer_repository import TimerRepository
+from src.infrastructure.database.models.timer import TimerModel
+from src.infrastructure.database.models.user import UserModel
+
+
+class SQLAlchemyTimerRepository(TimerRepository):
+    """Реализация репозитория таймеров через SQLAlchemy"""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def create(self, timer: Timer) -> Optional[Timer]:
+        """Создать таймер (None, если такой таймер у пользователя уже был)"""
+        try:
+            result = await self.session.execute(
+                pg_insert(TimerModel)
+                .values(
+                    user_id=timer.user_id,
+                    timer_type=timer.timer_type,
+                    started_at=timer.started_at,
+                    expires_at=timer.expires_at,
+                    is_triggered=timer.is_triggered,
+                    is_cancelled=timer.is_cancelled,
+                )
+                .on_conflict_do_nothing(index_elements=[TimerModel.user_id, TimerModel.timer_type])
+                .returning(TimerModel.id)
+            )
+            timer_id = result.scalar_one_or_none()
+            
+            if timer_id is None:
+                return None
+            
+            # Обновляем ID в entity
+            timer.id = timer_id
+            
+            logger.debug("Timer created: {} ({}) for user {}", timer.id, timer.timer_type, timer.user_id)
+            return timer
+        
+        except Exception as e:
+            logger.error(f"Error creating timer for user {timer.user_id}: {e}")
+            raise
+    
+    async def get_pending_deadlines(self, until: datetime) -> List[Tuple[int, datetime]]:
+        """Получить (id, expires_at) ожидающих таймеров со сроком до until"""
+        try:
+            result = await self.session.execute(
+                select(TimerModel.id, TimerModel.expires_at)
+                .where(TimerModel.is_triggered == False)
+                .where(TimerModel.is_cancelled == False)
+                .where(TimerModel.expires_at <= until)
+            )
+            return [(row.id, row.expires_at) for row in result]
+        
+        except Exception as e:
+            logger.error(f"Error getting pending timers: {e}")
+            raise
+    
+    async def claim_due(self, now: datetime, limit: int) -> List[Tuple[Timer, int]]:
+        """
+        Захватить истекшие таймеры и отметить их сработавшими: (таймер, telegram_id)
+        
+        Выборка через FOR UPDATE SKIP LOCKED и отметка is_triggered одним
+        UPDATE: одну и ту же пачку не получат две реплики.
+        """
+        try:
+            due = (
+                select(TimerModel.id)
+                .where(TimerModel.is_triggered == False)
+                .where(TimerModel.is_cancelled == False)
+                .where(TimerModel.expires_at <= now)
+                .order_by(TimerModel.expires_at.asc())
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            
+            result = await self.session.execute(
+                update(TimerModel)
+                .where(TimerModel.id.in_(due))
+                .where(UserModel.id == TimerModel.user_id)
+                .values(is_triggered=True)
+                .returning(
+                    TimerModel.id,
+                    TimerModel.user_id,
+                    TimerModel.timer_type,
+                    TimerModel.started_at,
+                    TimerModel.expires_at,
+                    UserModel.telegram_id,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            
+            return [
+                (
+                    Timer(
+                        id=row.id,
+                        user_id=row.user_id,
+                        timer_type=row.timer_type,
+                        started_at=row.started_at,
+                        expires_at=row.expires_at,
+                        is_triggered=True,
+                    ),
+                    row.telegram_id,
+                )
+                for row in result
+            ]
+        
+        except Exception as e:
+            logger.error(f"Error claiming due timers: {e}")
+            raise
+    
+    async def reschedule(self, timer_id: int, expires_at: datetime) -> bool:
+        """Вернуть сработавший таймер в ожидание с новым сроком (если его не отменили)"""
+        try:
+            result = await self.session.execute(
+                update(TimerModel)
+                .where(TimerModel.id == timer_id)
+                .where(TimerModel.is_cancelled == False)
+                .values(is_triggered=False, expires_at=expires_at)
+            )
+            
+            return result.rowcount > 0
+        
+        except Exception as e:
+            logger.error(f"Error rescheduling timer {timer_id}: {e}")
+            raise
+    
+    async def cancel_user_timers(self, user_id: int, timer_type: str) -> int:
+        """Отменить ожидающие таймеры пользователя"""
+        try:
+            result = await self.session.execute(
+                update(TimerModel)
+                .where(TimerModel.user_id == user_id)
+                .where(TimerModel.timer_type == timer_type)
+                .where(TimerModel.is_triggered == False)
+                .where(TimerModel.is_cancelled == False)
+                .values(is_cancelled=True)
+            )
+            
+            return result.rowcount
+        
+        except Exception as e:
+            logger.error(f"Error cancelling timers for user {user_id}: {e}")
+            raise
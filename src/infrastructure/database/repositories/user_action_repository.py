@@ -0,0 +1,61 @@
+"""
+User action repository implementation
+"""
+
+from typing import List
+from sqlalchemy import BigInteger, DateTime, JSON, String, column, exists, insert, select, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from src.domain.entities.user_action import UserAction
+from src.domain.repositories.user_action_repository import UserActionRepository
+from src.infrastructure.database.models.user import UserModel
+from src.infrastructure.database.models.user_action import UserActionModel
+
+
+class SQLAlchemyUserActionRepository(UserActionRepository):
+    """Реализация репозитория действий пользователей через SQLAlchemy"""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def bulk_create(self, actions: List[UserAction]) -> int:
+        """
+        Записать пачку действий одним INSERT ... SELECT FROM (VALUES ...)
+        
+        Действия удаленных пользователей отбрасываются, а не валят всю пачку
+        на внешнем ключе.
+        """
+        if not actions:
+            return 0
+        
+        try:
+            action_values = values(
+                column("user_id", BigInteger),
+                column("action_type", String),
+                column("action_data", JSON),
+                column("created_at", DateTime),
+                name="actions",
+            ).data([
+                (action.user_id, action.action_type, action.action_data, action.created_at)
+                for action in actions
+            ])
+            
+            result = await self.session.execute(
+                insert(UserActionModel).from_select(
+                    ["user_id", "action_type", "action_data", "created_at", "updated_at"],
+                    select(
+                        action_values.c.user_id,
+                        action_values.c.action_type,
+                        action_values.c.action_data,
+                        action_values.c.created_at,
+                        action_values.c.created_at,
+                    ).where(exists().where(UserModel.id == action_values.c.user_id))
+                )
+            )
+            
+            return result.rowcount
+        
+        except Exception as e:
+            logger.error(f"Error writing {len(actions)} user actions: {e}")
+            raise
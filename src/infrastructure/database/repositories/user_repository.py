@@ -2,13 +2,16 @@
 User repository implementation
 """
 
-from typing import Optional, List
-from sqlalchemy import select, update
+from datetime import datetime
+from typing import Optional, List, Dict
+from sqlalchemy import select, update, values, column, exists, or_, BigInteger, DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from src.domain.entities.user import User
 from src.domain.repositories.user_repository import UserRepository
+from src.infrastructure.database.connection import read_only
 from src.infrastructure.database.models.user import UserModel
 from src.domain.exceptions import UserNotFoundException
 
@@ -16,6 +19,12 @@ from src.domain.exceptions import UserNotFoundException
 class SQLAlchemyUserRepository(UserRepository):
     """Реализация репозитория пользователей через SQLAlchemy"""
     
+    # Поля профиля из Telegram, которые обновляет upsert
+    PROFILE_FIELDS = ("username", "first_name", "last_name", "language_code")
+    
+    # Строк в одном INSERT при bulk_upsert (11 параметров на строку)
+    BULK_UPSERT_BATCH_SIZE = 1000
+    
     def __init__(self, session: AsyncSession):
         self.session = session
     
@@ -74,7 +83,7 @@ class SQLAlchemyUserRepository(UserRepository):
             # Обновляем ID в entity
             user.id = user_model.id
             
-            logger.info(f"User created: {user.telegram_id}")
+            logger.debug("User created: {}", user.telegram_id)
             return user
             
         except Exception as e:
@@ -100,13 +109,110 @@ class SQLAlchemyUserRepository(UserRepository):
                 )
             )
             
-            logger.info(f"User updated: {user.telegram_id}")
+            logger.debug("User updated: {}", user.telegram_id)
             return user
             
         except Exception as e:
             logger.error(f"Error updating user {user.telegram_id}: {e}")
             raise
     
+    async def upsert(self, user: User) -> User:
+        """
+        Создать пользователя или обновить профиль по Telegram ID
+        
+        Один запрос: INSERT ... ON CONFLICT (telegram_id) DO UPDATE меняет
+        строку только при изменении профиля, а неизмененную строку тот же
+        запрос возвращает из users. Параллельные обновления одного нового
+        пользователя не падают на уникальности telegram_id.
+        """
+        try:
+            users = UserModel.__table__
+            upserted = self._upsert_statement([user]).returning(*users.c).cte("upserted")
+            
+            result = await self.session.execute(
+                select(upserted).union_all(
+                    select(users)
+                    .where(users.c.telegram_id == user.telegram_id)
+                    .where(~exists(select(upserted.c.id)))
+                )
+            )
+            row = result.first()
+            
+            if row is None:
+                # Строку вставила параллельная транзакция после начала запроса
+                return await self.get_by_telegram_id(user.telegram_id)
+            
+            return self._model_to_entity(row)
+            
+        except Exception as e:
+            logger.error(f"Error upserting user {user.telegram_id}: {e}")
+            raise
+    
+    async def bulk_upsert(self, users: List[User]) -> int:
+        """
+        Создать или обновить пользователей пачкой (для импорта)
+        
+        Returns:
+            Количество вставленных или измененных строк
+        """
+        if not users:
+            return 0
+        
+        try:
+            # Один telegram_id дважды в одном ON CONFLICT DO UPDATE недопустим
+            unique_users = list({user.telegram_id: user for user in users}.values())
+            affected = 0
+            
+            for i in range(0, len(unique_users), self.BULK_UPSERT_BATCH_SIZE):
+                result = await self.session.execute(
+                    self._upsert_statement(unique_users[i:i + self.BULK_UPSERT_BATCH_SIZE])
+                )
+                affected += result.rowcount
+            
+            logger.debug("Users upserted: {} of {}", affected, len(unique_users))
+            return affected
+            
+        except Exception as e:
+            logger.error(f"Error bulk upserting {len(users)} users: {e}")
+            raise
+    
+    async def bulk_update_activity(self, activity: Dict[int, datetime]) -> int:
+        """Обновить время последней активности пачкой (user_id -> время)"""
+        if not activity:
+            return 0
+        
+        try:
+            # UPDATE users ... FROM (VALUES ...) - одна запись на всю пачку.
+            # Строки по возрастанию id - против взаимных блокировок между процессами
+            activity_values = values(
+                column("id", BigInteger),
+                column("last_activity_at", DateTime),
+                name="activity",
+            ).data(sorted(activity.items()))
+            
+            result = await self.session.execute(
+                update(UserModel)
+                .where(UserModel.id == activity_values.c.id)
+                .where(
+                    or_(
+                        UserModel.last_activity_at.is_(None),
+                        UserModel.last_activity_at < activity_values.c.last_activity_at,
+                    )
+                )
+                .values(
+                    last_activity_at=activity_values.c.last_activity_at,
+                    # Активность не меняет профиль, updated_at не трогаем
+                    updated_at=UserModel.updated_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            
+            return result.rowcount
+            
+        except Exception as e:
+            logger.error(f"Error bulk updating activity for {len(activity)} users: {e}")
+            raise
+    
     async def get_admins(self) -> List[User]:
         """Получить список администраторов"""
         try:
@@ -121,6 +227,7 @@ class SQLAlchemyUserRepository(UserRepository):
             logger.error(f"Error getting admins: {e}")
             raise
     
+    @read_only
     async def get_active_users(self, limit: int = 100, offset: int = 0) -> List[User]:
         """Получить активных пользователей"""
         try:
@@ -139,6 +246,7 @@ class SQLAlchemyUserRepository(UserRepository):
             logger.error(f"Error getting active users: {e}")
             raise
     
+    @read_only
     async def get_users_count(self) -> int:
         """Получить количество пользователей"""
         try:
@@ -181,6 +289,40 @@ class SQLAlchemyUserRepository(UserRepository):
             logger.error(f"Error unblocking user {user_id}: {e}")
             raise
     
+    # Helper methods
+    def _upsert_statement(self, users: List[User]):
+        """INSERT ... ON CONFLICT (telegram_id) DO UPDATE только при изменении профиля"""
+        insert_stmt = pg_insert(UserModel).values([
+            {
+                "telegram_id": user.telegram_id,
+                "username": user.username,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "language_code": user.language_code,
+                "is_blocked": user.is_blocked,
+                "is_admin": user.is_admin,
+                "referrer_id": user.referrer_id,
+                "last_activity_at": user.last_activity_at,
+                "created_at": user.created_at,
+                "updated_at": user.updated_at,
+            }
+            for user in users
+        ])
+        excluded = insert_stmt.excluded
+        
+        return insert_stmt.on_conflict_do_update(
+            index_elements=[UserModel.telegram_id],
+            set_={
+                **{field: excluded[field] for field in self.PROFILE_FIELDS},
+                "last_activity_at": excluded.last_activity_at,
+                "updated_at": excluded.updated_at,
+            },
+            where=or_(*(
+                getattr(UserModel, field).is_distinct_from(excluded[field])
+                for field in self.PROFILE_FIELDS
+            )),
+        )
+    
     def _model_to_entity(self, model: UserModel) -> User:
         """Преобразование модели в entity"""
         return User(
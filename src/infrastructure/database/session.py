@@ -2,24 +2,80 @@
 Database session management
 """
 
+import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from contextvars import ContextVar
+from typing import AsyncGenerator, Callable, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.infrastructure.database.connection import db_connection
 from loguru import logger
 
+# Сессия единицы работы текущего обновления и задача, которой она принадлежит.
+# Задачи, запущенные из обработчика, наследуют контекст, но не сессию.
+_current_unit: ContextVar[Optional[Tuple[AsyncSession, asyncio.Task]]] = ContextVar(
+    "db_unit_of_work", default=None
+)
+
+AFTER_COMMIT_KEY = "after_commit"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]):
+    """
+    Выполнить callback после успешного коммита сессии
+    
+    Для обновления кешей: внутри единицы работы коммит происходит только
+    в конце обновления, а при откате callback не вызывается.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+def _run_after_commit(session: AsyncSession):
+    """Вызвать callback'и, накопленные до коммита"""
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"After-commit callback failed: {e}")
+
+
+def _unit_session() -> Optional[AsyncSession]:
+    """Сессия единицы работы, если код выполняется в ее задаче"""
+    unit = _current_unit.get()
+    if unit is not None and unit[1] is asyncio.current_task():
+        return unit[0]
+    return None
+
 
 @asynccontextmanager
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Контекстный менеджер для работы с сессией БД
     Автоматически закрывает сессию и откатывает транзакцию при ошибке
+    
+    Внутри единицы работы (unit_of_work) возвращает ее сессию: коммит
+    выполняется один раз в конце обновления. Если до блока в обновлении
+    уже были запросы, блок выполняется в SAVEPOINT, и его ошибка не
+    откатывает сделанное ранее.
     """
+    unit_session = _unit_session()
+    if unit_session is not None:
+        if unit_session.in_transaction():
+            async with unit_session.begin_nested():
+                yield unit_session
+        else:
+            try:
+                yield unit_session
+            except Exception:
+                await unit_session.rollback()
+                raise
+        return
+    
     session = db_connection.get_session()
     try:
         yield session
         await session.commit()
         logger.debug("Database session committed successfully")
+        _run_after_commit(session)
     except Exception as e:
         await session.rollback()
         logger.error(f"Database session rolled back due to error: {e}")
@@ -29,6 +85,32 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         logger.debug("Database session closed")
 
 
+@asynccontextmanager
+async def unit_of_work() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Единица работы: одна сессия БД на обработку обновления
+    
+    Сессия ленивая: соединение берется из пула при первом запросе, поэтому
+    обновления без обращений к БД его не занимают. Все get_db_session()
+    в этой задаче используют эту сессию, коммит - один, в конце.
+    """
+    session = db_connection.get_session()
+    token = _current_unit.set((session, asyncio.current_task()))
+    try:
+        yield session
+        if session.in_transaction():
+            await session.commit()
+            logger.debug("Unit of work committed")
+        _run_after_commit(session)
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Unit of work rolled back due to error: {e}")
+        raise
+    finally:
+        _current_unit.reset(token)
+        await session.close()
+
+
 async def get_db_session_dependency() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency для FastAPI/aiogram для инъекции сессии БД
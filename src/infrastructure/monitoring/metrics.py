@@ -0,0 +1,135 @@
+"""
+Prometheus метрики
+"""
+
+from typing import Any, Optional, Tuple
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
+from loguru import logger
+
+# Бакеты времени (секунды): от быстрых обработчиков до медленных внешних вызовов
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+handler_duration = Histogram(
+    "bot_handler_duration_seconds",
+    "Update handler execution time",
+    ["router", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+handler_errors = Counter(
+    "bot_handler_errors_total",
+    "Update handlers finished with an exception",
+    ["router", "route"],
+)
+middleware_duration = Histogram(
+    "bot_middleware_duration_seconds",
+    "Time spent in middlewares before the handler",
+    ["event"],
+    buckets=LATENCY_BUCKETS,
+)
+throttled_total = Counter(
+    "bot_throttled_total",
+    "Updates rejected by the rate limiter",
+    ["action"],
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to check out a connection from the database pool",
+    buckets=LATENCY_BUCKETS,
+)
+db_pool_in_use = Gauge(
+    "db_pool_connections_in_use",
+    "Database connections checked out from the pool",
+)
+db_pool_idle = Gauge(
+    "db_pool_connections_idle",
+    "Idle database connections in the pool",
+)
+db_replica_lag = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of the read replica at the last check",
+)
+db_replica_available = Gauge(
+    "db_replica_available",
+    "Whether read-only queries are routed to the replica (1) or the primary (0)",
+)
+bepaid_request_duration = Histogram(
+    "bepaid_request_duration_seconds",
+    "bePaid API call latency",
+    ["method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+analytics_events = Counter(
+    "analytics_events_total",
+    "Analytics events by outcome (written, spilled, dropped)",
+    ["result"],
+)
+orders_expired = Counter(
+    "orders_expired_total",
+    "Pending orders moved to EXPIRED by the sweeper",
+)
+order_sweep_runs = Counter(
+    "order_sweep_runs_total",
+    "Completed expired order sweeps",
+)
+order_sweep_errors = Counter(
+    "order_sweep_errors_total",
+    "Expired order sweeps finished with an exception",
+)
+order_sweep_last_duration = Gauge(
+    "order_sweep_last_duration_seconds",
+    "Duration of the last completed expired order sweep",
+)
+order_sweep_last_run = Gauge(
+    "order_sweep_last_run_timestamp_seconds",
+    "Unix time of the last completed expired order sweep",
+)
+fsm_storage_keys = Gauge(
+    "fsm_storage_keys",
+    "Keys in FSM storage (for Redis - the whole database)",
+)
+
+# Хранилище FSM, размер которого снимается при сборе метрик
+_fsm_storage: Optional[BaseStorage] = None
+
+
+def handler_labels(handler: Any) -> Tuple[str, str]:
+    """
+    Метки (router, route) для метрик обработчика
+    
+    router - модуль обработчика, route - имя функции обработчика. Данные
+    события (callback data можно подделать) в метки не попадают, поэтому
+    число значений ограничено кодом бота.
+    """
+    callback = getattr(handler, "callback", None)
+    if callback is None:
+        return "-", "-"
+    
+    return callback.__module__.rsplit(".", 1)[-1], callback.__name__
+
+
+def track_fsm_storage(storage: BaseStorage):
+    """Зарегистрировать хранилище FSM для метрики fsm_storage_keys"""
+    global _fsm_storage
+    _fsm_storage = storage
+
+
+async def _update_fsm_storage_size():
+    """Обновить размер хранилища FSM"""
+    if _fsm_storage is None:
+        return
+    
+    try:
+        if isinstance(_fsm_storage, MemoryStorage):
+            fsm_storage_keys.set(len(_fsm_storage.storage))
+        elif hasattr(_fsm_storage, "redis"):
+            fsm_storage_keys.set(await _fsm_storage.redis.dbsize())
+    except Exception as e:
+        logger.warning(f"Failed to get FSM storage size: {e}")
+
+
+async def render_metrics() -> bytes:
+    """Метрики в текстовом формате Prometheus"""
+    await _update_fsm_storage_size()
+    return generate_latest()
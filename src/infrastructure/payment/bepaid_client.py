@@ -3,11 +3,17 @@ bePaid API client
 """
 
 import json
+import time
 from typing import Dict, Any, Optional
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, BasicAuth
 from loguru import logger
 
+from src.config.logging import category_logger
 from src.config.settings import settings
+from src.infrastructure.monitoring.metrics import bepaid_request_duration
+
+# Полные payload'ы bePaid пишутся только на уровне DEBUG
+bepaid_logger = category_logger("bepaid")
 
 
 class BePaidClient:
@@ -18,6 +24,42 @@ class BePaidClient:
         self.secret_key = settings.bepaid_secret_key
         self.api_url = settings.bepaid_api_url
         self.webhook_url = f"{settings.webhook_host}/webhook/bepaid"
+        self._session: Optional[ClientSession] = None
+    
+    async def start(self):
+        """Открытие долгоживущей HTTP сессии с пулом соединений"""
+        if self._session and not self._session.closed:
+            return
+        
+        connector = TCPConnector(
+            limit=settings.bepaid_pool_limit,
+            limit_per_host=settings.bepaid_pool_limit,
+            keepalive_timeout=settings.bepaid_keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self._session = ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(
+                total=settings.bepaid_timeout,
+                connect=settings.bepaid_connect_timeout,
+            ),
+            auth=BasicAuth(self.shop_id, self.secret_key),
+            headers={"Content-Type": "application/json"},
+        )
+        logger.info("bePaid client session opened")
+    
+    async def close(self):
+        """Закрытие HTTP сессии"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("bePaid client session closed")
+        self._session = None
+    
+    async def _get_session(self) -> ClientSession:
+        """Получить открытую сессию (открывается при первом обращении)"""
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
     
     async def create_payment(
         self,
@@ -66,25 +108,29 @@ class BePaidClient:
                 if user_phone:
                     payment_data["request"]["customer"]["phone"] = user_phone
             
-            logger.info(f"Creating payment: {payment_data}")
+            bepaid_logger.debug("Creating payment: {}", payment_data)
             
             # Отправка запроса
-            async with ClientSession() as session:
+            session = await self._get_session()
+            status = "error"
+            start_time = time.perf_counter()
+            try:
                 async with session.post(
                     f"{self.api_url}/beyag/payments",
                     json=payment_data,
-                    auth=(self.shop_id, self.secret_key),
-                    headers={"Content-Type": "application/json"}
                 ) as response:
+                    status = str(response.status)
                     
                     if response.status == 201:
                         result = await response.json()
-                        logger.info(f"Payment created successfully: {result}")
+                        bepaid_logger.debug("Payment created successfully: {}", result)
                         return result
                     else:
                         error_text = await response.text()
                         logger.error(f"Failed to create payment: {response.status} - {error_text}")
                         raise Exception(f"bePaid API error: {response.status} - {error_text}")
+            finally:
+                bepaid_request_duration.labels("create_payment", status).observe(time.perf_counter() - start_time)
         
         except Exception as e:
             logger.error(f"Error creating payment: {e}")
@@ -101,20 +147,25 @@ class BePaidClient:
             Статус платежа
         """
         try:
-            async with ClientSession() as session:
+            session = await self._get_session()
+            status = "error"
+            start_time = time.perf_counter()
+            try:
                 async with session.get(
                     f"{self.api_url}/beyag/payments/{transaction_id}",
-                    auth=(self.shop_id, self.secret_key)
                 ) as response:
+                    status = str(response.status)
                     
                     if response.status == 200:
                         result = await response.json()
-                        logger.info(f"Payment status: {result}")
+                        bepaid_logger.debug("Payment status: {}", result)
                         return result
                     else:
                         error_text = await response.text()
                         logger.error(f"Failed to get payment status: {response.status} - {error_text}")
                         raise Exception(f"bePaid API error: {response.status} - {error_text}")
+            finally:
+                bepaid_request_duration.labels("get_payment_status", status).observe(time.perf_counter() - start_time)
         
         except Exception as e:
             logger.error(f"Error getting payment status: {e}")
@@ -0,0 +1,169 @@
+"""
+Локальный fake-сервер bePaid для разработки и нагрузочных прогонов
+
+Эмулирует эндпоинты, которые использует BePaidClient:
+- POST /beyag/payments - создание платежа (checkout)
+- GET /beyag/payments/{token} - статус платежа
+- GET /checkout/{token}?status=successful|failed - "оплата" по redirect_url,
+  после которой на notification_url отправляется webhook
+  (подписывается HMAC-SHA256, если задан --secret)
+
+Запуск:
+    python -m src.infrastructure.payment.fake_server --port 8090
+и BEPAID_API_URL=http://localhost:8090 в .env
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import uuid
+from typing import Dict, Any, Optional
+from aiohttp import web, ClientSession, ClientTimeout
+from loguru import logger
+
+
+class FakeBePaidServer:
+    """Fake-сервер bePaid на aiohttp"""
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8090,
+        latency: float = 0.0,
+        secret: Optional[str] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.secret = secret
+        self.payments: Dict[str, Dict[str, Any]] = {}
+        self.app = web.Application()
+        self._setup_routes()
+    
+    def _setup_routes(self):
+        """Настройка маршрутов"""
+        self.app.router.add_post("/beyag/payments", self.handle_create_payment)
+        self.app.router.add_get("/beyag/payments/{token}", self.handle_get_payment)
+        self.app.router.add_get("/checkout/{token}", self.handle_checkout)
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+    
+    async def _delay(self):
+        """Искусственная задержка ответа"""
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+    
+    async def handle_create_payment(self, request: web.Request) -> web.Response:
+        """Создание платежа"""
+        await self._delay()
+        
+        if request.headers.get("Authorization") is None:
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        
+        data = await request.json()
+        payment_request = data.get("request", {})
+        token = uuid.uuid4().hex
+        
+        self.payments[token] = {
+            "uid": token,
+            "status": "pending",
+            "amount": payment_request.get("amount"),
+            "currency": payment_request.get("currency"),
+            "description": payment_request.get("description"),
+            "tracking_id": payment_request.get("tracking_id"),
+            "notification_url": payment_request.get("notification_url"),
+            "payment_method": "credit_card",
+            "test": True,
+        }
+        
+        return web.json_response(
+            {
+                "checkout": {
+                    "token": token,
+                    "redirect_url": f"{self.base_url}/checkout/{token}",
+                }
+            },
+            status=201,
+        )
+    
+    async def handle_get_payment(self, request: web.Request) -> web.Response:
+        """Статус платежа"""
+        await self._delay()
+        
+        payment = self.payments.get(request.match_info["token"])
+        if not payment:
+            return web.json_response({"message": "Not found"}, status=404)
+        
+        transaction = {k: v for k, v in payment.items() if k != "notification_url"}
+        return web.json_response({"transaction": transaction})
+    
+    async def handle_checkout(self, request: web.Request) -> web.Response:
+        """Оплата по redirect_url с отправкой webhook"""
+        token = request.match_info["token"]
+        payment = self.payments.get(token)
+        if not payment:
+            return web.Response(status=404, text="Payment not found")
+        
+        status = request.query.get("status", "successful")
+        if status not in ("successful", "failed"):
+            return web.Response(status=400, text="Unknown status")
+        
+        payment["status"] = status
+        await self._send_notification(payment)
+        
+        return web.Response(text=f"Payment {token}: {status}")
+    
+    async def _send_notification(self, payment: Dict[str, Any]):
+        """Отправка webhook в бота"""
+        notification_url: Optional[str] = payment.get("notification_url")
+        if not notification_url:
+            return
+        
+        event = {
+            "event_type": f"payment_{payment['status']}",
+            "transaction_id": payment["uid"],
+            "transaction": {k: v for k, v in payment.items() if k != "notification_url"},
+        }
+        
+        body = json.dumps(event).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers["Content-Signature"] = hmac.new(
+                self.secret.encode(), body, hashlib.sha256
+            ).hexdigest()
+        
+        try:
+            async with ClientSession(timeout=ClientTimeout(total=10)) as session:
+                async with session.post(notification_url, data=body, headers=headers) as response:
+                    logger.info(f"Notification sent to {notification_url}: {response.status}")
+        except Exception as e:
+            logger.error(f"Error sending notification: {e}")
+    
+    def run(self):
+        """Запуск сервера"""
+        logger.info(f"Fake bePaid server started on {self.base_url}")
+        web.run_app(self.app, host=self.host, port=self.port, print=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake bePaid server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа, секунды")
+    parser.add_argument("--secret", default=None, help="BEPAID_WEBHOOK_SECRET для подписи webhook")
+    args = parser.parse_args()
+    
+    FakeBePaidServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        secret=args.secret,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Background job queues backed by PostgreSQL
+"""
@@ -0,0 +1,220 @@
+"""
+Очередь доставки файлов после оплаты
+"""
+
+import asyncio
+from typing import List, Optional, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from loguru import logger
+
+from src.config.settings import settings
+from src.domain.entities.payment import Product, UserProduct
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
+from src.infrastructure.database.repositories.user_repository import SQLAlchemyUserRepository
+
+
+class DeliveryWorker:
+    """
+    Воркеры доставки оплаченных продуктов
+    
+    Очередью служат строки user_products с file_delivered = false: покупка
+    создается в той же транзакции, что и оплата заказа, поэтому webhook ничего
+    не отправляет в Telegram сам. Воркеры захватывают строки через
+    SELECT ... FOR UPDATE SKIP LOCKED, счетчик delivery_attempts и
+    last_delivery_attempt задают экспоненциальную задержку повторов.
+    Покупки, исчерпавшие попытки, остаются недоставленными (dead letter),
+    о них сообщается админам.
+    """
+    
+    def __init__(
+        self,
+        workers: int,
+        poll_interval: float,
+        max_attempts: int,
+        retry_base_delay: int,
+        batch_size: int = 10,
+    ):
+        """
+        Args:
+            workers: Количество параллельных воркеров
+            poll_interval: Интервал опроса очереди в секундах
+            max_attempts: Максимальное количество попыток доставки
+            retry_base_delay: Базовая задержка повтора в секундах
+            batch_size: Количество покупок, захватываемых за раз
+        """
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.batch_size = batch_size
+        self._bot: Optional[Bot] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+    
+    def start(self, bot: Bot):
+        """Запуск воркеров"""
+        if self._tasks:
+            return
+        
+        self._bot = bot
+        self._tasks = [
+            asyncio.create_task(self._run()) for _ in range(self.workers)
+        ]
+        logger.info(f"Delivery worker started: {self.workers} workers")
+    
+    async def stop(self):
+        """Остановка воркеров"""
+        for task in self._tasks:
+            task.cancel()
+        
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        
+        self._tasks = []
+    
+    @property
+    def bot(self) -> Bot:
+        """Бот, переданный в start()"""
+        if self._bot is None:
+            raise RuntimeError("Delivery worker not started. Call start() first.")
+        return self._bot
+    
+    def notify(self):
+        """Разбудить воркеры, не дожидаясь очередного опроса"""
+        self._wakeup.set()
+    
+    async def process_batch(self) -> int:
+        """Захватить и доставить очередную пачку покупок"""
+        async with get_db_session() as session:
+            payment_repository = SQLAlchemyPaymentRepository(session)
+            user_repository = SQLAlchemyUserRepository(session)
+            
+            claimed = await payment_repository.claim_pending_deliveries(
+                limit=self.batch_size,
+                max_attempts=self.max_attempts,
+                retry_base_delay=self.retry_base_delay,
+            )
+            
+            jobs: List[Tuple[UserProduct, Optional[int], Optional[Product]]] = []
+            for user_product in claimed:
+                user = await user_repository.get_by_id(user_product.user_id)
+                product = await payment_repository.get_product_by_id(user_product.product_id)
+                jobs.append((user_product, user.telegram_id if user else None, product))
+        
+        # Попытка уже засчитана и закоммичена, блокировки на время отправки не держим
+        for user_product, telegram_id, product in jobs:
+            await self._process(user_product, telegram_id, product)
+        
+        return len(jobs)
+    
+    async def _process(
+        self,
+        user_product: UserProduct,
+        telegram_id: Optional[int],
+        product: Optional[Product],
+    ):
+        """Доставка одной покупки"""
+        if telegram_id is None or product is None:
+            await self._abandon(user_product, "user or product not found")
+            return
+        
+        try:
+            await self._send_product(telegram_id, product)
+        
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Повтор не поможет: бот заблокирован или чат недоступен
+            await self._abandon(user_product, str(e))
+            return
+        
+        except Exception as e:
+            if user_product.delivery_attempts >= self.max_attempts:
+                logger.error(
+                    f"Delivery failed permanently: user_product_id={user_product.id}, "
+                    f"attempts={user_product.delivery_attempts}: {e}"
+                )
+                await self._notify_admins(
+                    f"⚠️ Не удалось доставить {product.name} пользователю {telegram_id}: {e}"
+                )
+            else:
+                logger.warning(
+                    f"Delivery failed, will retry: user_product_id={user_product.id}, "
+                    f"attempt={user_product.delivery_attempts}: {e}"
+                )
+            return
+        
+        async with get_db_session() as session:
+            await SQLAlchemyPaymentRepository(session).mark_as_delivered(user_product.id)
+        
+        logger.info(f"Product delivered: user_product_id={user_product.id}, user={telegram_id}")
+        
+        await self._notify_admins(
+            f"💰 Новая оплата\n\n"
+            f"Продукт: {product.name}\n"
+            f"Пользователь: {telegram_id}"
+        )
+    
+    async def _send_product(self, telegram_id: int, product: Product):
+        """Отправка файла продукта пользователю"""
+        caption = f"✅ {product.name} - Спасибо за покупку!"
+        
+        if not product.file_id:
+            await self.bot.send_message(telegram_id, caption)
+        elif product.file_type == "video":
+            await self.bot.send_video(telegram_id, product.file_id, caption=caption)
+        elif product.file_type == "photo":
+            await self.bot.send_photo(telegram_id, product.file_id, caption=caption)
+        else:
+            await self.bot.send_document(telegram_id, product.file_id, caption=caption)
+    
+    async def _abandon(self, user_product: UserProduct, reason: str):
+        """Перевести покупку в dead letter"""
+        async with get_db_session() as session:
+            await SQLAlchemyPaymentRepository(session).abandon_delivery(
+                user_product.id, self.max_attempts
+            )
+        
+        logger.error(f"Delivery abandoned: user_product_id={user_product.id}: {reason}")
+        await self._notify_admins(
+            f"⚠️ Доставка покупки #{user_product.id} прекращена: {reason}"
+        )
+    
+    async def _notify_admins(self, text: str):
+        """Уведомление админов (ошибки не прерывают доставку)"""
+        for admin_id in settings.admin_telegram_ids:
+            try:
+                await self.bot.send_message(admin_id, text)
+            except Exception as e:
+                logger.warning(f"Failed to notify admin {admin_id}: {e}")
+    
+    async def _run(self):
+        """Цикл воркера"""
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"Delivery batch failed: {e}")
+                processed = 0
+            
+            # Пока очередь не пуста, забираем следующую пачку сразу
+            if processed:
+                continue
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+# Глобальный экземпляр
+delivery_worker = DeliveryWorker(
+    workers=settings.delivery_workers,
+    poll_interval=settings.delivery_poll_interval,
+    max_attempts=settings.delivery_max_attempts,
+    retry_base_delay=settings.delivery_retry_base_delay,
+)
@@ -0,0 +1,98 @@
+"""
+Очистка просроченных заказов
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+from loguru import logger
+
+from src.config.settings import settings
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
+from src.infrastructure.monitoring.metrics import (
+    order_sweep_errors,
+    order_sweep_last_duration,
+    order_sweep_last_run,
+    order_sweep_runs,
+    orders_expired,
+)
+
+
+class OrderSweeper:
+    """
+    Периодический перевод просроченных заказов в EXPIRED
+    
+    Заказы переводятся set-based UPDATE'ами пачками по batch_size, каждая
+    пачка - отдельная короткая транзакция. Так множество PENDING остается
+    маленьким, и выборки по нему (статус оплаты, экраны админки) не
+    деградируют со временем. Счетчики проходов экспортируются в /metrics.
+    """
+    
+    def __init__(self, interval: float, batch_size: int):
+        """
+        Args:
+            interval: Интервал между проходами в секундах
+            batch_size: Максимальное количество заказов в одном UPDATE
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Запуск периодической очистки"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Order sweeper started")
+    
+    async def stop(self):
+        """Остановка очистки"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def sweep(self) -> int:
+        """Перевести в EXPIRED все просроченные заказы"""
+        started = asyncio.get_running_loop().time()
+        now = datetime.utcnow()
+        expired = 0
+        
+        while True:
+            async with get_db_session() as session:
+                count = await SQLAlchemyPaymentRepository(session).expire_pending_orders(now, self.batch_size)
+            
+            expired += count
+            orders_expired.inc(count)
+            if count < self.batch_size:
+                break
+        
+        duration = asyncio.get_running_loop().time() - started
+        order_sweep_runs.inc()
+        order_sweep_last_duration.set(duration)
+        order_sweep_last_run.set_to_current_time()
+        
+        if expired:
+            logger.info(f"Orders expired: {expired} in {duration:.3f}s")
+        return expired
+    
+    async def _run(self):
+        """Цикл очистки"""
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                order_sweep_errors.inc()
+                logger.error(f"Error sweeping expired orders: {e}")
+            
+            await asyncio.sleep(self.interval)
+
+
+# Глобальный экземпляр
+order_sweeper = OrderSweeper(
+    interval=settings.order_sweep_interval,
+    batch_size=settings.order_sweep_batch_size,
+)
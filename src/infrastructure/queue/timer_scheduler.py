@@ -0,0 +1,269 @@
+"""
+Планировщик таймеров офферов
+"""
+
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from loguru import logger
+
+from src.config.settings import settings
+from src.domain.entities.timer import Timer
+from src.domain.repositories.timer_repository import TimerRepository
+from src.infrastructure.cache.product_catalog import product_catalog
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
+from src.infrastructure.database.repositories.timer_repository import SQLAlchemyTimerRepository
+from src.infrastructure.telegram.rate_limit import bulk_send_limiter
+from src.presentation.keyboards.inline import offer_keyboard
+from src.utils.helpers import format_price_kopecks
+from src.utils.rate_limiter import TokenBucket
+
+# Купленный продукт -> предлагаемый по таймеру продукт (он же timer_type)
+OFFER_CHAINS: Dict[str, str] = {
+    "tripwire_1byn": "tripwire_99byn",
+}
+
+
+class TimerScheduler:
+    """
+    Срабатывание таймеров офферов
+    
+    Ближайшие сроки держатся в min-heap по expires_at, цикл спит до ближайшего
+    из них. При срабатывании истекшие таймеры захватываются пачками
+    (FOR UPDATE SKIP LOCKED + отметка is_triggered одним UPDATE), поэтому
+    реплики не отправляют один оффер дважды. Heap содержит только окно
+    ближайших сроков и раз в resync_interval перечитывается из БД - так
+    подхватываются таймеры, созданные другими репликами.
+    
+    Временная ошибка отправки возвращает таймер в ожидание со сроком через
+    RETRY_DELAY. Таймер отмечен сработавшим до отправки, поэтому при
+    падении процесса между захватом и отправкой оффер теряется: доставка
+    не более одного раза.
+    """
+    
+    RETRY_DELAY = timedelta(minutes=5)
+    
+    def __init__(self, resync_interval: float, batch_size: int, bucket: TokenBucket):
+        """
+        Args:
+            resync_interval: Интервал перечитывания сроков из БД в секундах
+            batch_size: Количество таймеров, захватываемых за раз
+            bucket: Ограничитель скорости отправки
+        """
+        self.resync_interval = resync_interval
+        self.batch_size = batch_size
+        self._bucket = bucket
+        self._heap: List[Tuple[datetime, int]] = []
+        self._scheduled: Set[int] = set()
+        self._next_resync = datetime.min
+        self._bot: Optional[Bot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+    
+    def start(self, bot: Bot):
+        """Запуск планировщика (сроки загружаются в первой итерации)"""
+        if self._task is None:
+            self._bot = bot
+            self._task = asyncio.create_task(self._run())
+            logger.info("Timer scheduler started")
+    
+    @property
+    def bot(self) -> Bot:
+        """Бот, переданный в start()"""
+        if self._bot is None:
+            raise RuntimeError("Timer scheduler not started. Call start() first.")
+        return self._bot
+    
+    async def stop(self):
+        """Остановка планировщика"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def create_offer(
+        self,
+        timer_repository: TimerRepository,
+        user_id: int,
+        product_slug: str,
+    ) -> Optional[Timer]:
+        """
+        Создать таймер оффера после покупки продукта
+        
+        Вызывается в транзакции оплаты; после коммита таймер нужно передать
+        в schedule().
+        """
+        offer_slug = OFFER_CHAINS.get(product_slug)
+        if not offer_slug:
+            return None
+        
+        return await timer_repository.create(
+            Timer(
+                id=0,
+                user_id=user_id,
+                timer_type=offer_slug,
+                expires_at=datetime.utcnow() + timedelta(hours=settings.tripwire_offer_delay_hours),
+            )
+        )
+    
+    def schedule(self, timer: Timer):
+        """Добавить таймер в heap, если он попадает в текущее окно"""
+        if timer.id in self._scheduled or timer.expires_at > self._window_end():
+            return
+        
+        self._push(timer.id, timer.expires_at)
+        if self._heap[0][1] == timer.id:
+            # Новый ближайший срок - будим цикл
+            self._wakeup.set()
+    
+    def _window_end(self) -> datetime:
+        """Граница окна сроков, которые держатся в heap"""
+        return self._next_resync + timedelta(seconds=self.resync_interval)
+    
+    def _push(self, timer_id: int, expires_at: datetime):
+        """Положить срок в heap"""
+        heapq.heappush(self._heap, (expires_at, timer_id))
+        self._scheduled.add(timer_id)
+    
+    async def _resync(self):
+        """Перечитать сроки ожидающих таймеров из БД"""
+        self._next_resync = datetime.utcnow() + timedelta(seconds=self.resync_interval)
+        
+        async with get_db_session() as session:
+            deadlines = await SQLAlchemyTimerRepository(session).get_pending_deadlines(self._window_end())
+        
+        for timer_id, expires_at in deadlines:
+            if timer_id not in self._scheduled:
+                self._push(timer_id, expires_at)
+        
+        logger.debug(f"Timer scheduler resynced: {len(self._heap)} timers in window")
+    
+    async def fire_due(self) -> int:
+        """Захватить и отработать все истекшие таймеры"""
+        fired = 0
+        
+        while True:
+            async with get_db_session() as session:
+                timer_repository = SQLAlchemyTimerRepository(session)
+                payment_repository = SQLAlchemyPaymentRepository(session)
+                
+                claimed = await timer_repository.claim_due(datetime.utcnow(), self.batch_size)
+                
+                # Оффер не нужен, если продукт уже куплен
+                offers = []
+                for timer, telegram_id in claimed:
+                    if timer.timer_type not in await payment_repository.get_user_entitlements(timer.user_id):
+                        offers.append((timer, telegram_id))
+            
+            done: List[bool] = await asyncio.gather(
+                *(self._send_offer(timer, telegram_id) for timer, telegram_id in offers)
+            )
+            
+            failed = [timer for (timer, _), ok in zip(offers, done) if not ok]
+            if failed:
+                await self._retry_later(failed)
+            
+            fired += len(offers) - len(failed)
+            
+            if len(claimed) < self.batch_size:
+                return fired
+    
+    async def _retry_later(self, timers: List[Timer]):
+        """Вернуть таймеры, оффер по которым не удалось отправить, в ожидание"""
+        retry_at = datetime.utcnow() + self.RETRY_DELAY
+        
+        async with get_db_session() as session:
+            timer_repository = SQLAlchemyTimerRepository(session)
+            for timer in timers:
+                await timer_repository.reschedule(timer.id, retry_at)
+        
+        for timer in timers:
+            timer.expires_at = retry_at
+            timer.is_triggered = False
+            self.schedule(timer)
+    
+    async def _send_offer(self, timer: Timer, telegram_id: int) -> bool:
+        """
+        Отправка оффера пользователю
+        
+        Returns:
+            False, если отправку стоит повторить позже
+        """
+        product = product_catalog.get_by_slug(timer.timer_type)
+        if not product or not product.is_available():
+            logger.warning(f"Offer product {timer.timer_type} is not available, timer {timer.id} skipped")
+            return True
+        
+        await self._bucket.acquire()
+        
+        try:
+            await self.bot.send_message(
+                telegram_id,
+                f"⏰ Специальное предложение!\n\n"
+                f"{product.name}\n"
+                f"{product.description}\n\n"
+                f"Стоимость: {format_price_kopecks(product.price_kopecks)}",
+                reply_markup=offer_keyboard(product.slug, product.name),
+            )
+            logger.info(f"Offer {timer.timer_type} sent to user {telegram_id}")
+            return True
+        
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Повтор не поможет: бот заблокирован или чат недоступен
+            logger.warning(f"Offer {timer.timer_type} dropped for user {telegram_id}: {e}")
+            return True
+        
+        except Exception as e:
+            logger.warning(f"Failed to send offer {timer.timer_type} to user {telegram_id}, will retry: {e}")
+            return False
+    
+    async def _run(self):
+        """Цикл планировщика"""
+        while True:
+            try:
+                now = datetime.utcnow()
+                
+                if now >= self._next_resync:
+                    await self._resync()
+                
+                if self._heap and self._heap[0][0] <= now:
+                    # Снимаем все наступившие сроки и срабатываем одной серией пачек
+                    while self._heap and self._heap[0][0] <= now:
+                        _, timer_id = heapq.heappop(self._heap)
+                        self._scheduled.discard(timer_id)
+                    
+                    fired = await self.fire_due()
+                    if fired:
+                        logger.info(f"Timer offers sent: {fired}")
+                    continue
+                
+                wake_at = min(self._heap[0][0], self._next_resync) if self._heap else self._next_resync
+                timeout = max((wake_at - now).total_seconds(), 0)
+                
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            
+            except asyncio.CancelledError:
+                raise
+            
+            except Exception as e:
+                logger.error(f"Timer scheduler error: {e}")
+                await asyncio.sleep(5)
+
+
+# Глобальный экземпляр
+timer_scheduler = TimerScheduler(
+    resync_interval=settings.timer_resync_interval,
+    batch_size=settings.timer_batch_size,
+    bucket=bulk_send_limiter,
+)
@@ -5,38 +5,51 @@ Bot instance creation
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from src.config.settings import settings
+from src.infrastructure.monitoring.metrics import track_fsm_storage
+from src.infrastructure.telegram.session import CachedMarkupSession
+from src.infrastructure.telegram.storage import create_fsm_storage
 from src.presentation.middlewares.logging import LoggingMiddleware
 from src.presentation.middlewares.auth import AuthMiddleware
 from src.presentation.middlewares.throttling import ThrottlingMiddleware
 from src.presentation.middlewares.error_handler import ErrorHandlerMiddleware
+from src.presentation.middlewares.unit_of_work import UnitOfWorkMiddleware
 from src.presentation.handlers import start, menu, payment, test, faq, admin, post_payment
 
+# Типы обновлений, которые обрабатывает бот (polling и webhook)
+ALLOWED_UPDATES = ["message", "callback_query"]
+
 
 def create_bot() -> Bot:
     """Создание экземпляра бота"""
     return Bot(
         token=settings.bot_token,
+        session=CachedMarkupSession(),
         default=DefaultBotProperties(
             parse_mode=ParseMode.HTML,
-            disable_web_page_preview=True,
+            link_preview_is_disabled=True,
         )
     )
 
 
 def create_dispatcher() -> Dispatcher:
     """Создание диспетчера"""
-    storage = MemoryStorage()
+    storage = create_fsm_storage()
+    track_fsm_storage(storage)
     dp = Dispatcher(storage=storage)
     
     # Регистрация middleware (порядок важен!)
     dp.message.middleware(ErrorHandlerMiddleware())
     dp.callback_query.middleware(ErrorHandlerMiddleware())
     
-    dp.message.middleware(ThrottlingMiddleware())
-    dp.callback_query.middleware(ThrottlingMiddleware())
+    # Один ограничитель на сообщения и callback'и: лимиты общие
+    throttling = ThrottlingMiddleware()
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+    
+    dp.message.middleware(UnitOfWorkMiddleware())
+    dp.callback_query.middleware(UnitOfWorkMiddleware())
     
     dp.message.middleware(AuthMiddleware())
     dp.callback_query.middleware(AuthMiddleware())
@@ -0,0 +1,234 @@
+"""
+Движок рассылок
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from loguru import logger
+from sqlalchemy import func, select
+
+from src.config.settings import settings
+from src.domain.entities.broadcast import Broadcast, BroadcastStatus
+from src.infrastructure.database.connection import db_connection
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.broadcast_repository import SQLAlchemyBroadcastRepository
+from src.infrastructure.telegram.rate_limit import bulk_send_limiter
+from src.utils.rate_limiter import TokenBucket
+
+
+class Broadcaster:
+    """
+    Рассылка сообщений с ограничением скорости
+    
+    Получатели читаются страницами (keyset по users.id), отправка идет через
+    общий token bucket, чтобы не превышать глобальный лимит Telegram
+    (~30 сообщений/с). Каждый получатель получает одно сообщение, поэтому
+    лимит на чат (1 сообщение/с) соблюдается сам собой. После каждой страницы
+    курсор и счетчики sent_count/failed_count сохраняются в БД: прерванная
+    рассылка продолжается с последней сохраненной страницы.
+    
+    Рассылку выполняет только процесс, взявший ее advisory-блокировку:
+    незавершенные рассылки продолжают все запущенные процессы, но
+    отправляет один.
+    """
+    
+    MAX_SEND_ATTEMPTS = 3
+    # Пространство ключей advisory-блокировки рассылки
+    RUN_LOCK_NAMESPACE = 7302
+    
+    def __init__(self, bucket: TokenBucket, page_size: int):
+        """
+        Args:
+            bucket: Ограничитель скорости отправки
+            page_size: Получателей на страницу (и на один чекпоинт)
+        """
+        self.page_size = page_size
+        self._bucket = bucket
+        self._bot: Optional[Bot] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+    
+    async def start(self, bot: Bot):
+        """Запуск и продолжение прерванных рассылок"""
+        self._bot = bot
+        
+        try:
+            async with get_db_session() as session:
+                broadcasts = await SQLAlchemyBroadcastRepository(session).get_by_status(
+                    BroadcastStatus.IN_PROGRESS
+                )
+        except Exception as e:
+            logger.error(f"Failed to load unfinished broadcasts: {e}")
+            return
+        
+        for broadcast in broadcasts:
+            logger.info(f"Resuming broadcast {broadcast.id} after user {broadcast.last_user_id}")
+            self.launch(broadcast.id)
+    
+    async def stop(self):
+        """Остановка рассылок (продолжатся при следующем запуске)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        
+        self._tasks.clear()
+    
+    def launch(self, broadcast_id: int):
+        """Запустить рассылку в фоне"""
+        if broadcast_id in self._tasks:
+            return
+        
+        task = asyncio.create_task(self._run(broadcast_id))
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+    
+    def is_running(self, broadcast_id: int) -> bool:
+        """Выполняется ли рассылка в этом процессе"""
+        return broadcast_id in self._tasks
+    
+    @asynccontextmanager
+    async def _run_lock(self, broadcast_id: int) -> AsyncIterator[bool]:
+        """
+        Исключительное право на выполнение рассылки
+        
+        Сессионная advisory-блокировка держится на отдельном соединении с
+        основной БД, пока идет рассылка. Транзакцию соединение не держит,
+        а если оно оборвется, блокировку снимет сервер.
+        """
+        lock_key = (self.RUN_LOCK_NAMESPACE, broadcast_id)
+        async with db_connection.engine.connect() as conn:
+            locked = bool(await conn.scalar(select(func.pg_try_advisory_lock(*lock_key))))
+            await conn.commit()
+            try:
+                yield locked
+            finally:
+                if locked:
+                    try:
+                        await conn.execute(select(func.pg_advisory_unlock(*lock_key)))
+                        await conn.commit()
+                    except Exception as e:
+                        # Закрытое соединение не вернет блокировку в пул
+                        logger.warning(f"Failed to unlock broadcast {broadcast_id}: {e}")
+                        await conn.invalidate()
+    
+    async def _run(self, broadcast_id: int):
+        """Выполнение рассылки"""
+        try:
+            async with self._run_lock(broadcast_id) as locked:
+                if not locked:
+                    logger.info(f"Broadcast {broadcast_id} is running in another process")
+                    return
+                await self._send_all(broadcast_id)
+        
+        except asyncio.CancelledError:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Broadcast {broadcast_id} failed: {e}")
+    
+    async def _send_all(self, broadcast_id: int):
+        """Отправка рассылки со следующей после курсора страницы"""
+        async with get_db_session() as session:
+            broadcast_repository = SQLAlchemyBroadcastRepository(session)
+            broadcast = await broadcast_repository.get_by_id(broadcast_id)
+            if not broadcast or broadcast.is_finished:
+                return
+            started = await broadcast_repository.update_status(
+                broadcast_id,
+                BroadcastStatus.IN_PROGRESS,
+                from_statuses=(BroadcastStatus.DRAFT, BroadcastStatus.IN_PROGRESS),
+            )
+            if not started:
+                return
+        
+        logger.info(f"Broadcast {broadcast_id} started")
+        
+        cursor = broadcast.last_user_id
+        progress: Optional[Tuple[int, int, int]] = None
+        
+        while True:
+            # Чекпоинт предыдущей страницы, проверка отмены и следующая страница
+            async with get_db_session() as session:
+                broadcast_repository = SQLAlchemyBroadcastRepository(session)
+                
+                if progress:
+                    await broadcast_repository.save_progress(broadcast_id, *progress)
+                
+                current = await broadcast_repository.get_by_id(broadcast_id)
+                if current.status == BroadcastStatus.CANCELLED:
+                    logger.info(f"Broadcast {broadcast_id} cancelled")
+                    return
+                
+                page = await broadcast_repository.get_recipients_page(
+                    broadcast.target_filter, cursor, self.page_size
+                )
+                
+                if not page:
+                    await broadcast_repository.update_status(
+                        broadcast_id,
+                        BroadcastStatus.COMPLETED,
+                        from_statuses=(BroadcastStatus.IN_PROGRESS,),
+                    )
+                    logger.info(
+                        f"Broadcast {broadcast_id} completed: "
+                        f"sent={current.sent_count}, failed={current.failed_count}"
+                    )
+                    return
+            
+            results: List[bool] = await asyncio.gather(
+                *(self._send(broadcast, telegram_id) for _, telegram_id in page)
+            )
+            
+            cursor = page[-1][0]
+            sent = sum(results)
+            progress = (cursor, sent, len(results) - sent)
+    
+    async def _send(self, broadcast: Broadcast, telegram_id: int) -> bool:
+        """Отправка сообщения одному получателю"""
+        for _ in range(self.MAX_SEND_ATTEMPTS):
+            await self._bucket.acquire()
+            
+            try:
+                await self._send_message(broadcast, telegram_id)
+                return True
+            
+            except TelegramRetryAfter as e:
+                # Флуд-контроль: притормаживаем всю рассылку
+                logger.warning(f"Broadcast {broadcast.id} rate limited, retry after {e.retry_after}s")
+                self._bucket.pause(e.retry_after)
+            
+            except (TelegramForbiddenError, TelegramBadRequest):
+                # Бот заблокирован пользователем или чат недоступен
+                return False
+            
+            except Exception as e:
+                logger.warning(f"Broadcast {broadcast.id} failed for {telegram_id}: {e}")
+                return False
+        
+        return False
+    
+    async def _send_message(self, broadcast: Broadcast, telegram_id: int):
+        """Отправка сообщения с учетом типа медиа"""
+        if not broadcast.media_file_id:
+            await self._bot.send_message(telegram_id, broadcast.message_text)
+        elif broadcast.media_type == "photo":
+            await self._bot.send_photo(telegram_id, broadcast.media_file_id, caption=broadcast.message_text)
+        elif broadcast.media_type == "video":
+            await self._bot.send_video(telegram_id, broadcast.media_file_id, caption=broadcast.message_text)
+        else:
+            await self._bot.send_document(telegram_id, broadcast.media_file_id, caption=broadcast.message_text)
+
+
+# Глобальный экземпляр
+broadcaster = Broadcaster(
+    bucket=bulk_send_limiter,
+    page_size=settings.broadcast_page_size,
+)
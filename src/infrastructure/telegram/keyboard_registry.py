@@ -0,0 +1,111 @@
+"""
+Реестр готовых клавиатур
+"""
+
+import inspect
+import json
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from pydantic import ConfigDict, field_serializer
+
+F = TypeVar("F", bound=Callable[..., InlineKeyboardMarkup])
+
+
+class FrozenInlineKeyboardButton(InlineKeyboardButton):
+    """Кнопка, которую нельзя изменить после создания"""
+    
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    """
+    Клавиатура, которую нельзя изменить после создания
+    
+    Ряды хранятся кортежами, присваивание полей запрещено. Для Telegram и
+    сессии aiogram сериализуется так же, как обычная InlineKeyboardMarkup.
+    """
+    
+    model_config = ConfigDict(frozen=True)
+    
+    inline_keyboard: Tuple[Tuple[FrozenInlineKeyboardButton, ...], ...]
+    
+    @field_serializer("inline_keyboard")
+    def _serialize_rows(self, rows) -> List[List[InlineKeyboardButton]]:
+        return [list(row) for row in rows]
+
+
+class KeyboardRegistry:
+    """
+    Кеш клавиатур с заранее сериализованным JSON
+    
+    Функция клавиатуры, обернутая в cached(), строит разметку один раз на
+    набор аргументов. Вместе с разметкой хранится ее JSON: сессия бота
+    отправляет его как есть, без model_dump и сериализации на каждый запрос.
+    Разметки aiogram изменяемы (присваивание полей и списки рядов), а
+    закешированный экземпляр общий для всех пользователей и его JSON уже
+    готов. Поэтому в реестре хранится неизменяемая копия
+    (FrozenInlineKeyboardMarkup): попытка изменить ее падает сразу, а не
+    портит клавиатуру для всех.
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        """
+        Args:
+            maxsize: Максимальное количество клавиатур в кеше
+        """
+        self.maxsize = maxsize
+        self._markups: "OrderedDict[Tuple[str, Hashable], InlineKeyboardMarkup]" = OrderedDict()
+        self._serialized: Dict[int, str] = {}
+    
+    def cached(self, func: F) -> F:
+        """Декоратор: кешировать клавиатуру по аргументам функции"""
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> InlineKeyboardMarkup:
+            # Ключ не зависит от того, передан аргумент позиционно или по имени
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (func.__qualname__, bound.args)
+            
+            markup = self._markups.get(key)
+            if markup is not None:
+                self._markups.move_to_end(key)
+                return markup
+            
+            markup = FrozenInlineKeyboardMarkup.model_validate(func(*bound.args).model_dump())
+            self._add(key, markup)
+            return markup
+        
+        return wrapper  # type: ignore[return-value]
+    
+    def serialized(self, markup: Any) -> Optional[str]:
+        """Готовый JSON клавиатуры или None, если она не из реестра"""
+        if markup is None:
+            return None
+        return self._serialized.get(id(markup))
+    
+    def clear(self):
+        """Очистить реестр"""
+        self._markups.clear()
+        self._serialized.clear()
+    
+    def __len__(self) -> int:
+        return len(self._markups)
+    
+    def _add(self, key: Tuple[str, Hashable], markup: InlineKeyboardMarkup):
+        """Сохранить клавиатуру и ее JSON, вытесняя самые старые"""
+        self._markups[key] = markup
+        # Тот же вид, что дает сессия aiogram: поля со значением None опускаются
+        self._serialized[id(markup)] = json.dumps(markup.model_dump(exclude_none=True, warnings=False))
+        
+        while len(self._markups) > self.maxsize:
+            _, evicted = self._markups.popitem(last=False)
+            self._serialized.pop(id(evicted), None)
+
+
+# Глобальный экземпляр
+keyboard_registry = KeyboardRegistry()
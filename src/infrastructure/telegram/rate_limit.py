@@ -0,0 +1,96 @@
+"""
+Ограничения частоты: массовая отправка и запросы пользователей
+"""
+
+from typing import Hashable
+from loguru import logger
+
+from src.config.settings import settings
+from src.utils.rate_limiter import GCRALimiter, RateLimit, TokenBucket
+
+
+# Рассылки и офферы делят глобальный лимит Telegram (~30 сообщений/с)
+bulk_send_limiter = TokenBucket(settings.broadcast_rate_limit)
+
+# GCRA одной командой: время берется на сервере Redis, поэтому реплики с
+# расходящимися часами видят один и тот же график. Возвращает 0, если запрос
+# разрешен, иначе через сколько миллисекунд повторить.
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+if tat - now > tolerance then
+    return tat - tolerance - now
+end
+
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return 0
+"""
+
+
+class RedisGCRALimiter:
+    """
+    Ограничение частоты запросов по ключам (GCRA) в Redis
+    
+    Общий для всех реплик бота вариант GCRALimiter: на ключ одна строка с TAT
+    и TTL до его наступления, так что простаивающие ключи удаляет сам Redis.
+    При недоступности Redis запросы пропускаются.
+    """
+    
+    def __init__(self, redis, prefix: str = "throttle"):
+        """
+        Args:
+            redis: Клиент redis.asyncio
+            prefix: Префикс ключей
+        """
+        self.prefix = prefix
+        self._script = redis.register_script(GCRA_SCRIPT)
+    
+    async def hit(self, key: Hashable, rate_limit: RateLimit) -> float:
+        """
+        Учесть запрос
+        
+        Returns:
+            0, если запрос разрешен, иначе через сколько секунд повторить
+        """
+        if isinstance(key, tuple):
+            key = ":".join(str(part) for part in key)
+        
+        try:
+            retry_after_ms = await self._script(
+                keys=[f"{self.prefix}:{key}"],
+                args=[int(rate_limit.interval * 1000), int(rate_limit.tolerance * 1000)],
+            )
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, request allowed: {e}")
+            return 0.0
+        
+        return int(retry_after_ms) / 1000
+
+
+def create_throttle_limiter():
+    """
+    Создание ограничителя запросов пользователей по настройкам
+    
+    memory - состояние в памяти процесса (лимит на реплику),
+    redis - общее состояние, лимиты действуют на все реплики.
+    """
+    if settings.throttle_backend == "redis":
+        if not settings.redis_url:
+            raise RuntimeError("REDIS_URL is required for THROTTLE_BACKEND=redis")
+        
+        # redis нужен только для этого backend, поэтому импортируем по месту
+        from redis.asyncio import Redis
+        
+        logger.info("Using Redis rate limiter")
+        return RedisGCRALimiter(Redis.from_url(settings.redis_url))
+    
+    return GCRALimiter(maxsize=settings.throttle_max_keys)
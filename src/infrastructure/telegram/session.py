@@ -0,0 +1,41 @@
+"""
+HTTP сессия бота
+"""
+
+from typing import Dict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import InputFile
+from aiohttp import FormData
+
+from src.infrastructure.telegram.keyboard_registry import keyboard_registry
+
+
+class CachedMarkupSession(AiohttpSession):
+    """Сессия, отправляющая клавиатуры из реестра готовым JSON"""
+    
+    def build_form_data(self, bot: Bot, method: TelegramMethod[TelegramType]) -> FormData:
+        markup_json = keyboard_registry.serialized(getattr(method, "reply_markup", None))
+        if markup_json is None:
+            return super().build_form_data(bot, method)
+        
+        form = FormData(quote_fields=False)
+        files: Dict[str, InputFile] = {}
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        
+        form.add_field("reply_markup", markup_json)
+        
+        for key, value in files.items():
+            form.add_field(
+                key,
+                value.read(bot),
+                filename=value.filename or key,
+            )
+        return form
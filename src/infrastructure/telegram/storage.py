@@ -0,0 +1,35 @@
+"""
+FSM storage factory
+"""
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from loguru import logger
+
+from src.config.settings import settings
+
+
+def create_fsm_storage() -> BaseStorage:
+    """
+    Создание хранилища FSM по настройкам
+    
+    memory - хранение в памяти процесса (локальная разработка и тесты),
+    redis - персистентное хранилище с TTL, общее для всех процессов бота.
+    """
+    if settings.fsm_storage == "redis":
+        if not settings.redis_url:
+            raise RuntimeError("REDIS_URL is required for FSM_STORAGE=redis")
+        
+        # redis нужен только для этого backend, поэтому импортируем по месту
+        from aiogram.fsm.storage.redis import RedisStorage
+        
+        storage = RedisStorage.from_url(
+            settings.redis_url,
+            state_ttl=settings.fsm_state_ttl,
+            data_ttl=settings.fsm_data_ttl,
+        )
+        logger.info("Using Redis FSM storage")
+        return storage
+    
+    logger.info("Using in-memory FSM storage")
+    return MemoryStorage()
@@ -1,116 +1,255 @@
 """
-aiohttp webhook server for bePaid
+aiohttp webhook server for bePaid and Telegram updates
 """
 
+import asyncio
+import hashlib
+import hmac
 import json
-from typing import Dict, Any
-from aiohttp import web, ClientSession
+from typing import Dict, Any, Optional, Set, Tuple
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
 from loguru import logger
+from prometheus_client import CONTENT_TYPE_LATEST
 
+from src.config.logging import category_logger
 from src.config.settings import settings
+from src.domain.entities.payment import Order, PaymentStatus
+from src.domain.use_cases.payment.process_payment import ProcessPaymentUseCase
+from src.infrastructure.database.analytics import analytics, ORDER_PAID
+from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
+from src.infrastructure.database.repositories.timer_repository import SQLAlchemyTimerRepository
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.monitoring.metrics import render_metrics
+from src.infrastructure.queue.delivery_worker import delivery_worker
+from src.infrastructure.queue.timer_scheduler import timer_scheduler
+from src.utils.cache import TTLCache
+
+# Полные payload'ы bePaid пишутся только на уровне DEBUG
+bepaid_logger = category_logger("bepaid")
+
+
+class QuickCallbackRequestHandler(SimpleRequestHandler):
+    """
+    Прием обновлений Telegram: в фоне, кроме быстрых callback'ов
+    
+    Обновления подтверждаются сразу и обрабатываются в фоне: долгие
+    обработчики (создание платежа, несколько запросов к Bot API) не держат
+    соединение Telegram. Callback'и, data которых начинается с одного из
+    quick_callbacks, обрабатываются до ответа: метод, возвращенный
+    обработчиком (answerCallbackQuery), уходит телом ответа на webhook.
+    """
+    
+    def __init__(self, *args, quick_callbacks: Tuple[str, ...] = (), **kwargs):
+        super().__init__(*args, handle_in_background=True, **kwargs)
+        self.quick_callbacks = quick_callbacks
+    
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        """Выбор режима обработки по callback data"""
+        if self._is_quick(await request.read()):
+            return await self._handle_request(bot=bot, request=request)
+        return await super()._handle_request_background(bot=bot, request=request)
+    
+    def _is_quick(self, body: bytes) -> bool:
+        """Callback с data из quick_callbacks (остальные обновления не разбираются)"""
+        if not self.quick_callbacks or b'"callback_query"' not in body:
+            return False
+        callback_query = json.loads(body).get("callback_query") or {}
+        return (callback_query.get("data") or "").startswith(self.quick_callbacks)
 
 
 class WebhookServer:
     """Webhook сервер для обработки уведомлений от bePaid"""
     
+    SIGNATURE_HEADER = "Content-Signature"
+    
     def __init__(self):
         self.app = web.Application()
+        self._background_tasks: Set[asyncio.Task] = set()
+        # (transaction_id, событие) недавно обработанных уведомлений bePaid
+        self._recent_events: TTLCache[Tuple[str, Optional[str]], bool] = TTLCache(
+            maxsize=settings.webhook_dedupe_size,
+            ttl=settings.webhook_dedupe_ttl,
+        )
         self._setup_routes()
     
     def _setup_routes(self):
         """Настройка маршрутов"""
         self.app.router.add_post("/webhook/bepaid", self.handle_bepaid_webhook)
         self.app.router.add_get("/health", self.health_check)
+        if settings.metrics_enabled:
+            self.app.router.add_get("/metrics", self.metrics)
+    
+    def register_telegram_webhook(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        quick_callbacks: Tuple[str, ...] = (),
+    ):
+        """
+        Регистрация маршрута для приема обновлений Telegram
+        
+        Должна вызываться до start(), после запуска роутер aiohttp заморожен.
+        
+        Args:
+            dp: Диспетчер, в который передаются обновления
+            bot: Экземпляр бота
+            quick_callbacks: Префиксы callback data, ответ на которые
+                возвращается в ответе на webhook (см. QuickCallbackRequestHandler)
+        """
+        QuickCallbackRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            quick_callbacks=quick_callbacks,
+            secret_token=settings.telegram_webhook_secret,
+        ).register(self.app, path=settings.telegram_webhook_path)
+        
+        logger.info(f"Telegram webhook route registered: {settings.telegram_webhook_path}")
     
     async def handle_bepaid_webhook(self, request: web.Request) -> web.Response:
         """Обработка webhook от bePaid"""
         try:
-            # Получение данных
-            data = await request.json()
-            logger.info(f"Received bePaid webhook: {data}")
+            # Получение данных (подпись считается по сырому телу)
+            raw_body = await request.read()
+            try:
+                data = json.loads(raw_body)
+            except ValueError:
+                logger.warning("Invalid bePaid webhook payload")
+                return web.Response(status=400, text="Invalid payload")
             
-            # Валидация подписи (TODO: реализовать)
-            # if not self._verify_signature(request, data):
-            #     logger.warning("Invalid webhook signature")
-            #     return web.Response(status=400, text="Invalid signature")
+            bepaid_logger.debug("Received bePaid webhook: {}", data)
+            
+            # Валидация подписи
+            signature = request.headers.get(self.SIGNATURE_HEADER)
+            if signature is not None and not self._verify_signature(raw_body, signature):
+                logger.warning("Invalid webhook signature")
+                return web.Response(status=400, text="Invalid signature")
             
             # Обработка события
-            await self._process_webhook_event(data)
+            await self._process_webhook_event(data, trusted=signature is not None)
             
             return web.Response(status=200, text="OK")
-            
+        
         except Exception as e:
             logger.error(f"Error processing bePaid webhook: {e}")
             return web.Response(status=500, text="Internal Server Error")
     
-    async def _process_webhook_event(self, data: Dict[str, Any]):
-        """Обработка события webhook"""
-        event_type = data.get("event_type")
+    def _verify_signature(self, raw_body: bytes, signature: str) -> bool:
+        """Проверка HMAC-SHA256 подписи тела webhook"""
+        expected = hmac.new(
+            settings.bepaid_webhook_secret.encode(),
+            raw_body,
+            hashlib.sha256,
+        ).hexdigest()
+        return hmac.compare_digest(expected, signature.strip().lower())
+    
+    async def _process_webhook_event(self, data: Dict[str, Any], trusted: bool = False):
+        """
+        Обработка события webhook
+        
+        Состояние транзакции из подписанного уведомления применяется сразу.
+        Для неподписанных уведомлений статус проверяется у bePaid в фоне.
+        Повторы одного события в пределах окна дедупликации отбрасываются
+        без обращения к БД и bePaid.
+        """
+        transaction = data.get("transaction") or {}
+        transaction_id = data.get("transaction_id") or transaction.get("uid")
+        
+        if not transaction_id:
+            logger.warning(f"Webhook without transaction id: event_type={data.get('event_type')}")
+            return
         
-        if event_type == "payment_successful":
-            await self._handle_payment_success(data)
-        elif event_type == "payment_failed":
-            await self._handle_payment_failed(data)
+        event_key = (transaction_id, data.get("event_type") or transaction.get("status"))
+        if event_key in self._recent_events:
+            logger.info(f"Duplicate webhook ignored: {event_key}")
+            return
+        self._recent_events.set(event_key, True)
+        
+        if trusted and transaction.get("status"):
+            try:
+                order = await self._apply_payment_status(transaction_id, {"transaction": transaction})
+            except Exception:
+                self._recent_events.pop(event_key)
+                raise
+            self._forget_unless_final(event_key, order)
         else:
-            logger.warning(f"Unknown webhook event type: {event_type}")
+            self._schedule_status_check(transaction_id, event_key)
     
-    async def _handle_payment_success(self, data: Dict[str, Any]):
-        """Обработка успешного платежа"""
-        transaction_id = data.get("transaction_id")
-        logger.info(f"Payment successful: {transaction_id}")
-        
+    def _forget_unless_final(self, event_key: Tuple[str, Optional[str]], order: Optional[Order]):
+        """Разрешить повторную обработку, если заказ еще не в финальном статусе"""
+        if order is None or order.status == PaymentStatus.PENDING:
+            self._recent_events.pop(event_key)
+    
+    def _schedule_status_check(self, transaction_id: str, event_key: Tuple[str, Optional[str]]):
+        """Фоновая проверка статуса платежа через API bePaid"""
+        task = asyncio.create_task(self._check_payment_status(transaction_id, event_key))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _check_payment_status(self, transaction_id: str, event_key: Tuple[str, Optional[str]]):
+        """Запрос статуса у bePaid и обработка платежа"""
+        order = None
         try:
-            # Получаем use case для обработки платежа
-            from src.utils.di import container
-            from src.domain.repositories.payment_repository import PaymentRepository
-            from src.domain.use_cases.payment.process_payment import ProcessPaymentUseCase
-            
-            # Создаем сессию БД
-            from src.infrastructure.database.session import get_db_session
-            async with get_db_session() as session:
-                # Создаем репозиторий и use case
-                payment_repository = SQLAlchemyPaymentRepository(session)
-                process_payment_uc = ProcessPaymentUseCase(payment_repository)
-                
-                # Обрабатываем платеж
-                order = await process_payment_uc.execute(transaction_id)
-                
-                if order and order.status == PaymentStatus.PAID:
-                    logger.info(f"Payment processed successfully: order_id={order.id}")
-                    # TODO: Отправить файл пользователю
-                    # TODO: Уведомить админов
-                else:
-                    logger.warning(f"Payment processing failed: order_id={order.id if order else 'None'}")
-        
+            order = await self._apply_payment_status(transaction_id, None)
         except Exception as e:
-            logger.error(f"Error handling payment success: {e}")
+            logger.error(f"Error checking payment status {transaction_id}: {e}")
+        self._forget_unless_final(event_key, order)
     
-    async def _handle_payment_failed(self, data: Dict[str, Any]):
-        """Обработка неудачного платежа"""
-        transaction_id = data.get("transaction_id")
-        logger.info(f"Payment failed: {transaction_id}")
-        
-        try:
-            # Получаем use case для обработки платежа
-            from src.domain.repositories.payment_repository import PaymentRepository
-            from src.domain.use_cases.payment.process_payment import ProcessPaymentUseCase
+    async def _apply_payment_status(
+        self,
+        transaction_id: str,
+        payment_status: Optional[Dict[str, Any]],
+    ) -> Optional[Order]:
+        """Обновление заказа по состоянию транзакции"""
+        offer_timer = None
+        product = None
+        async with get_db_session() as session:
+            payment_repository = SQLAlchemyPaymentRepository(session)
+            process_payment_uc = ProcessPaymentUseCase(payment_repository)
+            
+            # Обрабатываем платеж
+            order = await process_payment_uc.execute(transaction_id, payment_status)
             
-            # Создаем сессию БД
-            from src.infrastructure.database.session import get_db_session
-            async with get_db_session() as session:
-                # Создаем репозиторий и use case
-                payment_repository = SQLAlchemyPaymentRepository(session)
-                process_payment_uc = ProcessPaymentUseCase(payment_repository)
-                
-                # Обрабатываем неудачный платеж
-                order = await process_payment_uc.execute(transaction_id)
-                
-                if order and order.status == PaymentStatus.FAILED:
-                    logger.info(f"Payment marked as failed: order_id={order.id}")
-                    # TODO: Уведомить пользователя о неудачной оплате
+            # Оплачен именно этим вызовом: повторные и параллельные
+            # уведомления по той же оплате таймер и событие не создают
+            just_paid = process_payment_uc.paid_now
+            
+            # Таймер оффера создается в той же транзакции, что и покупка
+            if just_paid:
+                product = await payment_repository.get_product_by_id(order.product_id)
+                if product:
+                    timer_repository = SQLAlchemyTimerRepository(session)
+                    # Купленный продукт больше не предлагаем
+                    await timer_repository.cancel_user_timers(order.user_id, product.slug)
+                    offer_timer = await timer_scheduler.create_offer(
+                        timer_repository, order.user_id, product.slug
+                    )
         
-        except Exception as e:
-            logger.error(f"Error handling payment failure: {e}")
+        if offer_timer:
+            timer_scheduler.schedule(offer_timer)
+        
+        if not order:
+            return None
+        
+        if order.status == PaymentStatus.PAID:
+            logger.info(f"Payment processed successfully: order_id={order.id}")
+            # Повторные уведомления по уже оплаченному заказу событие не дублируют
+            if just_paid:
+                analytics.track(order.user_id, ORDER_PAID, {
+                    "product": product.slug if product else None,
+                    "order_id": order.id,
+                    "amount_kopecks": order.amount_kopecks,
+                })
+            # Файл и уведомление админам отправляет очередь доставки
+            delivery_worker.notify()
+        elif order.status == PaymentStatus.FAILED:
+            logger.info(f"Payment marked as failed: order_id={order.id}")
+            # TODO: Уведомить пользователя о неудачной оплате
+        else:
+            logger.warning(f"Payment is still pending: order_id={order.id}")
+        
+        return order
     
     async def health_check(self, request: web.Request) -> web.Response:
         """Health check endpoint"""
@@ -120,6 +259,13 @@ class WebhookServer:
             content_type="application/json"
         )
     
+    async def metrics(self, request: web.Request) -> web.Response:
+        """Prometheus metrics endpoint"""
+        return web.Response(
+            body=await render_metrics(),
+            headers={"Content-Type": CONTENT_TYPE_LATEST},
+        )
+    
     async def start(self, host: str = "0.0.0.0", port: int = 8080):
         """Запуск webhook сервера"""
         logger.info(f"Starting webhook server on {host}:{port}")
@@ -12,11 +12,25 @@ from aiogram.enums import ParseMode
 from loguru import logger
 
 from src.config.settings import settings
-from src.config.logging import setup_logging
+from src.config.logging import setup_logging, shutdown_logging
 from src.infrastructure.database.connection import db_connection
+from src.infrastructure.database.activity_tracker import activity_tracker
+from src.infrastructure.database.analytics import analytics
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.test_repository import SQLAlchemyTestRepository
+from src.infrastructure.cache.product_catalog import product_catalog
+from src.infrastructure.cache.question_bank import load_question_bank
+from src.infrastructure.payment.bepaid_client import bepaid_client
+from src.infrastructure.queue.delivery_worker import delivery_worker
+from src.infrastructure.queue.order_sweeper import order_sweeper
+from src.infrastructure.queue.timer_scheduler import timer_scheduler
+from src.infrastructure.telegram.broadcaster import broadcaster
 from src.infrastructure.database.models import Base
-from src.infrastructure.telegram.bot import create_bot, create_dispatcher
+from src.infrastructure.telegram.bot import create_bot, create_dispatcher, ALLOWED_UPDATES
 from src.infrastructure.webhook.server import webhook_server
+from src.domain.use_cases.test.test_questions import TestQuestionsService
+from src.presentation.handlers.test import QUICK_CALLBACKS
+from src.presentation.keyboards.inline import prebuild_test_question_keyboards
 from src.utils.di import setup_dependencies
 
 
@@ -44,6 +58,38 @@ class BotApplication:
             if settings.is_development:
                 await self._create_tables()
             
+            # Каталог продуктов в памяти (без него репозиторий читает продукты из БД)
+            try:
+                await product_catalog.load()
+            except Exception as e:
+                logger.error(f"Failed to load product catalog: {e}")
+            product_catalog.start()
+            
+            # Вопросы теста (при ошибке остается встроенный набор)
+            try:
+                await load_question_bank()
+            except Exception as e:
+                logger.error(f"Failed to load test questions: {e}")
+            prebuild_test_question_keyboards(TestQuestionsService.get_bank())
+            
+            # Сводка статистики тестов (на существующей БД изначально пуста)
+            if settings.test_stats_use_summary:
+                try:
+                    async with get_db_session() as session:
+                        await SQLAlchemyTestRepository(session).ensure_test_statistics()
+                except Exception as e:
+                    logger.error(f"Failed to prepare test statistics summary: {e}")
+            
+            # Отложенная запись активности пользователей и событий аналитики
+            activity_tracker.start()
+            analytics.start()
+            
+            # Очистка просроченных заказов
+            order_sweeper.start()
+            
+            # HTTP сессия bePaid с пулом соединений
+            await bepaid_client.start()
+            
             # Настройка зависимостей
             setup_dependencies()
             
@@ -51,6 +97,23 @@ class BotApplication:
             self.bot = create_bot()
             self.dp = create_dispatcher()
             
+            # Очередь доставки файлов после оплаты
+            delivery_worker.start(self.bot)
+            
+            # Рассылки (включая продолжение прерванных)
+            await broadcaster.start(self.bot)
+            
+            # Таймеры офферов
+            timer_scheduler.start(self.bot)
+            
+            # Прием обновлений Telegram через webhook
+            if settings.is_webhook_mode:
+                if not settings.webhook_host:
+                    raise RuntimeError("WEBHOOK_HOST is required for BOT_UPDATE_MODE=webhook")
+                webhook_server.register_telegram_webhook(
+                    self.dp, self.bot, quick_callbacks=QUICK_CALLBACKS
+                )
+            
             # Запуск webhook сервера
             if settings.webhook_host:
                 self.webhook_runner = await webhook_server.start(
@@ -62,7 +125,7 @@ class BotApplication:
             self._setup_signal_handlers()
             
             logger.info("Application initialized successfully")
-            
+        
         except Exception as e:
             logger.error(f"Failed to initialize application: {e}")
             raise
@@ -89,28 +152,50 @@ class BotApplication:
     async def run(self):
         """Запуск бота"""
         try:
-            logger.info("Starting bot polling...")
-            
-            # Запуск polling
-            await self.dp.start_polling(
-                self.bot,
-                allowed_updates=["message", "callback_query"],
-                drop_pending_updates=True,
-            )
-            
+            if settings.is_webhook_mode:
+                await self._run_webhook()
+            else:
+                await self._run_polling()
+        
         except Exception as e:
-            logger.error(f"Error during bot polling: {e}")
+            logger.error(f"Error during bot run: {e}")
             raise
         finally:
             await self.shutdown()
     
+    async def _run_polling(self):
+        """Получение обновлений через long polling"""
+        logger.info("Starting bot polling...")
+        
+        await self.dp.start_polling(
+            self.bot,
+            allowed_updates=ALLOWED_UPDATES,
+            drop_pending_updates=True,
+        )
+    
+    async def _run_webhook(self):
+        """Получение обновлений через webhook на сервере aiohttp"""
+        webhook_url = f"{settings.webhook_host}{settings.telegram_webhook_path}"
+        logger.info(f"Setting Telegram webhook: {webhook_url}")
+        
+        # Накопившиеся обновления не сбрасываем - Telegram доставит их после рестарта
+        await self.bot.set_webhook(
+            url=webhook_url,
+            secret_token=settings.telegram_webhook_secret,
+            allowed_updates=ALLOWED_UPDATES,
+            drop_pending_updates=False,
+        )
+        
+        # Обновления обрабатываются webhook сервером до сигнала завершения
+        await self._shutdown_event.wait()
+    
     async def shutdown(self):
         """Graceful shutdown"""
         logger.info("Shutting down application...")
         
         try:
             # Остановка polling
-            if self.dp:
+            if self.dp and not settings.is_webhook_mode:
                 await self.dp.stop_polling()
                 logger.info("Bot polling stopped")
             
@@ -119,20 +204,43 @@ class BotApplication:
                 await self.webhook_runner.cleanup()
                 logger.info("Webhook server stopped")
             
+            # Закрытие хранилища FSM
+            if self.dp:
+                await self.dp.storage.close()
+                logger.info("FSM storage closed")
+            
+            # Закрытие HTTP сессии bePaid
+            await bepaid_client.close()
+            
+            # Остановка фоновых задач: доставка, рассылки, таймеры, очистка заказов
+            await delivery_worker.stop()
+            await broadcaster.stop()
+            await timer_scheduler.stop()
+            await order_sweeper.stop()
+            
             # Закрытие сессий бота
             if self.bot:
-                session = await self.bot.session()
-                await session.close()
+                await self.bot.session.close()
                 logger.info("Bot session closed")
             
+            # Запись накопленной активности пользователей и событий аналитики
+            await activity_tracker.stop()
+            await analytics.stop()
+            
+            # Остановка обновления каталога продуктов
+            await product_catalog.stop()
+            
             # Закрытие подключения к БД
             await db_connection.close()
             logger.info("Database connection closed")
             
             logger.info("Application shutdown completed")
-            
+        
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")
+        
+        # Дописываем сообщения, оставшиеся в очереди логирования
+        await shutdown_logging()
 
 
 async def main():
@@ -159,7 +267,7 @@ async def main():
                 await task
             except asyncio.CancelledError:
                 pass
-        
+    
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt")
     except Exception as e:
@@ -7,15 +7,24 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.filters import Command
 from loguru import logger
 
+from src.domain.entities.broadcast import Broadcast, BroadcastStatus
+from src.domain.entities.payment import PaymentStatus
 from src.domain.entities.user import User
-from src.domain.repositories.user_repository import UserRepository
-from src.domain.repositories.payment_repository import PaymentRepository
-from src.domain.repositories.test_repository import TestRepository
-from src.infrastructure.database.session import get_db_session
+from src.infrastructure.cache.admin_statistics import admin_statistics
+from src.infrastructure.cache.user_cache import user_cache
+from src.infrastructure.cache.product_catalog import product_catalog
+from src.infrastructure.database.analytics import FUNNEL_STEPS, ORDER_PAID, START
+from src.infrastructure.database.session import after_commit, get_db_session
 from src.infrastructure.database.repositories.user_repository import SQLAlchemyUserRepository
-from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
+from src.infrastructure.database.repositories.statistics_repository import SQLAlchemyStatisticsRepository
 from src.infrastructure.database.repositories.test_repository import SQLAlchemyTestRepository
-from src.presentation.keyboards.inline import back_to_menu_keyboard
+from src.infrastructure.database.repositories.broadcast_repository import SQLAlchemyBroadcastRepository
+from src.infrastructure.telegram.broadcaster import broadcaster
+from src.presentation.keyboards.inline import (
+    back_to_menu_keyboard,
+    broadcast_confirm_keyboard,
+    broadcast_progress_keyboard,
+)
 from src.utils.helpers import format_price_kopecks, format_user_display_name
 
 router = Router()
@@ -41,7 +50,12 @@ async def admin_command(message: Message, user: User):
             "/users - Список пользователей\n"
             "/payments - Статистика платежей\n"
             "/tests - Статистика тестов\n"
-            "/broadcast - Рассылка сообщений\n"
+            "/funnel [дней] - Воронка и конверсия (по умолчанию 30 дней)\n"
+            "/broadcast <текст> - Рассылка сообщений (ответом на фото/видео/документ - с медиа)\n"
+            "/broadcast_status - Ход рассылок\n"
+            "/reload_products - Перезагрузить каталог продуктов\n"
+            "/rebuild_test_stats - Пересчитать сводку статистики тестов\n"
+            "/rebuild_funnel - Пересчитать сводку воронки\n"
             "/block <user_id> - Заблокировать пользователя\n"
             "/unblock <user_id> - Разблокировать пользователя"
         )
@@ -59,39 +73,27 @@ async def admin_stats(message: Message, user: User):
             await message.answer("❌ У вас нет прав администратора")
             return
         
-        async with get_db_session() as session:
-            user_repository = SQLAlchemyUserRepository(session)
-            payment_repository = SQLAlchemyPaymentRepository(session)
-            test_repository = SQLAlchemyTestRepository(session)
-            
-            # Получаем статистику
-            total_users = await user_repository.get_users_count()
-            active_users = await user_repository.get_active_users(limit=1000)
-            
-            # Статистика платежей
-            paid_orders = await payment_repository.get_orders_by_status("paid")
-            total_revenue = sum(order.amount_kopecks for order in paid_orders)
-            
-            # Статистика тестов
-            test_stats = await test_repository.get_test_statistics()
-            
-            await message.answer(
-                f"📊 Статистика бота\n\n"
-                f"👥 Пользователи:\n"
-                f"• Всего: {total_users}\n"
-                f"• Активных: {len(active_users)}\n\n"
-                f"💳 Платежи:\n"
-                f"• Успешных: {len(paid_orders)}\n"
-                f"• Общая выручка: {format_price_kopecks(total_revenue)}\n\n"
-                f"🧠 Тесты:\n"
-                f"• Всего пройдено: {test_stats['total_tests']}\n"
-                f"• Пройдено успешно: {test_stats['passed_tests']}\n"
-                f"• Процент успеха: {test_stats['pass_rate']:.1f}%\n"
-                f"• Средний балл: {test_stats['avg_score']:.1f}",
-                reply_markup=back_to_menu_keyboard()
-            )
+        # Агрегаты считаются в БД и кешируются на короткое время
+        overview = await admin_statistics.get_overview()
+        test_stats = await admin_statistics.get_test_statistics()
         
-    except Exception as(as e:
+        await message.answer(
+            f"📊 Статистика бота\n\n"
+            f"👥 Пользователи:\n"
+            f"• Всего: {overview['total_users']}\n"
+            f"• Активных: {overview['active_users']}\n\n"
+            f"💳 Платежи:\n"
+            f"• Успешных: {overview['paid_orders']}\n"
+            f"• Общая выручка: {format_price_kopecks(overview['total_revenue'])}\n\n"
+            f"🧠 Тесты:\n"
+            f"• Всего пройдено: {test_stats['total_tests']}\n"
+            f"• Пройдено успешно: {test_stats['passed_tests']}\n"
+            f"• Процент успеха: {test_stats['pass_rate']:.1f}%\n"
+            f"• Средний балл: {test_stats['avg_score']:.1f}",
+            reply_markup=back_to_menu_keyboard()
+        )
+        
+    except Exception as e:
         logger.error(f"Error in admin_stats: {e}")
         await message.answer("Произошла ошибка при получении статистики")
 
@@ -138,29 +140,24 @@ async def admin_payments(message: Message, user: User):
             await message.answer("❌ У вас нет прав администратора")
             return
         
-        async with get_db_session() as session:
-            payment_repository = SQLAlchemyPaymentRepository(session)
-            
-            # Получаем статистику по статусам
-            paid_orders = await payment_repository.get_orders_by_status("paid")
-            pending_orders = await payment_repository.get_orders_by_status("pending")
-            failed_orders = await payment_repository.get_orders_by_status("failed")
-            
-            total_revenue = sum(order.amount_kopecks for order in paid_orders)
-            
-            await message.answer(
-                f"💳 Статистика платежей\n\n"
-                f"✅ Оплачено: {len(paid_orders)}\n"
-                f"⏳ В ожидании: {len(pending_orders)}\n"
-                f"❌ Неудачных: {len(failed_orders)}\n\n"
-                f"💰 Общая выручка: {format_price_kopecks(total_revenue)}\n\n"
-                f"📊 Последние платежи:\n"
-                + "\n".join([
-                    f"• {format_price_kopecks(order.amount_kopecks)} - {order.status}"
-                    for order in paid_orders[:5]
-                ]),
-                reply_markup=back_to_menu_keyboard()
-            )
+        overview = await admin_statistics.get_overview()
+        recent_payments = await admin_statistics.get_recent_payments()
+        orders_by_status = overview["orders_by_status"]
+        
+        await message.answer(
+            f"💳 Статистика платежей\n\n"
+            f"✅ Оплачено: {orders_by_status[PaymentStatus.PAID.value]['count']}\n"
+            f"⏳ В ожидании: {orders_by_status[PaymentStatus.PENDING.value]['count']}\n"
+            f"❌ Неудачных: {orders_by_status[PaymentStatus.FAILED.value]['count']}\n"
+            f"⌛ Просроченных: {orders_by_status[PaymentStatus.EXPIRED.value]['count']}\n\n"
+            f"💰 Общая выручка: {format_price_kopecks(overview['total_revenue'])}\n\n"
+            f"📊 Последние платежи:\n"
+            + "\n".join([
+                f"• {format_price_kopecks(order.amount_kopecks)} - {order.status.value}"
+                for order in recent_payments
+            ]),
+            reply_markup=back_to_menu_keyboard()
+        )
         
     except Exception as e:
         logger.error(f"Error in admin_payments: {e}")
@@ -175,33 +172,137 @@ async def admin_tests(message: Message, user: User):
             await message.answer("❌ У вас нет прав администратора")
             return
         
-        async with get_db_session() as session:
-            test_repository = SQLAlchemyTestRepository(session)
-            
-            test_stats = await test_repository.get_test_statistics()
-            
-            await message.answer(
-                f"🧠 Статистика тестов\n\n"
-                f"📊 Общая статистика:\n"
-                f"• Всего тестов: {test_stats['total_tests']}\n"
-                f"• Пройдено успешно: {test_stats['passed_tests']}\n"
-                f"• Не пройдено: {test_stats['failed_tests']}\n"
-                f"• Процент успеха: {test_stats['pass_rate']:.1f}%\n"
-                f"• Средний балл: {test_stats['avg_score']:.1f}\n"
-                f"• Уникальных пользователей: {test_stats['unique_users']}\n\n"
-                f"📈 Распределение по баллам:\n"
-                + "\n".join([
-                    f"• {score} баллов: {count} раз"
-                    for score, count in sorted(test_stats['score_distribution'].items())
-                ]),
-                reply_markup=back_to_menu_keyboard()
-            )
+        test_stats = await admin_statistics.get_test_statistics()
+        
+        await message.answer(
+            f"🧠 Статистика тестов\n\n"
+            f"📊 Общая статистика:\n"
+            f"• Всего тестов: {test_stats['total_tests']}\n"
+            f"• Пройдено успешно: {test_stats['passed_tests']}\n"
+            f"• Не пройдено: {test_stats['failed_tests']}\n"
+            f"• Процент успеха: {test_stats['pass_rate']:.1f}%\n"
+            f"• Средний балл: {test_stats['avg_score']:.1f}\n"
+            f"• Уникальных пользователей: {test_stats['unique_users']}\n\n"
+            f"📈 Распределение по баллам:\n"
+            + "\n".join([
+                f"• {score} баллов: {count} раз"
+                for score, count in sorted(test_stats['score_distribution'].items())
+            ]),
+            reply_markup=back_to_menu_keyboard()
+        )
         
     except Exception as e:
         logger.error(f"Error in admin_tests: {e}")
         await message.answer("Произошла ошибка при получении статистики тестов")
 
 
+@router.message(Command("rebuild_test_stats"))
+async def admin_rebuild_test_stats(message: Message, user: User):
+    """Пересчитать сводную статистику тестов"""
+    try:
+        if not is_admin(user, []):
+            await message.answer("❌ У вас нет прав администратора")
+            return
+        
+        async with get_db_session() as session:
+            await SQLAlchemyTestRepository(session).rebuild_test_statistics()
+            after_commit(session, admin_statistics.invalidate)
+        
+        await message.answer(
+            "✅ Сводка статистики тестов пересчитана",
+            reply_markup=back_to_menu_keyboard()
+        )
+        logger.info(f"Test statistics summary rebuilt by admin {user.telegram_id}")
+        
+    except Exception as e:
+        logger.error(f"Error in admin_rebuild_test_stats: {e}")
+        await message.answer("Произошла ошибка при пересчете статистики тестов")
+
+
+@router.message(Command("funnel"))
+async def admin_funnel(message: Message, user: User):
+    """Воронка и конверсия по сводке"""
+    try:
+        if not is_admin(user, []):
+            await message.answer("❌ У вас нет прав администратора")
+            return
+        
+        parts = message.text.split()
+        days = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 30
+        days = max(days, 1)
+        
+        funnel = await admin_statistics.get_funnel(days)
+        started = funnel.get(START, {}).get("users", 0)
+        
+        lines = []
+        for step_name in FUNNEL_STEPS:
+            step = funnel.get(step_name, {"events": 0, "users": 0, "amount_kopecks": 0, "products": {}})
+            conversion = step["users"] / started * 100 if started else 0
+            lines.append(f"• {step_name}: {step['users']} польз. ({conversion:.1f}%), событий {step['events']}")
+            
+            for slug, product in sorted(step["products"].items()):
+                amount = f", {format_price_kopecks(product['amount_kopecks'])}" if product["amount_kopecks"] else ""
+                lines.append(f"    – {slug}: {product['users']} польз.{amount}")
+        
+        revenue = funnel.get(ORDER_PAID, {}).get("amount_kopecks", 0)
+        
+        await message.answer(
+            f"📈 Воронка за {days} дн.\n\n"
+            + "\n".join(lines)
+            + f"\n\n💰 Оплачено: {format_price_kopecks(revenue)}\n"
+            "Пользователи - впервые дошедшие до шага за период, % - от start",
+            reply_markup=back_to_menu_keyboard()
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in admin_funnel: {e}")
+        await message.answer("Произошла ошибка при получении воронки")
+
+
+@router.message(Command("rebuild_funnel"))
+async def admin_rebuild_funnel(message: Message, user: User):
+    """Пересчитать сводку воронки по событиям"""
+    try:
+        if not is_admin(user, []):
+            await message.answer("❌ У вас нет прав администратора")
+            return
+        
+        async with get_db_session() as session:
+            await SQLAlchemyStatisticsRepository(session).rebuild_funnel()
+            after_commit(session, admin_statistics.invalidate)
+        
+        await message.answer(
+            "✅ Сводка воронки пересчитана",
+            reply_markup=back_to_menu_keyboard()
+        )
+        logger.info(f"Funnel rollups rebuilt by admin {user.telegram_id}")
+        
+    except Exception as e:
+        logger.error(f"Error in admin_rebuild_funnel: {e}")
+        await message.answer("Произошла ошибка при пересчете воронки")
+
+
+@router.message(Command("reload_products"))
+async def admin_reload_products(message: Message, user: User):
+    """Перезагрузить каталог продуктов"""
+    try:
+        if not is_admin(user, []):
+            await message.answer("❌ У вас нет прав администратора")
+            return
+        
+        await product_catalog.load()
+        
+        await message.answer(
+            f"✅ Каталог продуктов перезагружен: {len(product_catalog.get_all())} продуктов",
+            reply_markup=back_to_menu_keyboard()
+        )
+        logger.info(f"Product catalog reloaded by admin {user.telegram_id}")
+        
+    except Exception as e:
+        logger.error(f"Error in admin_reload_products: {e}")
+        await message.answer("Произошла ошибка при перезагрузке каталога")
+
+
 @router.message(Command("block"))
 async def admin_block_user(message: Message, user: User):
     """Заблокировать пользователя"""
@@ -228,6 +329,7 @@ async def admin_block_user(message: Message, user: User):
             success = await user_repository.block_user(target_user_id)
             
             if success:
+                after_commit(session, lambda: user_cache.invalidate_by_id(target_user_id))
                 await message.answer(f"✅ Пользователь {target_user_id} заблокирован")
                 logger.info(f"User {target_user_id} blocked by admin {user.telegram_id}")
             else:
@@ -264,6 +366,7 @@ async def admin_unblock_user(message: Message, user: User):
             success = await user_repository.unblock_user(target_user_id)
             
             if success:
+                after_commit(session, lambda: user_cache.invalidate_by_id(target_user_id))
                 await message.answer(f"✅ Пользователь {target_user_id} разблокирован")
                 logger.info(f"User {target_user_id} unblocked by admin {user.telegram_id}")
             else:
@@ -272,3 +375,153 @@ async def admin_unblock_user(message: Message, user: User):
     except Exception as e:
         logger.error(f"Error in admin_unblock_user: {e}")
         await message.answer("Произошла ошибка при разблокировке пользователя")
+
+
+@router.message(Command("broadcast"))
+async def admin_broadcast(message: Message, user: User):
+    """Создать рассылку"""
+    try:
+        if not is_admin(user, []):
+            await message.answer("❌ У вас нет прав администратора")
+            return
+        
+        # Медиа берем из сообщения, на которое ответил админ
+        media_file_id = None
+        media_type = None
+        reply = message.reply_to_message
+        if reply:
+            if reply.photo:
+                media_file_id, media_type = reply.photo[-1].file_id, "photo"
+            elif reply.video:
+                media_file_id, media_type = reply.video.file_id, "video"
+            elif reply.document:
+                media_file_id, media_type = reply.document.file_id, "document"
+        
+        parts = message.html_text.split(maxsplit=1)
+        message_text = parts[1] if len(parts) > 1 else (reply.html_text if reply else "")
+        
+        if not message_text and not media_file_id:
+            await message.answer(
+                "Использование: /broadcast <текст>\n"
+                "Для рассылки с медиа отправьте команду ответом на фото, видео или документ."
+            )
+            return
+        
+        async with get_db_session() as session:
+            broadcast_repository = SQLAlchemyBroadcastRepository(session)
+            
+            total_users = await broadcast_repository.count_recipients(None)
+            broadcast = await broadcast_repository.create(
+                Broadcast(
+                    id=0,
+                    created_by_admin_id=user.id,
+                    message_text=message_text,
+                    media_file_id=media_file_id,
+                    media_type=media_type,
+                    total_users=total_users,
+                )
+            )
+        
+        await message.answer(
+            f"📢 Рассылка #{broadcast.id}\n\n"
+            f"Получателей: {total_users}\n\n"
+            f"Запустить?",
+            reply_markup=broadcast_confirm_keyboard(broadcast.id)
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in admin_broadcast: {e}")
+        await message.answer("Произошла ошибка при создании рассылки")
+
+
+@router.callback_query(F.data.startswith("broadcast_launch_"))
+async def admin_broadcast_launch(callback: CallbackQuery, user: User):
+    """Запустить рассылку"""
+    try:
+        if not is_admin(user, []):
+            await callback.answer("❌ У вас нет прав администратора", show_alert=True)
+            return
+        
+        broadcast_id = int(callback.data.replace("broadcast_launch_", ""))
+        
+        async with get_db_session() as session:
+            broadcast = await SQLAlchemyBroadcastRepository(session).get_by_id(broadcast_id)
+        
+        if not broadcast or broadcast.status != BroadcastStatus.DRAFT:
+            await callback.answer("Рассылка уже запущена или отменена", show_alert=True)
+            return
+        
+        broadcaster.launch(broadcast_id)
+        
+        await callback.answer()
+        await callback.message.edit_text(
+            f"🚀 Рассылка #{broadcast_id} запущена\n\n"
+            f"Получателей: {broadcast.total_users}\n"
+            f"Ход рассылки: /broadcast_status",
+            reply_markup=broadcast_progress_keyboard(broadcast_id)
+        )
+        logger.info(f"Broadcast {broadcast_id} launched by admin {user.telegram_id}")
+        
+    except Exception as e:
+        logger.error(f"Error in admin_broadcast_launch: {e}")
+        await callback.answer("Произошла ошибка при запуске рассылки", show_alert=True)
+
+
+@router.callback_query(F.data.startswith("broadcast_cancel_"))
+async def admin_broadcast_cancel(callback: CallbackQuery, user: User):
+    """Отменить рассылку"""
+    try:
+        if not is_admin(user, []):
+            await callback.answer("❌ У вас нет прав администратора", show_alert=True)
+            return
+        
+        broadcast_id = int(callback.data.replace("broadcast_cancel_", ""))
+        
+        async with get_db_session() as session:
+            cancelled = await SQLAlchemyBroadcastRepository(session).update_status(
+                broadcast_id,
+                BroadcastStatus.CANCELLED,
+                from_statuses=(BroadcastStatus.DRAFT, BroadcastStatus.IN_PROGRESS),
+            )
+        
+        if not cancelled:
+            await callback.answer(f"Рассылка #{broadcast_id} уже завершена", show_alert=True)
+            return
+        
+        await callback.answer()
+        await callback.message.edit_text(f"❌ Рассылка #{broadcast_id} отменена")
+        logger.info(f"Broadcast {broadcast_id} cancelled by admin {user.telegram_id}")
+        
+    except Exception as e:
+        logger.error(f"Error in admin_broadcast_cancel: {e}")
+        await callback.answer("Произошла ошибка при отмене рассылки", show_alert=True)
+
+
+@router.message(Command("broadcast_status"))
+async def admin_broadcast_status(message: Message, user: User):
+    """Ход рассылок"""
+    try:
+        if not is_admin(user, []):
+            await message.answer("❌ У вас нет прав администратора")
+            return
+        
+        async with get_db_session() as session:
+            broadcasts = await SQLAlchemyBroadcastRepository(session).get_by_status(
+                BroadcastStatus.IN_PROGRESS
+            )
+        
+        if not broadcasts:
+            await message.answer("Активных рассылок нет", reply_markup=back_to_menu_keyboard())
+            return
+        
+        status_text = "📢 Активные рассылки:\n\n" + "\n".join([
+            f"#{broadcast.id}: {broadcast.processed_count}/{broadcast.total_users} "
+            f"(✅ {broadcast.sent_count}, ❌ {broadcast.failed_count})"
+            for broadcast in broadcasts
+        ])
+        
+        await message.answer(status_text, reply_markup=back_to_menu_keyboard())
+        
+    except Exception as e:
+        logger.error(f"Error in admin_broadcast_status: {e}")
+        await message.answer("Произошла ошибка при получении статуса рассылок")
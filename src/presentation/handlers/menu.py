@@ -6,6 +6,10 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from loguru import logger
 
+from src.domain.entities.user import User
+from src.infrastructure.database.analytics import analytics, VIEW_KITS, VIEW_FAQ
+from src.infrastructure.database.session import get_db_session
+from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
 from src.presentation.keyboards.inline import (
     main_menu_keyboard,
     kits_menu_keyboard,
@@ -19,18 +23,22 @@ router = Router()
 
 
 @router.callback_query(F.data == "back_to_main")
-async def back_to_main_menu(callback: CallbackQuery):
+async def back_to_main_menu(callback: CallbackQuery, user: User):
     """Возврат в главное меню"""
     try:
         await callback.answer()
         
         # Проверяем, есть ли у пользователя трипвайер
-        has_tripwire = False  # TODO: Реализовать проверку через PaymentRepository
+        has_tripwire = False
+        if user:
+            async with get_db_session() as session:
+                payment_repository = SQLAlchemyPaymentRepository(session)
+                has_tripwire = await payment_repository.has_user_product(user.id, "tripwire_1byn")
         
         await callback.message.edit_text(
             "🏠 Главное меню\n\n"
             "Выберите действие:",
-            reply_markup=main_menu_keyboard(has_tripwire=has_tripwire)
+            reply_markup=main_menu_keyboard(has_tripwire=not has_tripwire)
         )
         
     except Exception as e:
@@ -39,11 +47,13 @@ async def back_to_main_menu(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "view_kits")
-async def view_kits(callback: CallbackQuery):
+async def view_kits(callback: CallbackQuery, user: User):
     """Просмотр вариантов аптечек"""
     try:
         await callback.answer()
         
+        analytics.track(user.id if user else None, VIEW_KITS)
+        
         await callback.message.edit_text(
             "📦 Варианты аптечек\n\n"
             "Выберите тип аптечки:",
@@ -99,11 +109,13 @@ async def reviews(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "faq")
-async def faq(callback: CallbackQuery):
+async def faq(callback: CallbackQuery, user: User):
     """FAQ"""
     try:
         await callback.answer()
         
+        analytics.track(user.id if user else None, VIEW_FAQ)
+        
         await callback.message.edit_text(
             "❓ Часто задаваемые вопросы\n\n"
             "Выберите вопрос:",
@@ -11,6 +11,7 @@ from src.domain.entities.user import User
 from src.domain.entities.payment import PaymentStatus
 from src.domain.repositories.payment_repository import PaymentRepository
 from src.domain.use_cases.payment.create_payment import CreatePaymentUseCase
+from src.infrastructure.database.analytics import analytics, CLICK_PAYMENT, ORDER_CREATED
 from src.infrastructure.database.session import get_db_session
 from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
 from src.presentation.keyboards.inline import payment_keyboard, back_to_menu_keyboard
@@ -20,7 +21,7 @@ router = Router()
 
 
 @router.callback_query(F.data.startswith("tripwire_"))
-async def handle_tripwire_payment(callback: CallbackQuery):
+async def handle_tripwire_payment(callback: CallbackQuery, user: User):
     """Обработка оплаты трипвайера"""
     try:
         await callback.answer()
@@ -28,14 +29,17 @@ async def handle_tripwire_payment(callback: CallbackQuery):
         # Извлекаем тип трипвайера из callback_data
         tripwire_type = callback.data  # tripwire_1byn или tripwire_99byn
         
-        # Получаем пользователя (TODO: реализовать получение из БД)
-        user = User(
-            id=1,  # Временное значение
-            telegram_id=callback.from_user.id,
-            first_name=callback.from_user.first_name,
-            last_name=callback.from_user.last_name,
-            username=callback.from_user.username,
-        )
+        analytics.track(user.id if user else None, CLICK_PAYMENT, {"product": tripwire_type})
+        
+        # Пользователь из AuthMiddleware; для админов он не загружается
+        if user is None:
+            user = User(
+                id=1,  # Временное значение
+                telegram_id=callback.from_user.id,
+                first_name=callback.from_user.first_name,
+                last_name=callback.from_user.last_name,
+                username=callback.from_user.username,
+            )
         
         # Создаем платеж
         async with get_db_session() as session:
@@ -49,6 +53,7 @@ async def handle_tripwire_payment(callback: CallbackQuery):
                     user_email=None,  # TODO: получить email пользователя
                     user_phone=None   # TODO: получить телефон пользователя
                 )
+                analytics.track(order.user_id, ORDER_CREATED, {"product": tripwire_type, "order_id": order.id})
                 
                 # Отправляем ссылку для оплаты
                 product_name = "Трипвайер за 1 BYN" if tripwire_type == "tripwire_1byn" else "Трипвайер за 99 BYN"
@@ -76,7 +81,7 @@ async def handle_tripwire_payment(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("kit_"))
-async def handle_kit_payment(callback: CallbackQuery):
+async def handle_kit_payment(callback: CallbackQuery, user: User):
     """Обработка оплаты аптечки"""
     try:
         await callback.answer()
@@ -84,14 +89,17 @@ async def handle_kit_payment(callback: CallbackQuery):
         # Извлекаем тип аптечки из callback_data
         kit_type = callback.data  # kit_family, kit_summer, kit_child, kit_vacation
         
-        # Получаем пользователя (TODO: реализовать получение из БД)
-        user = User(
-            id=1,  # Временное значение
-            telegram_id=callback.from_user.id,
-            first_name=callback.from_user.first_name,
-            last_name=callback.from_user.last_name,
-            username=callback.from_user.username,
-        )
+        analytics.track(user.id if user else None, CLICK_PAYMENT, {"product": kit_type})
+        
+        # Пользователь из AuthMiddleware; для админов он не загружается
+        if user is None:
+            user = User(
+                id=1,  # Временное значение
+                telegram_id=callback.from_user.id,
+                first_name=callback.from_user.first_name,
+                last_name=callback.from_user.last_name,
+                username=callback.from_user.username,
+            )
         
         # Создаем платеж
         async with get_db_session() as session:
@@ -105,6 +113,7 @@ async def handle_kit_payment(callback: CallbackQuery):
                     user_email=None,  # TODO: получить email пользователя
                     user_phone=None   # TODO: получить телефон пользователя
                 )
+                analytics.track(order.user_id, ORDER_CREATED, {"product": kit_type, "order_id": order.id})
                 
                 # Получаем информацию о продукте
                 product = await payment_repository.get_product_by_slug(kit_type)
@@ -133,19 +142,22 @@ async def handle_kit_payment(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "get_guide")
-async def handle_guide_payment(callback: CallbackQuery):
+async def handle_guide_payment(callback: CallbackQuery, user: User):
     """Обработка оплаты гайда за 1 руб"""
     try:
         await callback.answer()
         
-        # Получаем пользователя (TODO: реализовать получение из БД)
-        user = User(
-            id=1,  # Временное значение
-            telegram_id=callback.from_user.id,
-            first_name=callback.from_user.first_name,
-            last_name=callback.from_user.last_name,
-            username=callback.from_user.username,
-        )
+        analytics.track(user.id if user else None, CLICK_PAYMENT, {"product": "guide_1byn"})
+        
+        # Пользователь из AuthMiddleware; для админов он не загружается
+        if user is None:
+            user = User(
+                id=1,  # Временное значение
+                telegram_id=callback.from_user.id,
+                first_name=callback.from_user.first_name,
+                last_name=callback.from_user.last_name,
+                username=callback.from_user.username,
+            )
         
         # Создаем платеж
         async with get_db_session() as session:
@@ -159,6 +171,7 @@ async def handle_guide_payment(callback: CallbackQuery):
                     user_email=None,  # TODO: получить email пользователя
                     user_phone=None   # TODO: получить телефон пользователя
                 )
+                analytics.track(order.user_id, ORDER_CREATED, {"product": "guide_1byn", "order_id": order.id})
                 
                 await callback.message.edit_text(
                     f"💳 Оплата: Гайд за 1 BYN\n\n"
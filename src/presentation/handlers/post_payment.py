@@ -9,6 +9,7 @@ from loguru import logger
 from src.domain.entities.user import User
 from src.domain.repositories.payment_repository import PaymentRepository
 from src.domain.use_cases.payment.deliver_file import DeliverFileUseCase
+from src.infrastructure.database.analytics import analytics, DOWNLOAD
 from src.infrastructure.database.session import get_db_session
 from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
 from src.presentation.keyboards.inline import back_to_menu_keyboard
@@ -26,9 +27,10 @@ async def download_tripwire(callback: CallbackQuery, user: User):
             payment_repository = SQLAlchemyPaymentRepository(session)
             deliver_file_uc = DeliverFileUseCase(payment_repository)
             
-            # Проверяем, какой трипвайер есть у пользователя
-            has_tripwire_1byn = await payment_repository.has_user_product(user.id, "tripwire_1byn")
-            has_tripwire_99byn = await payment_repository.has_user_product(user.id, "tripwire_99byn")
+            # Проверяем, какой трипвайер есть у пользователя (один запрос на все покупки)
+            entitlements = await payment_repository.get_user_entitlements(user.id)
+            has_tripwire_1byn = "tripwire_1byn" in entitlements
+            has_tripwire_99byn = "tripwire_99byn" in entitlements
             
             if has_tripwire_99byn:
                 file_id = await deliver_file_uc.execute(user, "tripwire_99byn")
@@ -56,6 +58,9 @@ async def download_tripwire(callback: CallbackQuery, user: User):
                     caption=f"✅ {product_name} - Спасибо за покупку!"
                 )
                 
+                analytics.track(
+                    user.id, DOWNLOAD, {"product": "tripwire_99byn" if has_tripwire_99byn else "tripwire_1byn"}
+                )
                 logger.info(f"Tripwire delivered to user {user.telegram_id}")
             else:
                 await callback.message.answer(
@@ -93,6 +98,7 @@ async def download_guide(callback: CallbackQuery, user: User):
                     caption="✅ Гайд за 1 BYN - Спасибо за покупку!"
                 )
                 
+                analytics.track(user.id, DOWNLOAD, {"product": "guide_1byn"})
                 logger.info(f"Guide delivered to user {user.telegram_id}")
             else:
                 await callback.message.answer(
@@ -137,6 +143,7 @@ async def download_kit(callback: CallbackQuery, user: User):
                     caption=f"✅ {product_name} - Спасибо за покупку!"
                 )
                 
+                analytics.track(user.id, DOWNLOAD, {"product": kit_type})
                 logger.info(f"Kit {kit_type} delivered to user {user.telegram_id}")
             else:
                 await callback.message.answer(
@@ -173,9 +180,7 @@ async def show_my_purchases(callback: CallbackQuery, user: User):
             purchases_text = "📦 Мои покупки:\n\n"
             
             for user_product in user_products:
-                product = await payment_repository.get_product_by_slug(
-                    f"product_{user_product.product_id}"  # TODO: Получить slug продукта
-                )
+                product = await payment_repository.get_product_by_id(user_product.product_id)
                 product_name = product.name if product else f"Продукт {user_product.product_id}"
                 
                 status = "✅ Доставлен" if user_product.file_delivered else "📥 В обработке"
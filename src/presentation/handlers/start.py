@@ -10,8 +10,11 @@ from loguru import logger
 from src.domain.entities.user import User
 from src.domain.repositories.user_repository import UserRepository
 from src.domain.use_cases.user.create_or_update_user import CreateOrUpdateUserUseCase
-from src.infrastructure.database.session import get_db_session
+from src.infrastructure.cache.user_cache import user_cache
+from src.infrastructure.database.analytics import analytics, START
+from src.infrastructure.database.session import after_commit, get_db_session
 from src.infrastructure.database.repositories.user_repository import SQLAlchemyUserRepository
+from src.infrastructure.database.repositories.payment_repository import SQLAlchemyPaymentRepository
 from src.presentation.keyboards.inline import main_menu_keyboard
 from src.utils.helpers import parse_referral_start_param, format_user_display_name
 
@@ -37,8 +40,15 @@ async def start_command(message: Message):
             create_or_update_user_uc = CreateOrUpdateUserUseCase(user_repository)
             
             db_user = await create_or_update_user_uc.execute(user)
+            after_commit(session, lambda: user_cache.set(db_user))
             
             # TODO: Обработать реферальную программу если referral_id
+            
+            # Проверяем, есть ли у пользователя трипвайер
+            payment_repository = SQLAlchemyPaymentRepository(session)
+            has_tripwire = await payment_repository.has_user_product(db_user.id, "tripwire_1byn")
+        
+        analytics.track(db_user.id, START, {"referral_id": referral_id} if referral_id else None)
         
         # Логирование
         display_name = format_user_display_name(
@@ -51,9 +61,6 @@ async def start_command(message: Message):
         if referral_id:
             logger.info(f"Referral detected: {referral_id}")
         
-        # Проверяем, есть ли у пользователя трипвайер
-        has_tripwire = False  # TODO: Реализовать проверку через PaymentRepository
-        
         # Отправка приветственного сообщения
         await message.answer(
             "👋 Добро пожаловать в бот аптечек!\n\n"
@@ -62,7 +69,7 @@ async def start_command(message: Message):
             "• Подробные описания и рекомендации\n"
             "• Возможность проверить свои знания\n\n"
             "Выберите действие:",
-            reply_markup=main_menu_keyboard(has_tripwire=has_tripwire)
+            reply_markup=main_menu_keyboard(has_tripwire=not has_tripwire)
         )
         
     except Exception as e:
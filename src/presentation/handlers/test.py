@@ -11,6 +11,8 @@ from src.domain.entities.user import User
 from src.domain.repositories.test_repository import TestRepository
 from src.domain.use_cases.test.start_test import StartTestUseCase
 from src.domain.use_cases.test.process_test_answer import ProcessTestAnswerUseCase
+from src.domain.use_cases.test.test_questions import TestQuestionsService
+from src.infrastructure.database.analytics import analytics, TEST_STARTED, TEST_COMPLETED
 from src.infrastructure.database.session import get_db_session
 from src.infrastructure.database.repositories.test_repository import SQLAlchemyTestRepository
 from src.presentation.keyboards.inline import (
@@ -18,17 +20,21 @@ from src.presentation.keyboards.inline import (
     back_to_menu_keyboard,
     test_result_keyboard
 )
+from src.presentation.replies import reply_to_callback
 from src.presentation.states import TestStates
 
 router = Router()
 
+# Callback'и теста: короткие обработчики, отвечающие через reply_to_callback.
+# В режиме webhook обрабатываются до ответа Telegram, ответ на callback
+# уходит телом ответа на webhook.
+QUICK_CALLBACKS = ("take_test", "test_answer_", "test_knowledge")
+
 
 @router.callback_query(F.data == "take_test")
 async def start_test(callback: CallbackQuery, state: FSMContext, user: User):
     """Начать тест"""
     try:
-        await callback.answer()
-        
         async with get_db_session() as session:
             test_repository = SQLAlchemyTestRepository(session)
             start_test_uc = StartTestUseCase(test_repository)
@@ -45,15 +51,20 @@ async def start_test(callback: CallbackQuery, state: FSMContext, user: User):
             total_questions = test_data["total_questions"]
             attempts = test_data["attempts"]
             
-            await callback.message.edit_text(
+            logger.debug("Test started for user {}, question {}", user.telegram_id, question_number)
+        
+        analytics.track(user.id, TEST_STARTED, {"attempt": attempts})
+        
+        return await reply_to_callback(
+            callback,
+            callback.message.edit_text(
                 f"🧠 Тест из {total_questions} каверзных вопросов\n"
                 f"Попытка: {attempts}\n"
                 f"Вопрос {question_number} из {total_questions}\n\n"
                 f"❓ {question.question}",
                 reply_markup=test_question_keyboard(question.options, question.id)
-            )
-            
-            logger.info(f"Test started for user {user.telegram_id}, question {question_number}")
+            ),
+        )
         
     except Exception as e:
         logger.error(f"Error starting test: {e}")
@@ -64,8 +75,6 @@ async def start_test(callback: CallbackQuery, state: FSMContext, user: User):
 async def process_test_answer(callback: CallbackQuery, state: FSMContext, user: User):
     """Обработать ответ на вопрос теста"""
     try:
-        await callback.answer()
-        
         # Извлекаем данные из callback_data
         # Формат: test_answer_questionId_answerIndex
         parts = callback.data.split("_")
@@ -81,64 +90,61 @@ async def process_test_answer(callback: CallbackQuery, state: FSMContext, user:
             
             # Обрабатываем ответ
             result = await process_answer_uc.execute(test_data, answer_index)
+        
+        if result["is_test_completed"]:
+            # Тест завершен
+            await state.set_state(TestStates.test_completed)
+            await state.clear()
             
-            if result["is_test_completed"]:
-                # Тест завершен
-                await state.set_state(TestStates.test_completed)
-                await state.clear()
-                
-                test_result = result["test_result"]
-                score = result["score"]
-                total_questions = result["total_questions"]
-                percentage = result["percentage"]
-                result_message = result["result_message"]
-                
-                await callback.message.edit_text(
+            test_result = result["test_result"]
+            score = result["score"]
+            total_questions = result["total_questions"]
+            percentage = result["percentage"]
+            result_message = result["result_message"]
+            
+            # Добавляем приглашение "Заявка в шоу 'Кто хочет стать Миллионером'" если тест пройден
+            if test_result.passed:
+                follow_up = "🎉 Поздравляем! Вы прошли тест!\n\n🎪 Заявка в шоу 'Кто хочет стать Миллионером'"
+            else:
+                follow_up = "💡 Рекомендуем изучить наши аптечки для улучшения знаний!"
+            
+            logger.info(f"Test completed for user {user.telegram_id}: {score}/{total_questions}")
+            analytics.track(user.id, TEST_COMPLETED, {"score": score, "passed": test_result.passed})
+            
+            # Итог и кнопка меню - одним редактированием
+            return await reply_to_callback(
+                callback,
+                callback.message.edit_text(
                     f"🎯 Тест завершен!\n\n"
                     f"📊 Результат: {score} из {total_questions} ({percentage:.1f}%)\n\n"
                     f"{result_message}\n\n"
-                    f"{'🎉 Поздравляем! Вы прошли тест!' if test_result.passed else '💡 Рекомендуем изучить наши аптечки для улучшения знаний!'}"
-                )
-                
-                # Добавляем кнопку "Заявка в шоу 'Кто хочет стать Миллионером'" если тест пройден
-                if test_result.passed:
-                    await callback.message.answer(
-                        "🎪 Заявка в шоу 'Кто хочет стать Миллионером'",
-                        reply_markup=back_to_menu_keyboard()
-                    )
-                else:
-                    await callback.message.answer(
-                        "💊 Рекомендуем изучить наши аптечки!",
-                        reply_markup=back_to_menu_keyboard()
-                    )
-                
-                logger.info(f"Test completed for user {user.telegram_id}: {score}/{total_questions}")
-                
-            else:
-                # Переходим к следующему вопросу
-                await state.update_data(**result["test_data"])
-                
-                next_question = result["next_question"]
-                question_number = result["question_number"]
-                total_questions = result["total_questions"]
-                is_correct = result["current_answer_correct"]
-                explanation = result["explanation"]
-                
-                # Отправляем результат текущего вопроса
-                await callback.message.edit_text(
-                    f"{'✅ Правильно!' if is_correct else '❌ Неправильно'}\n\n"
-                    f"💡 {explanation}\n\n"
-                    f"Переходим к следующему вопросу..."
-                )
-                
-                # Ждем немного и отправляем следующий вопрос
-                await callback.message.answer(
-                    f"🧠 Вопрос {question_number} из {total_questions}\n\n"
-                    f"❓ {next_question.question}",
-                    reply_markup=test_question_keyboard(next_question.options, next_question.id)
-                )
-                
-                logger.info(f"Question {question_number} answered for user {user.telegram_id}")
+                    f"{follow_up}",
+                    reply_markup=back_to_menu_keyboard()
+                ),
+            )
+        
+        # Переходим к следующему вопросу
+        await state.update_data(**result["test_data"])
+        
+        next_question = result["next_question"]
+        question_number = result["question_number"]
+        total_questions = result["total_questions"]
+        is_correct = result["current_answer_correct"]
+        explanation = result["explanation"]
+        
+        logger.debug("Question {} answered for user {}", question_number, user.telegram_id)
+        
+        # Результат текущего вопроса и следующий вопрос - одним редактированием
+        return await reply_to_callback(
+            callback,
+            callback.message.edit_text(
+                f"{'✅ Правильно!' if is_correct else '❌ Неправильно'}\n\n"
+                f"💡 {explanation}\n\n"
+                f"🧠 Вопрос {question_number} из {total_questions}\n\n"
+                f"❓ {next_question.question}",
+                reply_markup=test_question_keyboard(next_question.options, next_question.id)
+            ),
+        )
         
     except Exception as e:
         logger.error(f"Error processing test answer: {e}")
@@ -149,18 +155,19 @@ async def process_test_answer(callback: CallbackQuery, state: FSMContext, user:
 async def test_knowledge_info(callback: CallbackQuery):
     """Информация о тесте знаний"""
     try:
-        await callback.answer()
-        
-        await callback.message.edit_text(
-            "🧠 Проверить знания!\n\n"
-            "Пройдите тест из 6 каверзных вопросов и проверьте свои знания об аптечках!\n\n"
-            "Тест включает вопросы о:\n"
-            "• Лекарствах для детей\n"
-            "• Хранении медикаментов\n"
-            "• Правильном приеме препаратов\n"
-            "• Безопасности лекарств\n\n"
-            "Готовы проверить свои знания?",
-            reply_markup=back_to_menu_keyboard()
+        return await reply_to_callback(
+            callback,
+            callback.message.edit_text(
+                "🧠 Проверить знания!\n\n"
+                f"Пройдите тест из {len(TestQuestionsService.get_bank())} каверзных вопросов и проверьте свои знания об аптечках!\n\n"
+                "Тест включает вопросы о:\n"
+                "• Лекарствах для детей\n"
+                "• Хранении медикаментов\n"
+                "• Правильном приеме препаратов\n"
+                "• Безопасности лекарств\n\n"
+                "Готовы проверить свои знания?",
+                reply_markup=back_to_menu_keyboard()
+            ),
         )
         
     except Exception as e:
@@ -3,7 +3,10 @@ Inline keyboards
 """
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+from src.domain.use_cases.test.test_questions import QuestionBank
+from src.infrastructure.telegram.keyboard_registry import keyboard_registry
 
 
 def create_inline_keyboard(
@@ -14,7 +17,7 @@ def create_inline_keyboard(
     Создание inline клавиатуры
     
     Args:
-        buttons: Список списков кнопок, где каждая кнопка - dict с 'text' и 'callback_data'
+        buttons: Список списков кнопок, где каждая кнопка - dict с 'text' и 'callback_data' или 'url'
         row_width: Количество кнопок в ряду
     
     Returns:
@@ -27,7 +30,8 @@ def create_inline_keyboard(
         for button_data in row:
             button = InlineKeyboardButton(
                 text=button_data["text"],
-                callback_data=button_data["callback_data"]
+                callback_data=button_data.get("callback_data"),
+                url=button_data.get("url")
             )
             keyboard_row.append(button)
         keyboard.append(keyboard_row)
@@ -35,6 +39,7 @@ def create_inline_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@keyboard_registry.cached
 def main_menu_keyboard(has_tripwire: bool = True) -> InlineKeyboardMarkup:
     """Главное меню бота"""
     if has_tripwire:
@@ -70,6 +75,7 @@ def main_menu_keyboard(has_tripwire: bool = True) -> InlineKeyboardMarkup:
     return create_inline_keyboard(buttons)
 
 
+@keyboard_registry.cached
 def kits_menu_keyboard() -> InlineKeyboardMarkup:
     """Меню аптечек"""
     buttons = [
@@ -89,6 +95,7 @@ def kits_menu_keyboard() -> InlineKeyboardMarkup:
     return create_inline_keyboard(buttons)
 
 
+@keyboard_registry.cached
 def about_me_keyboard() -> InlineKeyboardMarkup:
     """Меню 'Обо мне'"""
     buttons = [
@@ -107,6 +114,7 @@ def about_me_keyboard() -> InlineKeyboardMarkup:
     return create_inline_keyboard(buttons)
 
 
+@keyboard_registry.cached
 def faq_keyboard() -> InlineKeyboardMarkup:
     """FAQ меню"""
     buttons = [
@@ -143,6 +151,7 @@ def payment_keyboard(payment_url: str, product_name: str) -> InlineKeyboardMarku
     return create_inline_keyboard(buttons)
 
 
+@keyboard_registry.cached
 def faq_response_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура после ответа FAQ"""
     buttons = [
@@ -155,7 +164,8 @@ def faq_response_keyboard() -> InlineKeyboardMarkup:
     return create_inline_keyboard(buttons)
 
 
-def test_question_keyboard(options: list, question_id: int) -> InlineKeyboardMarkup:
+@keyboard_registry.cached
+def test_question_keyboard(options: Tuple[str, ...], question_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для вопроса теста"""
     buttons = []
     
@@ -168,6 +178,13 @@ def test_question_keyboard(options: list, question_id: int) -> InlineKeyboardMar
     return create_inline_keyboard(buttons)
 
 
+def prebuild_test_question_keyboards(bank: QuestionBank):
+    """Построить клавиатуры всех вопросов, чтобы обработчики ответов брали их из кеша"""
+    for question in bank.questions:
+        test_question_keyboard(question.options, question.id)
+
+
+@keyboard_registry.cached
 def test_result_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура после завершения теста"""
     buttons = [
@@ -180,6 +197,7 @@ def test_result_keyboard() -> InlineKeyboardMarkup:
     return create_inline_keyboard(buttons)
 
 
+@keyboard_registry.cached
 def back_to_menu_keyboard() -> InlineKeyboardMarkup:
     """Кнопка возврата в меню"""
     buttons = [
@@ -189,3 +207,55 @@ def back_to_menu_keyboard() -> InlineKeyboardMarkup:
     ]
     
     return create_inline_keyboard(buttons)
+
+
+def broadcast_confirm_keyboard(broadcast_id: int) -> InlineKeyboardMarkup:
+    """Подтверждение запуска рассылки"""
+    buttons = [
+        [
+            {"text": "🚀 Запустить", "callback_data": f"broadcast_launch_{broadcast_id}"},
+            {"text": "❌ Отмена", "callback_data": f"broadcast_cancel_{broadcast_id}"},
+        ]
+    ]
+    
+    return create_inline_keyboard(buttons)
+
+
+def broadcast_progress_keyboard(broadcast_id: int) -> InlineKeyboardMarkup:
+    """Остановка запущенной рассылки"""
+    buttons = [
+        [
+            {"text": "⛔ Остановить", "callback_data": f"broadcast_cancel_{broadcast_id}"},
+        ]
+    ]
+    
+    return create_inline_keyboard(buttons)
+
+
+@keyboard_registry.cached
+def offer_keyboard(product_slug: str, product_name: str) -> InlineKeyboardMarkup:
+    """Клавиатура оффера по таймеру"""
+    buttons = [
+        [
+            {"text": f"💳 Купить: {product_name}", "callback_data": product_slug},
+        ],
+        [
+            {"text": "🏠 Главное меню", "callback_data": "back_to_main"},
+        ]
+    ]
+    
+    return create_inline_keyboard(buttons)
+
+
+# Статические меню строятся при импорте, до первого обновления
+for _prebuilt in (
+    lambda: main_menu_keyboard(True),
+    lambda: main_menu_keyboard(False),
+    kits_menu_keyboard,
+    about_me_keyboard,
+    faq_keyboard,
+    faq_response_keyboard,
+    test_result_keyboard,
+    back_to_menu_keyboard,
+):
+    _prebuilt()
@@ -10,7 +10,9 @@ from loguru import logger
 from src.domain.entities.user import User
 from src.domain.repositories.user_repository import UserRepository
 from src.domain.use_cases.user.create_or_update_user import CreateOrUpdateUserUseCase
-from src.infrastructure.database.session import get_db_session
+from src.infrastructure.cache.user_cache import user_cache
+from src.infrastructure.database.activity_tracker import activity_tracker
+from src.infrastructure.database.session import after_commit, get_db_session
 from src.infrastructure.database.repositories.user_repository import SQLAlchemyUserRepository
 from src.config.settings import settings
 
@@ -45,33 +47,43 @@ class AuthMiddleware(BaseMiddleware):
             return await handler(event, data)
         
         try:
-            # Получаем или создаем пользователя в БД
-            async with get_db_session() as session:
-                user_repository = SQLAlchemyUserRepository(session)
-                create_or_update_user_uc = CreateOrUpdateUserUseCase(user_repository)
-                
-                db_user = await create_or_update_user_uc.execute(telegram_user)
-                
-                # Проверяем, заблокирован ли пользователь
-                if db_user.is_blocked:
-                    logger.warning(f"Blocked user {db_user.telegram_id} tried to use bot")
+            # Пользователь из кеша, если профиль в Telegram не менялся
+            db_user = user_cache.get(telegram_user.id)
+            
+            if db_user is None or CreateOrUpdateUserUseCase.has_profile_changes(db_user, telegram_user):
+                # Получаем или создаем пользователя в БД
+                async with get_db_session() as session:
+                    user_repository = SQLAlchemyUserRepository(session)
+                    create_or_update_user_uc = CreateOrUpdateUserUseCase(user_repository)
                     
-                    if isinstance(event, Message):
-                        await event.answer(
-                            "❌ Ваш аккаунт заблокирован. Обратитесь в поддержку для получения помощи."
-                        )
-                    elif isinstance(event, CallbackQuery):
-                        await event.answer(
-                            "❌ Ваш аккаунт заблокирован. Обратитесь в поддержку для получения помощи.",
-                            show_alert=True
-                        )
+                    db_user = await create_or_update_user_uc.execute(telegram_user)
                     
-                    return  # Не выполняем обработчик
+                    # В кеш - только после коммита единицы работы
+                    after_commit(session, lambda: user_cache.set(db_user))
+            
+            # Проверяем, заблокирован ли пользователь
+            if db_user.is_blocked:
+                logger.warning(f"Blocked user {db_user.telegram_id} tried to use bot")
                 
-                # Добавляем пользователя в данные
-                data["user"] = db_user
-                data["is_admin"] = db_user.is_admin
+                if isinstance(event, Message):
+                    await event.answer(
+                        "❌ Ваш аккаунт заблокирован. Обратитесь в поддержку для получения помощи."
+                    )
+                elif isinstance(event, CallbackQuery):
+                    await event.answer(
+                        "❌ Ваш аккаунт заблокирован. Обратитесь в поддержку для получения помощи.",
+                        show_alert=True
+                    )
                 
+                return  # Не выполняем обработчик
+            
+            # Активность записывается в БД пачками
+            activity_tracker.touch(db_user.id)
+            
+            # Добавляем пользователя в данные
+            data["user"] = db_user
+            data["is_admin"] = db_user.is_admin
+            
         except Exception as e:
             logger.error(f"Error in auth middleware for user {telegram_user.id}: {e}")
             # В случае ошибки продолжаем выполнение без пользователя
@@ -2,6 +2,7 @@
 Error handler middleware
 """
 
+import time
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
@@ -22,6 +23,9 @@ class ErrorHandlerMiddleware(BaseMiddleware):
     ) -> Any:
         """Обработка события с обработкой ошибок"""
         
+        # Отметка начала обработки: по ней считается время в middleware
+        data["update_started_at"] = time.monotonic()
+        
         try:
             return await handler(event, data)
             
@@ -2,15 +2,32 @@
 Logging middleware
 """
 
+import time
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
-from loguru import logger
-from datetime import datetime
+
+from src.config.logging import category_logger
+from src.infrastructure.monitoring.metrics import (
+    handler_duration,
+    handler_errors,
+    handler_labels,
+    middleware_duration,
+)
+
+# Журнал обновлений: самая частая категория, прореживается через LOG_SAMPLE_RATES
+updates_logger = category_logger("updates")
 
 
 class LoggingMiddleware(BaseMiddleware):
-    """Middleware для логирования действий пользователей"""
+    """
+    Middleware для логирования действий пользователей
+    
+    Обновления пишутся на уровне DEBUG с отложенным форматированием:
+    при уровне INFO и выше запись отбрасывается до сборки строки.
+    Здесь же снимаются метрики: время обработчика и время, проведенное
+    в предыдущих middleware (от отметки ErrorHandlerMiddleware).
+    """
     
     async def __call__(
         self,
@@ -19,47 +36,54 @@ class LoggingMiddleware(BaseMiddleware):
         data: Dict[str, Any]
     ) -> Any:
         """Обработка события с логированием"""
-        start_time = datetime.utcnow()
+        start_time = time.monotonic()
+        
+        update_started_at = data.get("update_started_at")
+        if update_started_at is not None:
+            middleware_duration.labels(type(event).__name__).observe(start_time - update_started_at)
         
         # Получаем информацию о пользователе
         user_id = None
-        username = None
-        event_type = type(event).__name__
         
         if isinstance(event, Message):
             user_id = event.from_user.id
-            username = event.from_user.username
-            content = event.text or f"[{event.content_type}]"
-            
-            logger.info(
-                f"Message from user {user_id} (@{username}): {content[:100]}"
+            updates_logger.opt(lazy=True).debug(
+                "Message from user {} (@{}): {}",
+                lambda: event.from_user.id,
+                lambda: event.from_user.username,
+                lambda: (event.text or f"[{event.content_type}]")[:100],
             )
-            
+        
         elif isinstance(event, CallbackQuery):
             user_id = event.from_user.id
-            username = event.from_user.username
-            callback_data = event.data
-            
-            logger.info(
-                f"Callback from user {user_id} (@{username}): {callback_data}"
+            updates_logger.debug(
+                "Callback from user {} (@{}): {}",
+                user_id, event.from_user.username, event.data
             )
         
+        labels = handler_labels(data.get("handler"))
+        
         # Выполняем обработчик
         try:
             result = await handler(event, data)
             
             # Логируем успешное выполнение
-            execution_time = (datetime.utcnow() - start_time).total_seconds()
-            logger.debug(
-                f"Handler executed successfully for user {user_id} in {execution_time:.3f}s"
+            elapsed = time.monotonic() - start_time
+            handler_duration.labels(*labels).observe(elapsed)
+            updates_logger.debug(
+                "Handler executed successfully for user {} in {:.3f}s",
+                user_id, elapsed
             )
             
             return result
-            
+        
         except Exception as e:
             # Логируем ошибку
-            execution_time = (datetime.utcnow() - start_time).total_seconds()
-            logger.error(
-                f"Handler error for user {user_id} after {execution_time:.3f}s: {e}"
+            elapsed = time.monotonic() - start_time
+            handler_duration.labels(*labels).observe(elapsed)
+            handler_errors.labels(*labels).inc()
+            updates_logger.error(
+                "Handler error for user {} after {:.3f}s: {}",
+                user_id, elapsed, e
             )
             raise
@@ -2,27 +2,44 @@
 Throttling middleware
 """
 
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional, Tuple
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
 from loguru import logger
-from datetime import datetime, timedelta
 
-from collections import defaultdict
+from src.config.settings import settings
+from src.infrastructure.monitoring.metrics import throttled_total
+from src.infrastructure.telegram.rate_limit import create_throttle_limiter
+from src.utils.rate_limiter import RateLimit
+
+# Действие -> префиксы callback data; остальные события относятся к default
+THROTTLE_ACTIONS: Dict[str, Tuple[str, ...]] = {
+    "payment": ("tripwire_", "kit_", "get_guide"),
+    "test": ("test_answer_",),
+}
 
 
 class ThrottlingMiddleware(BaseMiddleware):
-    """Middleware для ограничения частоты запросов"""
+    """
+    Middleware для ограничения частоты запросов
+    
+    Лимиты задаются по действиям (THROTTLE_LIMITS) и считаются по паре
+    (пользователь, действие) через GCRA: на ключ хранится одно значение,
+    простаивающие ключи вытесняются. Один экземпляр нужно регистрировать
+    и для сообщений, и для callback'ов, чтобы лимиты были общими.
+    """
     
-    def __init__(self, rate_limit: int = 10, time_window: int = 60):
+    def __init__(self, limiter=None, limits: Optional[Dict[str, str]] = None):
         """
         Args:
-            rate_limit: Максимальное количество запросов
-            time_window: Временное окно в секундах
+            limiter: Ограничитель (по умолчанию - по настройке THROTTLE_BACKEND)
+            limits: Лимиты по действиям в виде "запросов/секунд"
         """
-        self.rate_limit = rate_limit
-        self.time_window = time_window
-        self.user_requests = defaultdict(list)
+        self.limiter = limiter or create_throttle_limiter()
+        self.limits = {
+            action: RateLimit.parse(value)
+            for action, value in (limits or settings.throttle_limits).items()
+        }
     
     async def __call__(
         self,
@@ -43,16 +60,13 @@ class ThrottlingMiddleware(BaseMiddleware):
             return await handler(event, data)
         
         # Проверяем лимиты
-        now = datetime.utcnow()
-        user_requests = self.user_requests[user_id]
-        
-        # Удаляем старые запросы
-        cutoff_time = now - timedelta(seconds=self.time_window)
-        user_requests[:] = [req_time for req_time in user_requests if req_time > cutoff_time]
+        action = self._get_action(event)
+        rate_limit = self.limits.get(action, self.limits["default"])
+        retry_after = await self.limiter.hit((user_id, action), rate_limit)
         
-        # Проверяем, превышен ли лимит
-        if len(user_requests) >= self.rate_limit:
-            logger.warning(f"Rate limit exceeded for user {user_id}")
+        if retry_after:
+            logger.warning(f"Rate limit exceeded for user {user_id} ({action}), retry after {retry_after:.1f}s")
+            throttled_total.labels(action).inc()
             
             if isinstance(event, Message):
                 await event.answer(
@@ -66,7 +80,12 @@ class ThrottlingMiddleware(BaseMiddleware):
             
             return  # Не выполняем обработчик
         
-        # Добавляем текущий запрос
-        user_requests.append(now)
-        
         return await handler(event, data)
+    
+    def _get_action(self, event: TelegramObject) -> str:
+        """Действие, к которому относится событие"""
+        if isinstance(event, CallbackQuery) and event.data:
+            for action, prefixes in THROTTLE_ACTIONS.items():
+                if action in self.limits and event.data.startswith(prefixes):
+                    return action
+        return "default"
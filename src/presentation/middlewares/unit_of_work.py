@@ -0,0 +1,31 @@
+"""
+Unit of work middleware
+"""
+
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.infrastructure.database.session import unit_of_work
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """
+    Middleware единицы работы: одна ленивая сессия БД на обновление
+    
+    Сессия передается в data["session"] и используется всеми
+    get_db_session() обработчика и следующих middleware. Соединение
+    берется из пула только при первом запросе, коммит - один, после
+    обработчика.
+    """
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        """Обработка события в единице работы"""
+        async with unit_of_work() as session:
+            data["session"] = session
+            return await handler(event, data)
@@ -0,0 +1,39 @@
+"""
+Ответы на callback-запросы
+"""
+
+import asyncio
+from typing import Any, Awaitable, Optional
+
+from aiogram.methods import AnswerCallbackQuery
+from aiogram.types import CallbackQuery
+
+from src.config.settings import settings
+
+
+async def reply_to_callback(
+    callback: CallbackQuery,
+    *requests: Awaitable[Any],
+    text: Optional[str] = None,
+    show_alert: bool = False,
+) -> Optional[AnswerCallbackQuery]:
+    """
+    Выполнить независимые запросы к Bot API и ответить на callback
+    
+    Запросы (например, edit_text) выполняются параллельно. В режиме webhook
+    answerCallbackQuery не отправляется отдельным запросом, а возвращается:
+    обработчик должен вернуть результат, и aiogram передаст его телом
+    ответа на webhook (если callback входит в QUICK_CALLBACKS теста; иначе
+    aiogram отправит его отдельным запросом после обработки в фоне).
+    В режиме polling ответ отправляется параллельно с остальными запросами.
+    
+    Использование: return await reply_to_callback(callback, callback.message.edit_text(...))
+    """
+    answer = callback.answer(text=text, show_alert=show_alert)
+    
+    if settings.is_webhook_mode:
+        await asyncio.gather(*requests)
+        return answer
+    
+    await asyncio.gather(answer, *requests)
+    return None
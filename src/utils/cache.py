@@ -0,0 +1,74 @@
+"""
+In-process кеши
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class TTLCache(Generic[K, V]):
+    """LRU кеш с ограниченным временем жизни записей"""
+    
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ):
+        """
+        Args:
+            maxsize: Максимальное количество записей
+            ttl: Время жизни записи в секундах
+            on_evict: Вызывается для записей, вытесненных по размеру или истекших
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+    
+    def get(self, key: K, default: Any = None) -> Optional[V]:
+        """Получить значение, если оно есть и не истекло"""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            if self.on_evict:
+                self.on_evict(key, value)
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: K, value: V):
+        """Сохранить значение, вытесняя самые старые записи"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        
+        while len(self._data) > self.maxsize:
+            evicted_key, (_, evicted_value) = self._data.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(evicted_key, evicted_value)
+    
+    def pop(self, key: K, default: Any = None) -> Optional[V]:
+        """Удалить значение"""
+        item = self._data.pop(key, None)
+        if item is None:
+            return default
+        return item[1]
+    
+    def clear(self):
+        """Очистить кеш"""
+        self._data.clear()
+    
+    def __contains__(self, key: K) -> bool:
+        return self.get(key) is not None
+    
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,123 @@
+"""
+Ограничение скорости исходящих запросов
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+
+class TokenBucket:
+    """Асинхронный token bucket"""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Скорость пополнения, токенов в секунду
+            capacity: Размер корзины (допустимый всплеск). По умолчанию 1 -
+                запросы распределяются равномерно.
+        """
+        self.rate = rate
+        self.capacity = capacity or 1.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Дождаться и забрать один токен (ожидающие обслуживаются по очереди)"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+    
+    def pause(self, seconds: float):
+        """Приостановить выдачу токенов (например, по RetryAfter от Telegram)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+
+class RateLimit(NamedTuple):
+    """Лимит: не более limit запросов за period секунд"""
+    
+    limit: int
+    period: float
+    
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Разбор лимита из строки вида "10/60" """
+        limit, _, period = value.partition("/")
+        rate_limit = cls(int(limit), float(period))
+        if rate_limit.limit <= 0 or rate_limit.period <= 0:
+            raise ValueError(f"Invalid rate limit: {value}")
+        return rate_limit
+    
+    @property
+    def interval(self) -> float:
+        """Интервал между запросами при равномерном потоке"""
+        return self.period / self.limit
+    
+    @property
+    def tolerance(self) -> float:
+        """Допустимое опережение графика (всплеск до limit запросов)"""
+        return self.period - self.interval
+
+
+class GCRALimiter:
+    """
+    Ограничение частоты запросов по ключам (GCRA)
+    
+    На ключ хранится одно число - теоретическое время следующего запроса
+    (TAT), поэтому проверка и память на ключ O(1). Ключи лежат в LRU:
+    простаивающие ключи, у которых TAT уже в прошлом, неотличимы от
+    отсутствующих и вытесняются по ходу работы, а размер ограничен maxsize.
+    """
+    
+    def __init__(self, maxsize: int):
+        """
+        Args:
+            maxsize: Максимальное количество отслеживаемых ключей
+        """
+        self.maxsize = maxsize
+        self._tats: OrderedDict[Hashable, float] = OrderedDict()
+    
+    async def hit(self, key: Hashable, rate_limit: RateLimit) -> float:
+        """
+        Учесть запрос
+        
+        Returns:
+            0, если запрос разрешен, иначе через сколько секунд повторить
+        """
+        now = time.monotonic()
+        tat = max(self._tats.get(key, now), now)
+        
+        if tat - now > rate_limit.tolerance:
+            return tat - rate_limit.tolerance - now
+        
+        self._tats[key] = tat + rate_limit.interval
+        self._tats.move_to_end(key)
+        self._evict(now)
+        return 0.0
+    
+    def _evict(self, now: float):
+        """Вытеснение простаивающих ключей и ключей сверх maxsize"""
+        while self._tats:
+            key, tat = next(iter(self._tats.items()))
+            if tat > now and len(self._tats) <= self.maxsize:
+                break
+            del self._tats[key]
+    
+    def __len__(self) -> int:
+        return len(self._tats)